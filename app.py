@@ -1,12 +1,19 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
+import hashlib
 import logging
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime, timedelta
-from openstack_client import OpenStackClient
+from openstack_client import OpenStackClient, run_parallel
 from config import Config
 from database import get_db_manager
+from jobs import JobManager
+from events import EventBroker
+from retention import normalize_policy, build_backup_chains
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +37,188 @@ except Exception as e:
     logger.error(f"初始化数据库管理器失败: {e}")
     db_manager = None
 
+# 删除耗时样本保存到数据库，清理预演在重启后和命令行工具中都能使用
+if openstack_client and db_manager:
+    openstack_client.latency_store = db_manager
+
+# ==================== 后台任务 ====================
+
+def _backup_job_handler(backup_type):
+    """批量创建备份任务"""
+    def handler(params, progress):
+        volume_ids = params.get('volume_ids', [])
+        progress.set_total(len(volume_ids))
+        results = openstack_client.create_backups(
+            volume_ids, backup_type, params.get('name'),
+            concurrency=params.get('concurrency'), on_result=progress.report
+        )
+        return {"success_count": sum(1 for r in results if r.get('success')), "total": len(results)}
+    return handler
+
+def _volume_snapshot_job(params, progress):
+    """批量创建云硬盘快照任务"""
+    volume_ids = params.get('volume_ids', [])
+    progress.set_total(len(volume_ids))
+    results = run_parallel(
+        lambda volume_id: openstack_client.create_volume_snapshot(
+            volume_id, params.get('name'), params.get('description'), params.get('force', False)
+        ),
+        volume_ids, Config.BACKUP_BATCH_CONCURRENCY, progress.report
+    )
+    return {"success_count": sum(1 for r in results if r.get('success')), "total": len(results)}
+
+def _server_snapshot_job(params, progress):
+    """批量创建云主机快照任务"""
+    server_ids = params.get('server_ids', [])
+    progress.set_total(len(server_ids))
+    results = run_parallel(
+        lambda server_id: openstack_client.create_server_snapshot(
+            server_id, params.get('name'), params.get('description')
+        ),
+        server_ids, Config.BACKUP_BATCH_CONCURRENCY, progress.report
+    )
+    return {"success_count": sum(1 for r in results if r.get('success')), "total": len(results)}
+
+def _cleanup_job(params, progress):
+    """备份清理任务"""
+    progress.set_total(1)
+    if params.get('volume_policies') or params.get('retention_policy') is not None:
+        result = openstack_client.cleanup_backups_by_volume(
+            params.get('volume_policies') or {}, params.get('retention_policy')
+        )
+    else:
+        result = openstack_client.cleanup_backups(params.get('retention_days', 30))
+    progress.report(0, 'cleanup', result)
+    return result
+
+def _restore_job(params, progress):
+    """备份恢复任务"""
+    progress.set_total(1)
+    result = openstack_client.restore_backup(params['backup_id'], params.get('volume_id'), params.get('name'))
+    progress.report(0, params['backup_id'], result)
+    return result
+
+job_manager = None
+if openstack_client:
+    job_manager = JobManager(db_manager)
+    job_manager.register('backup_full', _backup_job_handler('full'))
+    job_manager.register('backup_incremental', _backup_job_handler('incremental'))
+    job_manager.register('volume_snapshot', _volume_snapshot_job)
+    job_manager.register('server_snapshot', _server_snapshot_job)
+    job_manager.register('cleanup', _cleanup_job)
+    job_manager.register('restore', _restore_job)
+
+def _is_serving_process():
+    """是否为实际处理请求的进程：调试模式下 python app.py 启用Werkzeug重载器，
+    监控进程同样会执行模块级代码，只有设置了 WERKZEUG_RUN_MAIN 的子进程处理请求"""
+    if __name__ == '__main__' and Config.DEBUG:
+        return os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+    return True
+
+def start_background_services():
+    """恢复未完成的后台任务并启动资源清单镜像，每个服务进程只执行一次"""
+    if job_manager:
+        try:
+            job_manager.recover()
+        except Exception as e:
+            logger.error(f"恢复后台任务失败: {e}")
+    # 启用资源清单本地镜像时由后台线程增量同步，列表接口直接读取镜像
+    if openstack_client and Config.INVENTORY_MIRROR_ENABLED:
+        openstack_client.start_mirror()
+
+if _is_serving_process():
+    start_background_services()
+
+# ==================== 事件推送 ====================
+
+def _mark_backupable(volume):
+    """为云硬盘添加可备份标记"""
+    return dict(volume, backupable=volume['status'] in ['in-use', 'available'])
+
+def _load_schedules_for_events():
+    """读取定时备份配置；数据库不可用时抛出异常，避免把所有定时备份误判为已删除"""
+    db_manager.ping()
+    return db_manager.load_schedules()
+
+event_sources = {}
+if openstack_client:
+    event_sources.update({
+        "volumes": lambda: [_mark_backupable(volume) for volume in openstack_client.load_inventory("volumes")],
+        "backups": lambda: openstack_client.load_inventory("backups"),
+        "servers": lambda: openstack_client.load_inventory("servers"),
+        "server_snapshots": lambda: openstack_client.load_inventory("server_snapshots"),
+        "volume_snapshots": lambda: openstack_client.load_inventory("volume_snapshots")
+    })
+if db_manager:
+    event_sources["schedules"] = _load_schedules_for_events
+event_broker = EventBroker(event_sources) if event_sources else None
+
+def _wants_async(data):
+    """请求是否要求以后台任务方式执行"""
+    value = data.get('async', request.args.get('async', False))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def _wants_stream():
+    """请求是否要求以NDJSON流式返回列表"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'application/x-ndjson' in request.headers.get('Accept', '')
+
+def _ndjson_response(items, transform=None):
+    """将资源迭代器逐条编码为NDJSON返回，读取过程中出错时输出一行错误信息"""
+    def generate():
+        try:
+            for item in items:
+                if transform:
+                    item = transform(item)
+                yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            logger.error(f"流式返回资源列表失败: {e}")
+            yield json.dumps({"error": str(e)}, ensure_ascii=False) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _conditional_json(build, resource=None):
+    """返回支持条件请求的JSON响应，请求的If-None-Match与ETag一致时返回304
+    
+    resource 为资源清单类型时，ETag由清单内容版本和查询参数计算：清单已缓存时匹配即返回304，
+    不再生成响应体；未缓存时先生成响应（同时加载缓存）再读取内容版本，两种情况ETag相同。
+    未提供资源类型或清单无法缓存时按响应内容计算ETag
+    """
+    def inventory_etag():
+        version = openstack_client.inventory_version(resource) if resource else None
+        if version is None:
+            return None
+        return hashlib.sha1(f"{version}?{request.query_string.decode()}".encode('utf-8')).hexdigest()
+    
+    etag = inventory_etag()
+    if etag is not None and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+        etag = etag or inventory_etag()
+        if etag is not None:
+            response.set_etag(etag)
+        else:
+            response.add_etag()
+        response = response.make_conditional(request)
+    # 浏览器每次都需要重新验证，避免使用过期的列表
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _enqueue_job(job_type, params):
+    """提交后台任务并立即返回任务ID"""
+    if not job_manager:
+        return jsonify({"error": "后台任务服务不可用"}), 500
+    
+    job = job_manager.submit(job_type, params)
+    return jsonify({
+        "success": True,
+        "message": "任务已提交，正在后台执行",
+        "job_id": job['id'],
+        "status_url": f"/api/jobs/{job['id']}"
+    }), 202
+
 @app.route('/')
 def index():
     """主页"""
@@ -42,34 +231,79 @@ def get_volumes():
         if not openstack_client:
             return jsonify({"error": "OpenStack连接失败"}), 500
         
-        volumes = openstack_client.get_volumes()
-        # 为每个云硬盘添加可备份标记
-        for volume in volumes:
-            volume['backupable'] = volume['status'] in ['in-use', 'available']
+        if _wants_stream():
+            return _ndjson_response(openstack_client.stream_inventory("volumes"), _mark_backupable)
         
-        return jsonify(volumes)
+        return _conditional_json(
+            lambda: [_mark_backupable(volume) for volume in openstack_client.get_volumes()],
+            "volumes"
+        )
     except Exception as e:
         logger.error(f"获取云硬盘列表失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/volumes/<volume_id>/backups')
+def get_volume_backups(volume_id):
+    """获取单个云硬盘的备份（按创建时间倒序）和增量备份链"""
+    try:
+        if not openstack_client:
+            return jsonify({"error": "OpenStack连接失败"}), 500
+        
+        def build():
+            backups = openstack_client.get_volume_backups(volume_id)
+            chains = build_backup_chains(backups).get(volume_id, [])
+            return {
+                "volume_id": volume_id,
+                "count": len(backups),
+                "backups": backups,
+                # 每条链以全量备份开头，按创建时间升序
+                "chains": [[backup["id"] for backup in chain] for chain in chains]
+            }
+        
+        # 未缓存时只读取该云硬盘的备份，不加载完整清单，ETag按响应内容计算
+        return _conditional_json(build)
+    except Exception as e:
+        logger.error(f"获取云硬盘备份列表失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+def _backup_query_args(args):
+    """解析备份列表的分页、排序和过滤参数"""
+    sort = args.get('sort', '')
+    sort_key, _, sort_dir = sort.partition(':')
+    limit = args.get('limit', Config.BACKUP_PAGE_SIZE, type=int)
+    return {
+        "limit": max(1, min(limit, Config.BACKUP_PAGE_MAX_SIZE)),
+        "marker": args.get('marker'),
+        "sort_key": sort_key or args.get('sort_key', 'created_at'),
+        "sort_dir": sort_dir or args.get('sort_dir', 'desc'),
+        "volume_id": args.get('volume_id'),
+        "status": args.get('status'),
+        "backup_type": args.get('backup_type'),
+        "created_after": args.get('created_after'),
+        "created_before": args.get('created_before'),
+        "with_counts": args.get('with_counts', '0').lower() in ('1', 'true', 'yes')
+    }
+
 @app.route('/api/backups')
 def get_backups():
-    """获取备份列表 - 根据描述判断备份类型，分离全量备份和增量备份"""
+    """获取备份列表 - 支持分页、排序和按云硬盘、状态、备份类型、创建时间过滤"""
     try:
         if not openstack_client:
             return jsonify({"error": "OpenStack连接失败"}), 500
         
-        backups = openstack_client.get_backups()
-        
-        # 根据backup_type字段分离全量备份和增量备份
-        full_backups = [b for b in backups if b.get('backup_type') == 'full']
-        incremental_backups = [b for b in backups if b.get('backup_type') == 'incremental']
-        
-        return jsonify({
-            "full_backups": full_backups,
-            "incremental_backups": incremental_backups,
-            "all_backups": backups
-        })
+        if _wants_stream():
+            return _ndjson_response(openstack_client.stream_inventory(
+                "backups",
+                volume_id=request.args.get('volume_id'),
+                status=request.args.get('status')
+            ))
+        
+        query = _backup_query_args(request.args)
+        try:
+            # 未缓存时分页查询直接下推到Cinder，不加载完整清单，ETag按响应内容计算
+            return _conditional_json(lambda: openstack_client.query_backups(**query))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"获取备份列表失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -81,8 +315,7 @@ def get_schedules():
         if not db_manager:
             return jsonify({"error": "数据库连接失败"}), 500
         
-        schedules = db_manager.load_schedules()
-        return jsonify(schedules)
+        return _conditional_json(db_manager.load_schedules)
     except Exception as e:
         logger.error(f"获取定时备份列表失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -157,20 +390,14 @@ def toggle_schedule(schedule_id):
         if not db_manager:
             return jsonify({"error": "数据库连接失败"}), 500
         
-        # 获取当前状态
-        schedules = db_manager.load_schedules()
-        current_schedule = None
-        for schedule in schedules:
-            if schedule['id'] == schedule_id:
-                current_schedule = schedule
-                break
+        # 在数据库中原子切换状态
+        result = db_manager.toggle_schedule_enabled(schedule_id)
         
-        if not current_schedule:
+        if result is None:
             return jsonify({"error": "定时备份不存在"}), 404
         
-        new_enabled = not current_schedule.get('enabled', True)
-        
-        if db_manager.update_schedule_enabled(schedule_id, new_enabled):
+        if result:
+            new_enabled = result['enabled']
             return jsonify({
                 "success": True, 
                 "message": f"定时备份已{'启用' if new_enabled else '禁用'}",
@@ -183,6 +410,28 @@ def toggle_schedule(schedule_id):
         logger.error(f"切换定时备份状态失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/history')
+def get_backup_history():
+    """获取定时备份历史记录"""
+    try:
+        if not db_manager:
+            return jsonify({"error": "数据库连接失败"}), 500
+        
+        limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+        history = db_manager.get_backup_history(
+            limit=limit,
+            schedule_id=request.args.get('schedule_id'),
+            volume_id=request.args.get('volume_id'),
+            marker=request.args.get('marker', type=int)
+        )
+        return jsonify({
+            "history": history,
+            "next_marker": history[-1]['id'] if history and len(history) == limit else None
+        })
+    except Exception as e:
+        logger.error(f"获取备份历史失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/backup/full', methods=['POST'])
 def create_full_backup():
     """创建全量备份"""
@@ -197,10 +446,16 @@ def create_full_backup():
         if not volume_ids:
             return jsonify({"error": "请选择要备份的云硬盘"}), 400
         
-        results = []
-        for volume_id in volume_ids:
-            result = openstack_client.create_full_backup(volume_id, name)
-            results.append(result)
+        if _wants_async(data):
+            return _enqueue_job('backup_full', {
+                "volume_ids": volume_ids,
+                "name": name,
+                "concurrency": data.get('concurrency')
+            })
+        
+        results = openstack_client.create_backups(
+            volume_ids, "full", name, concurrency=data.get('concurrency')
+        )
         
         success_count = sum(1 for r in results if r.get('success'))
         return jsonify({
@@ -226,10 +481,16 @@ def create_incremental_backup():
         if not volume_ids:
             return jsonify({"error": "请选择要备份的云硬盘"}), 400
         
-        results = []
-        for volume_id in volume_ids:
-            result = openstack_client.create_incremental_backup(volume_id, name)
-            results.append(result)
+        if _wants_async(data):
+            return _enqueue_job('backup_incremental', {
+                "volume_ids": volume_ids,
+                "name": name,
+                "concurrency": data.get('concurrency')
+            })
+        
+        results = openstack_client.create_backups(
+            volume_ids, "incremental", name, concurrency=data.get('concurrency')
+        )
         
         success_count = sum(1 for r in results if r.get('success'))
         return jsonify({
@@ -241,6 +502,27 @@ def create_incremental_backup():
         logger.error(f"创建增量备份失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+def _describe_policy(policy):
+    """保留策略的文字描述"""
+    if not isinstance(policy, dict):
+        return f"{policy}天"
+    policy = normalize_policy(policy)
+    parts = [f"保留{policy['full']}个全量", f"{policy['incremental']}个增量"]
+    for key, label in (('daily', '天'), ('weekly', '周'), ('monthly', '月')):
+        if policy[key]:
+            parts.append(f"最近{policy[key]}{label}每{label}1个")
+    return "GFS(" + "，".join(parts) + ")"
+
+def _cleanup_plan_response(plan):
+    """清理预演结果响应"""
+    if not plan.get('success'):
+        return jsonify({"error": plan.get('error', '清理预演失败')}), 500
+    
+    return jsonify(dict(
+        plan,
+        message=f"预计删除 {plan['delete_count']} 项，释放 {plan['reclaim_gb']} GB，预计耗时 {plan['estimated_seconds']} 秒"
+    ))
+
 @app.route('/api/backup/cleanup', methods=['POST'])
 def cleanup_backups():
     """清理备份 - 支持自定义天数和按云硬盘策略"""
@@ -250,23 +532,44 @@ def cleanup_backups():
         
         data = request.get_json() or {}
         retention_days = data.get('retention_days', 30)  # 默认30天
-        volume_policies = data.get('volume_policies', {})  # 按云硬盘的策略
-        
-        # 如果提供了按云硬盘的策略，则使用按云硬盘清理
-        if volume_policies:
-            result = openstack_client.cleanup_backups_by_volume(volume_policies)
+        volume_policies = data.get('volume_policies', {})  # 按云硬盘的策略（天数或GFS策略）
+        retention_policy = data.get('retention_policy')  # 未单独配置的云硬盘使用的GFS策略
+        
+        if retention_policy is not None and not isinstance(retention_policy, dict):
+            return jsonify({"error": "retention_policy 必须是对象"}), 400
+        
+        # 如果提供了按云硬盘的策略或GFS策略，则使用按云硬盘清理
+        if volume_policies or retention_policy is not None:
+            if data.get('dry_run'):
+                return _cleanup_plan_response(openstack_client.plan_backup_cleanup(
+                    volume_policies=volume_policies, default_policy=retention_policy
+                ))
+            
+            if _wants_async(data):
+                return _enqueue_job('cleanup', {
+                    "volume_policies": volume_policies,
+                    "retention_policy": retention_policy
+                })
+            
+            result = openstack_client.cleanup_backups_by_volume(volume_policies, retention_policy)
             if result.get('success'):
                 deleted_details = result.get('deleted_details', [])
                 policy_summary = []
-                for policy_volume_id, policy_days in volume_policies.items():
-                    policy_summary.append(f"云硬盘 {policy_volume_id}: {policy_days}天")
+                for policy_volume_id, policy in volume_policies.items():
+                    policy_summary.append(f"云硬盘 {policy_volume_id}: {_describe_policy(policy)}")
+                if retention_policy is not None:
+                    policy_summary.append(f"其他云硬盘: {_describe_policy(retention_policy)}")
                 
                 return jsonify({
                     "success": True,
                     "message": f"按云硬盘策略清理完成，共删除 {result.get('deleted_count', 0)} 个备份。策略: {'; '.join(policy_summary)}",
                     "deleted_count": result.get('deleted_count', 0),
+                    "failed_count": result.get('failed_count', 0),
+                    "blocked_count": result.get('blocked_count', 0),
                     "deleted_details": deleted_details,
-                    "policies_applied": volume_policies
+                    "volume_stats": result.get('volume_stats', {}),
+                    "policies_applied": volume_policies,
+                    "retention_policy": retention_policy
                 })
             else:
                 return jsonify({"error": result.get('error', '清理失败')}), 500
@@ -279,11 +582,20 @@ def cleanup_backups():
             except (ValueError, TypeError):
                 return jsonify({"error": "保留天数必须是有效的数字"}), 400
             
+            if data.get('dry_run'):
+                return _cleanup_plan_response(openstack_client.plan_backup_cleanup(retention_days))
+            
+            if _wants_async(data):
+                return _enqueue_job('cleanup', {"retention_days": retention_days})
+            
             result = openstack_client.cleanup_backups(retention_days)
             if result.get('success'):
                 return jsonify({
                     "success": True,
-                    "message": f"备份清理完成，共删除 {result.get('deleted_count', 0)} 个超过 {retention_days} 天的备份"
+                    "message": f"备份清理完成，共删除 {result.get('deleted_count', 0)} 个超过 {retention_days} 天的备份",
+                    "deleted_count": result.get('deleted_count', 0),
+                    "failed_count": result.get('failed_count', 0),
+                    "volume_stats": result.get('volume_stats', {})
                 })
             else:
                 return jsonify({"error": result.get('error', '清理失败')}), 500
@@ -334,6 +646,9 @@ def restore_backup(backup_id):
         volume_id = data.get('volume_id')
         name = data.get('name')
         
+        if _wants_async(data):
+            return _enqueue_job('restore', {"backup_id": backup_id, "volume_id": volume_id, "name": name})
+        
         result = openstack_client.restore_backup(backup_id, volume_id, name)
         if result.get('success'):
             return jsonify({
@@ -397,33 +712,212 @@ def import_backup():
         logger.error(f"备份导入失败: {e}")
         return jsonify({"error": str(e)}), 500
 
+# 深度健康检查结果缓存
+_health_cache = {"expires": 0.0, "result": None, "status_code": 200}
+_health_lock = threading.Lock()
+
+def _readiness():
+    """就绪检查：验证Keystone令牌和数据库连接池，不列举任何资源"""
+    checks = {}
+    
+    if openstack_client:
+        try:
+            openstack_client.check_token()
+            checks["openstack"] = {"ok": True}
+        except Exception as e:
+            checks["openstack"] = {"ok": False, "error": str(e)}
+    else:
+        checks["openstack"] = {"ok": False, "error": "OpenStack连接失败"}
+    
+    if db_manager:
+        try:
+            db_manager.ping()
+            checks["database"] = {"ok": True, "pool": db_manager.get_pool_stats()}
+        except Exception as e:
+            checks["database"] = {"ok": False, "error": str(e)}
+    else:
+        checks["database"] = {"ok": False, "error": "数据库连接失败"}
+    
+    return all(check["ok"] for check in checks.values()), checks
+
+@app.route('/api/health/live')
+def health_live():
+    """存活检查 - 只要进程能处理请求即返回正常"""
+    return jsonify({"status": "alive"})
+
+@app.route('/api/health/ready')
+def health_ready():
+    """就绪检查 - 验证Keystone令牌和数据库连接池"""
+    ready, checks = _readiness()
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "checks": checks
+    }), 200 if ready else 503
+
 @app.route('/api/health')
 def health_check():
-    """健康检查"""
-    try:
-        if openstack_client:
-            # 尝试获取云硬盘列表来测试连接
-            volumes = openstack_client.get_volumes()
-            return jsonify({
-                "status": "healthy",
-                "openstack_connected": True,
-                "openstack_version": "28.4.1",
-                "volume_count": len(volumes)
-            })
-        else:
-            return jsonify({
+    """健康检查 - 深度检查，结果缓存HEALTH_CHECK_TTL秒"""
+    with _health_lock:
+        if _health_cache["result"] is not None and _health_cache["expires"] > time.monotonic():
+            return jsonify(_health_cache["result"]), _health_cache["status_code"]
+        
+        try:
+            if openstack_client:
+                ready, checks = _readiness()
+                # 云硬盘数量从镜像或缓存统计，否则用with_count只查询数量，不列举云硬盘
+                volume_count = openstack_client.get_resource_count("volumes") if checks["openstack"]["ok"] else None
+                result = {
+                    "status": "healthy" if ready else "unhealthy",
+                    "openstack_connected": checks["openstack"]["ok"],
+                    "openstack_version": "28.4.1",
+                    "database_connected": checks["database"]["ok"],
+                    "volume_count": volume_count,
+                    "checks": checks
+                }
+                if not ready:
+                    result["error"] = "; ".join(
+                        f"{name}: {check['error']}" for name, check in checks.items() if not check["ok"]
+                    )
+                status_code = 200 if ready else 500
+            else:
+                result = {
+                    "status": "unhealthy",
+                    "openstack_connected": False,
+                    "openstack_version": "28.4.1",
+                    "error": "OpenStack连接失败"
+                }
+                status_code = 500
+        except Exception as e:
+            result = {
                 "status": "unhealthy",
                 "openstack_connected": False,
                 "openstack_version": "28.4.1",
-                "error": "OpenStack连接失败"
-            }), 500
+                "error": str(e)
+            }
+            status_code = 500
+        
+        result["checked_at"] = datetime.now().isoformat()
+        _health_cache.update(result=result, status_code=status_code,
+                             expires=time.monotonic() + Config.HEALTH_CHECK_TTL)
+        return jsonify(result), status_code
+
+@app.route('/api/jobs')
+def list_jobs():
+    """获取最近的后台任务列表"""
+    try:
+        if not job_manager:
+            return jsonify({"error": "后台任务服务不可用"}), 500
+        
+        limit = min(request.args.get('limit', 50, type=int), 500)
+        return jsonify(job_manager.list_jobs(limit))
     except Exception as e:
-        return jsonify({
-            "status": "unhealthy",
-            "openstack_connected": False,
-            "openstack_version": "28.4.1",
-            "error": str(e)
-        }), 500
+        logger.error(f"获取后台任务列表失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """获取后台任务进度和逐条结果"""
+    try:
+        if not job_manager:
+            return jsonify({"error": "后台任务服务不可用"}), 500
+        
+        job = job_manager.get_job(job_id)
+        if not job:
+            return jsonify({"error": "任务不存在"}), 404
+        return jsonify(job)
+    except Exception as e:
+        logger.error(f"获取后台任务失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/events')
+def stream_events():
+    """资源变化事件流（SSE） - 推送备份状态变化、快照增删和定时备份修改等增量事件"""
+    if not event_broker:
+        return jsonify({"error": "事件推送服务不可用"}), 500
+    
+    subscriber = event_broker.subscribe()
+    
+    def generate():
+        try:
+            # 断线后浏览器按该间隔（毫秒）自动重连
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=Config.EVENTS_HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    # 心跳注释保持连接，同时及时发现已断开的客户端
+                    yield ": heartbeat\n\n"
+                    continue
+                data = json.dumps(event['data'], ensure_ascii=False, default=str)
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            event_broker.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 禁止Nginx缓冲事件流
+    })
+
+@app.route('/api/events/stats')
+def get_event_stats():
+    """获取事件推送订阅者数量和已广播的事件数"""
+    if not event_broker:
+        return jsonify({"error": "事件推送服务不可用"}), 500
+    return jsonify(event_broker.stats())
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """获取资源清单缓存统计"""
+    try:
+        if not openstack_client:
+            return jsonify({"error": "OpenStack连接失败"}), 500
+        
+        return jsonify(openstack_client.get_cache_stats())
+    except Exception as e:
+        logger.error(f"获取缓存统计失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """手动刷新资源清单缓存"""
+    try:
+        if not openstack_client:
+            return jsonify({"error": "OpenStack连接失败"}), 500
+        
+        data = request.get_json(silent=True) or {}
+        resources = data.get('resources', [])
+        openstack_client.invalidate_cache(*resources)
+        return jsonify({"success": True, "message": "缓存已刷新"})
+    except Exception as e:
+        logger.error(f"刷新缓存失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/mirror/stats')
+def get_mirror_stats():
+    """获取资源清单镜像的同步统计"""
+    try:
+        if not openstack_client:
+            return jsonify({"error": "OpenStack连接失败"}), 500
+        
+        stats = openstack_client.get_mirror_stats()
+        if stats is None:
+            return jsonify({"error": "资源清单镜像未启用"}), 404
+        return jsonify(stats)
+    except Exception as e:
+        logger.error(f"获取镜像统计失败: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/db/pool')
+def get_db_pool_stats():
+    """获取数据库连接池使用情况"""
+    try:
+        if not db_manager:
+            return jsonify({"error": "数据库连接失败"}), 500
+        
+        return jsonify(db_manager.get_pool_stats())
+    except Exception as e:
+        logger.error(f"获取连接池统计失败: {e}")
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/info')
 def get_system_info():
@@ -451,28 +945,18 @@ def add_volumes_to_schedule(schedule_id):
         if not volume_ids:
             return jsonify({"error": "请选择要添加的云硬盘"}), 400
         
-        # 获取当前定时备份配置
-        schedules = db_manager.load_schedules()
-        current_schedule = None
-        for schedule in schedules:
-            if schedule['id'] == schedule_id:
-                current_schedule = schedule
-                break
+        # 添加新的云硬盘ID（避免重复）
+        result = db_manager.add_schedule_volumes(schedule_id, volume_ids)
         
-        if not current_schedule:
+        if result is None:
             return jsonify({"error": "定时备份不存在"}), 404
         
-        # 添加新的云硬盘ID（避免重复）
-        existing_ids = set(current_schedule['volume_ids'])
-        new_ids = [vid for vid in volume_ids if vid not in existing_ids]
-        updated_volume_ids = current_schedule['volume_ids'] + new_ids
-        
-        if db_manager.update_schedule_volumes(schedule_id, updated_volume_ids):
+        if result:
             return jsonify({
                 "success": True,
-                "message": f"成功添加 {len(new_ids)} 个云硬盘到定时备份",
-                "added_count": len(new_ids),
-                "total_volumes": len(updated_volume_ids)
+                "message": f"成功添加 {result['added_count']} 个云硬盘到定时备份",
+                "added_count": result['added_count'],
+                "total_volumes": result['total_volumes']
             })
         else:
             return jsonify({"error": "保存定时备份配置失败"}), 500
@@ -494,28 +978,18 @@ def remove_volumes_from_schedule(schedule_id):
         if not volume_ids:
             return jsonify({"error": "请选择要移除的云硬盘"}), 400
         
-        # 获取当前定时备份配置
-        schedules = db_manager.load_schedules()
-        current_schedule = None
-        for schedule in schedules:
-            if schedule['id'] == schedule_id:
-                current_schedule = schedule
-                break
+        # 移除指定的云硬盘ID
+        result = db_manager.remove_schedule_volumes(schedule_id, volume_ids)
         
-        if not current_schedule:
+        if result is None:
             return jsonify({"error": "定时备份不存在"}), 404
         
-        # 移除指定的云硬盘ID
-        original_count = len(current_schedule['volume_ids'])
-        updated_volume_ids = [vid for vid in current_schedule['volume_ids'] if vid not in volume_ids]
-        removed_count = original_count - len(updated_volume_ids)
-        
-        if db_manager.update_schedule_volumes(schedule_id, updated_volume_ids):
+        if result:
             return jsonify({
                 "success": True,
-                "message": f"成功移除 {removed_count} 个云硬盘",
-                "removed_count": removed_count,
-                "total_volumes": len(updated_volume_ids)
+                "message": f"成功移除 {result['removed_count']} 个云硬盘",
+                "removed_count": result['removed_count'],
+                "total_volumes": result['total_volumes']
             })
         else:
             return jsonify({"error": "保存定时备份配置失败"}), 500
@@ -533,8 +1007,10 @@ def get_servers():
         if not openstack_client:
             return jsonify({"error": "OpenStack连接失败"}), 500
         
-        servers = openstack_client.get_servers()
-        return jsonify(servers)
+        if _wants_stream():
+            return _ndjson_response(openstack_client.stream_inventory("servers"))
+        
+        return _conditional_json(openstack_client.get_servers, "servers")
     except Exception as e:
         logger.error(f"获取云主机列表失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -546,8 +1022,10 @@ def get_server_snapshots():
         if not openstack_client:
             return jsonify({"error": "OpenStack连接失败"}), 500
         
-        snapshots = openstack_client.get_server_snapshots()
-        return jsonify(snapshots)
+        if _wants_stream():
+            return _ndjson_response(openstack_client.stream_inventory("server_snapshots"))
+        
+        return _conditional_json(openstack_client.get_server_snapshots, "server_snapshots")
     except Exception as e:
         logger.error(f"获取云主机快照列表失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -567,6 +1045,13 @@ def create_server_snapshot():
         if not server_ids:
             return jsonify({"error": "请选择要创建快照的云主机"}), 400
         
+        if _wants_async(data):
+            return _enqueue_job('server_snapshot', {
+                "server_ids": server_ids,
+                "name": name,
+                "description": description
+            })
+        
         results = []
         for server_id in server_ids:
             result = openstack_client.create_server_snapshot(server_id, name, description)
@@ -611,6 +1096,9 @@ def cleanup_server_snapshots():
         if not isinstance(retention_days, int) or retention_days < 1 or retention_days > 365:
             return jsonify({"error": "保留天数必须在1-365之间"}), 400
         
+        if data.get('dry_run'):
+            return _cleanup_plan_response(openstack_client.plan_server_snapshot_cleanup(retention_days))
+        
         result = openstack_client.cleanup_server_snapshots(retention_days)
         if result.get('success'):
             return jsonify({
@@ -634,8 +1122,10 @@ def get_volume_snapshots():
         if not openstack_client:
             return jsonify({"error": "OpenStack连接失败"}), 500
         
-        snapshots = openstack_client.get_volume_snapshots()
-        return jsonify(snapshots)
+        if _wants_stream():
+            return _ndjson_response(openstack_client.stream_inventory("volume_snapshots"))
+        
+        return _conditional_json(openstack_client.get_volume_snapshots, "volume_snapshots")
     except Exception as e:
         logger.error(f"获取云硬盘快照列表失败: {e}")
         return jsonify({"error": str(e)}), 500
@@ -656,6 +1146,14 @@ def create_volume_snapshot():
         if not volume_ids:
             return jsonify({"error": "请选择要创建快照的云硬盘"}), 400
         
+        if _wants_async(data):
+            return _enqueue_job('volume_snapshot', {
+                "volume_ids": volume_ids,
+                "name": name,
+                "description": description,
+                "force": force
+            })
+        
         results = []
         for volume_id in volume_ids:
             result = openstack_client.create_volume_snapshot(volume_id, name, description, force)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试脚本
+使用本地模拟OpenStack（fake_openstack）在无真实云环境时测试资源列表、清理规划、
+批量备份和并发删除的耗时与扩展性
+
+示例:
+    python benchmark.py --volumes 10000 --backups-per-volume 10 --latency 0.02
+"""
+
+import argparse
+import logging
+import time
+from fake_openstack import FakeConnection
+from inventory_mirror import InventoryMirror
+from openstack_client import OpenStackClient
+
+def timed(name, func, conn, results):
+    """执行一个场景并记录耗时和API调用次数"""
+    calls_before = sum(conn.stats()['calls'].values())
+    started = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - started
+    calls = sum(conn.stats()['calls'].values()) - calls_before
+    results.append((name, elapsed, calls))
+    print(f"  {name:<40} {elapsed:>9.3f}s  {calls:>7} 次API调用")
+    return value
+
+def bench_inventory(client, conn, results):
+    """资源列表：冷缓存、热缓存、分页查询和流式读取首条"""
+    print("📋 资源列表")
+    client.invalidate_cache()
+    backups = timed("备份列表（冷缓存）", client.get_backups, conn, results)
+    timed("备份列表（热缓存）", client.get_backups, conn, results)
+    timed("备份分页查询（热缓存，100条，含数量统计）",
+          lambda: client.query_backups(limit=100, with_counts=True), conn, results)
+    client.invalidate_cache()
+    timed("备份分页查询（下推Cinder，100条）", lambda: client.query_backups(limit=100), conn, results)
+    timed("流式读取首条备份", lambda: next(client.stream_inventory("backups"), None), conn, results)
+    client.invalidate_cache()
+    timed("系统信息（冷缓存）", client.get_system_info, conn, results)
+    return backups
+
+def bench_cleanup_plan(client, conn, results):
+    """清理规划：按天数和GFS策略预演"""
+    print("🧹 清理规划")
+    timed("按天数清理预演（7天）", lambda: client.plan_backup_cleanup(retention_days=7), conn, results)
+    timed("GFS清理预演", lambda: client.plan_backup_cleanup(
+        default_policy={"full": 2, "incremental": 6, "daily": 7, "weekly": 4, "monthly": 3}
+    ), conn, results)
+
+def bench_create(client, conn, results, sample, concurrency_levels):
+    """批量创建备份在不同并发数下的耗时"""
+    print("💾 批量创建备份")
+    volume_ids = [volume['id'] for volume in client.get_volumes()][:sample]
+    for concurrency in concurrency_levels:
+        outcome = timed(f"创建 {len(volume_ids)} 个全量备份（并发{concurrency}）",
+                        lambda: client.create_backups(volume_ids, "full", concurrency=concurrency), conn, results)
+        failed = sum(1 for result in outcome if not result.get('success'))
+        if failed:
+            print(f"    ⚠️  失败 {failed} 个")
+
+def bench_delete(client, conn, results, sample, workers, rate_limit):
+    """按依赖链并发删除备份"""
+    print("🗑️  并发删除备份")
+    all_backups = client.get_backups(use_cache=False)
+    volume_ids = {backup['volume_id'] for backup in all_backups}
+    selected = set(sorted(volume_ids)[:sample])
+    candidates = [backup for backup in all_backups if backup['volume_id'] in selected]
+    limit_text = f"限流{rate_limit}/秒" if rate_limit else "不限流"
+    outcome = timed(f"删除 {len(candidates)} 个备份（{workers}线程，{limit_text}）",
+                    lambda: client.delete_backups_concurrently(candidates, all_backups, workers=workers,
+                                                               rate_limit=rate_limit), conn, results)
+    print(f"    删除 {outcome['deleted_count']} 个，失败 {outcome['failed_count']} 个，"
+          f"因依赖跳过 {outcome['blocked_count']} 个")
+
+def bench_mirror(client, conn, results, ticks):
+    """资源清单镜像：全量加载、读取和空闲时每轮增量同步的API调用次数"""
+    print("🪞 资源清单镜像")
+    # 不启动后台线程，由基准测试逐轮驱动同步
+    mirror = client.mirror = InventoryMirror(client)
+    for resource in mirror.stores:
+        timed(f"全量加载 {resource}", lambda: mirror.sync(resource, full=True), conn, results)
+    timed("从镜像读取备份列表", client.get_backups, conn, results)
+    timed(f"增量同步 {ticks} 轮（无变化）",
+          lambda: [mirror.sync(resource) for _ in range(ticks) for resource in mirror.stores], conn, results)
+
+def main():
+    parser = argparse.ArgumentParser(description='Cinder备份管理性能基准测试（本地模拟OpenStack）')
+    parser.add_argument('--volumes', type=int, default=10000, help='模拟云硬盘数量')
+    parser.add_argument('--backups-per-volume', type=int, default=10, help='每个云硬盘的备份数量')
+    parser.add_argument('--servers', type=int, default=1000, help='模拟云主机数量')
+    parser.add_argument('--latency', type=float, default=0.0, help='每次API调用的模拟延迟（秒）')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='列表每页的额外模拟延迟（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='API调用随机失败的概率')
+    parser.add_argument('--page-size', type=int, default=1000, help='列表每页数量')
+    parser.add_argument('--sample', type=int, default=100, help='批量创建/删除涉及的云硬盘数量')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16], help='批量创建的并发数列表')
+    parser.add_argument('--delete-workers', type=int, default=4, help='删除工作线程数')
+    parser.add_argument('--rate-limit', type=float, default=0, help='删除限流（每秒请求数），0表示不限流')
+    parser.add_argument('--mirror-ticks', type=int, default=10, help='镜像场景执行的增量同步轮数')
+    parser.add_argument('--scenarios', nargs='+', default=['inventory', 'plan', 'create', 'delete'],
+                        choices=['inventory', 'plan', 'create', 'delete', 'mirror'], help='要执行的测试场景')
+    parser.add_argument('--seed', type=int, default=42, help='模拟数据随机种子')
+    args = parser.parse_args()
+
+    # 各模块导入时已配置INFO级别日志，基准测试只输出警告
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print("🔧 生成模拟数据...")
+    started = time.perf_counter()
+    conn = FakeConnection(
+        volumes=args.volumes,
+        backups_per_volume=args.backups_per_volume,
+        servers=args.servers,
+        latency=args.latency,
+        page_latency=args.page_latency,
+        error_rate=args.error_rate,
+        page_size=args.page_size,
+        seed=args.seed
+    )
+    stats = conn.stats()
+    print(f"   云硬盘 {stats['volumes']} 个，备份 {stats['backups']} 个，云主机 {stats['servers']} 个，"
+          f"耗时 {time.perf_counter() - started:.1f}s")
+    print("=" * 72)
+
+    client = OpenStackClient(conn=conn)
+    results = []
+    if 'inventory' in args.scenarios:
+        bench_inventory(client, conn, results)
+    if 'plan' in args.scenarios:
+        bench_cleanup_plan(client, conn, results)
+    if 'create' in args.scenarios:
+        bench_create(client, conn, results, args.sample, args.concurrency)
+    if 'delete' in args.scenarios:
+        bench_delete(client, conn, results, args.sample, args.delete_workers, args.rate_limit)
+    if 'mirror' in args.scenarios:
+        bench_mirror(client, conn, results, args.mirror_ticks)
+
+    print("=" * 72)
+    print(f"✅ 完成 {len(results)} 个场景，总耗时 {sum(elapsed for _, elapsed, _ in results):.3f}s")
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,7 @@ import json
 from datetime import datetime
 from openstack_client import OpenStackClient
 from config import Config
+from retention import normalize_policy
 
 def print_json(data):
     """格式化输出JSON"""
@@ -112,16 +113,61 @@ def create_backup(client, volume_id, backup_type, name=None):
         print(f"❌ 备份创建失败: {result.get('error', '未知错误')}")
         sys.exit(1)
 
-def cleanup_backups(client):
+def print_cleanup_plan(plan):
+    """输出清理预演结果"""
+    print(f"备份总数: {plan['total_backups']}")
+    print(f"将删除: {plan['delete_count']} 个")
+    print(f"因依赖跳过: {plan['blocked_count']} 个")
+    print(f"可释放空间: {plan['reclaim_gb']} GB")
+    print(f"涉及云硬盘: {plan['affected_volume_count']} 个")
+    print(f"预计耗时: {plan['estimated_seconds']} 秒 (基于 {plan['latency_samples']} 个实测样本)")
+    
+    headers = ["云硬盘ID", "删除数量", "释放(GB)", "跳过数量"]
+    rows = []
+    for volume_id, stats in plan['affected_volumes'].items():
+        rows.append([volume_id, stats['delete_count'], stats['reclaim_gb'], stats['blocked_count']])
+    print_table(headers, rows)
+
+def attach_latency_store(client):
+    """连接数据库读取和保存删除耗时样本，数据库不可用时只使用本进程的样本"""
+    try:
+        from database import get_db_manager
+        client.latency_store = get_db_manager()
+    except Exception as e:
+        print(f"⚠️ 数据库不可用，耗时估算不使用历史样本: {e}")
+
+def cleanup_backups(client, retention_days=30, dry_run=False, gfs_policy=None):
     """清理备份"""
     print("=== 执行备份清理 (OpenStack 28.4.1) ===")
-    print(f"保留策略: 每个云硬盘保留 {Config.FULL_BACKUP_RETENTION} 个全量备份, {Config.INCREMENTAL_BACKUP_RETENTION} 个增量备份")
+    if gfs_policy is not None:
+        policy = normalize_policy(gfs_policy)
+        print(f"保留策略: 每个云硬盘保留 {policy['full']} 个全量备份, {policy['incremental']} 个增量备份", end="")
+        print(f", 最近 {policy['daily']} 天/{policy['weekly']} 周/{policy['monthly']} 月每个周期各 1 个")
+    else:
+        print(f"保留策略: 删除超过 {retention_days} 天的备份")
+    
+    if dry_run:
+        print("预演模式: 不会删除任何备份")
+        if gfs_policy is not None:
+            plan = client.plan_backup_cleanup(default_policy=gfs_policy)
+        else:
+            plan = client.plan_backup_cleanup(retention_days)
+        if not plan.get('success'):
+            print(f"❌ 清理预演失败: {plan.get('error', '未知错误')}")
+            sys.exit(1)
+        print_cleanup_plan(plan)
+        return
     
-    result = client.cleanup_backups()
+    if gfs_policy is not None:
+        result = client.cleanup_backups_by_volume({}, gfs_policy)
+    else:
+        result = client.cleanup_backups(retention_days)
     
     if result.get('success'):
         print(f"✅ 备份清理完成")
         print(f"删除备份数量: {result.get('deleted_count', 0)}")
+        print(f"删除失败数量: {result.get('failed_count', 0)}")
+        print(f"因依赖跳过数量: {result.get('blocked_count', 0)}")
     else:
         print(f"❌ 备份清理失败: {result.get('error', '未知错误')}")
         sys.exit(1)
@@ -276,7 +322,15 @@ def main():
     backup_parser.add_argument('--name', help='备份名称')
     
     # cleanup 命令
-    subparsers.add_parser('cleanup', help='清理备份')
+    cleanup_parser = subparsers.add_parser('cleanup', help='清理备份')
+    cleanup_parser.add_argument('--retention-days', type=int, default=30, help='保留天数（默认30天）')
+    cleanup_parser.add_argument('--dry-run', action='store_true', help='只预演删除计划，不实际删除')
+    cleanup_parser.add_argument('--gfs', action='store_true', help='使用GFS保留策略（按数量和日历周期保留）')
+    cleanup_parser.add_argument('--keep-full', type=int, help=f'GFS: 保留的全量备份数（默认{Config.FULL_BACKUP_RETENTION}）')
+    cleanup_parser.add_argument('--keep-incremental', type=int, help=f'GFS: 保留的增量备份数（默认{Config.INCREMENTAL_BACKUP_RETENTION}）')
+    cleanup_parser.add_argument('--daily', type=int, help='GFS: 保留最近N天每天最新的备份')
+    cleanup_parser.add_argument('--weekly', type=int, help='GFS: 保留最近N周每周最新的备份')
+    cleanup_parser.add_argument('--monthly', type=int, help='GFS: 保留最近N月每月最新的备份')
     
     # delete 命令
     delete_parser = subparsers.add_parser('delete', help='删除备份')
@@ -325,7 +379,19 @@ def main():
             create_backup(client, args.volume_id, args.type, args.name)
         
         elif args.command == 'cleanup':
-            cleanup_backups(client)
+            gfs_policy = None
+            if args.gfs:
+                gfs_policy = {
+                    key: value for key, value in (
+                        ('full', args.keep_full),
+                        ('incremental', args.keep_incremental),
+                        ('daily', args.daily),
+                        ('weekly', args.weekly),
+                        ('monthly', args.monthly)
+                    ) if value is not None
+                }
+            attach_latency_store(client)
+            cleanup_backups(client, args.retention_days, args.dry_run, gfs_policy)
         
         elif args.command == 'delete':
             delete_backup(client, args.backup_id)
@@ -13,6 +13,19 @@ class Config:
     OS_USER_DOMAIN_NAME = os.getenv('OS_USER_DOMAIN_NAME', 'Default')
     OS_PROJECT_DOMAIN_NAME = os.getenv('OS_PROJECT_DOMAIN_NAME', 'Default')
     
+    # 本地模拟OpenStack配置（用于压力测试和性能基准测试，不连接真实云环境）
+    OPENSTACK_FAKE = os.getenv('OPENSTACK_FAKE', 'False').lower() == 'true'
+    FAKE_OPENSTACK_VOLUMES = int(os.getenv('FAKE_OPENSTACK_VOLUMES', '1000'))
+    FAKE_OPENSTACK_BACKUPS_PER_VOLUME = int(os.getenv('FAKE_OPENSTACK_BACKUPS_PER_VOLUME', '10'))
+    FAKE_OPENSTACK_SERVERS = int(os.getenv('FAKE_OPENSTACK_SERVERS', '200'))
+    FAKE_OPENSTACK_LATENCY = float(os.getenv('FAKE_OPENSTACK_LATENCY', '0'))  # 每次API调用的模拟延迟（秒）
+    FAKE_OPENSTACK_PAGE_LATENCY = float(os.getenv('FAKE_OPENSTACK_PAGE_LATENCY', '0'))  # 列表每页的额外模拟延迟（秒）
+    FAKE_OPENSTACK_ERROR_RATE = float(os.getenv('FAKE_OPENSTACK_ERROR_RATE', '0'))  # API调用随机失败的概率
+    FAKE_OPENSTACK_PAGE_SIZE = int(os.getenv('FAKE_OPENSTACK_PAGE_SIZE', '1000'))
+    FAKE_OPENSTACK_CREATE_DELAY = float(os.getenv('FAKE_OPENSTACK_CREATE_DELAY', '0'))  # 创建后变为可用状态的模拟耗时（秒）
+    FAKE_OPENSTACK_DELETE_DELAY = float(os.getenv('FAKE_OPENSTACK_DELETE_DELAY', '0'))  # 删除中状态持续的模拟耗时（秒）
+    FAKE_OPENSTACK_SEED = int(os.getenv('FAKE_OPENSTACK_SEED', '42'))
+    
     # MySQL 数据库配置
     MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
     MYSQL_PORT = int(os.getenv('MYSQL_PORT', '3306'))
@@ -20,11 +33,73 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'cinder_backup_pass')
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'cinder_backup_db')
     MYSQL_CHARSET = os.getenv('MYSQL_CHARSET', 'utf8mb4')
+    MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', '10'))  # 连接池最大连接数
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', '10'))  # 连接池已满时等待连接的超时时间（秒）
     
     # 备份策略配置
     FULL_BACKUP_RETENTION = int(os.getenv('FULL_BACKUP_RETENTION', '4'))
     INCREMENTAL_BACKUP_RETENTION = int(os.getenv('INCREMENTAL_BACKUP_RETENTION', '6'))
+    # GFS保留策略：额外保留最近N天/周/月中每个周期最新的一个备份，0表示不启用
+    RETENTION_KEEP_DAILY = int(os.getenv('RETENTION_KEEP_DAILY', '0'))
+    RETENTION_KEEP_WEEKLY = int(os.getenv('RETENTION_KEEP_WEEKLY', '0'))
+    RETENTION_KEEP_MONTHLY = int(os.getenv('RETENTION_KEEP_MONTHLY', '0'))
     
     # Flask 配置
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
-    DEBUG = os.getenv('DEBUG', 'True').lower() == 'true' 
\ No newline at end of file
+    DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
+    
+    # 资源清单缓存配置
+    INVENTORY_CACHE_TTL = int(os.getenv('INVENTORY_CACHE_TTL', '30'))  # 秒，0表示禁用缓存
+    INVENTORY_CACHE_MAX_ENTRIES = int(os.getenv('INVENTORY_CACHE_MAX_ENTRIES', '64'))
+    INVENTORY_CACHE_MAX_ITEMS = int(os.getenv('INVENTORY_CACHE_MAX_ITEMS', '200000'))  # 单个条目最多缓存的资源数
+    
+    # 备份列表分页配置
+    BACKUP_PAGE_SIZE = int(os.getenv('BACKUP_PAGE_SIZE', '100'))  # 默认每页备份数
+    BACKUP_PAGE_MAX_SIZE = int(os.getenv('BACKUP_PAGE_MAX_SIZE', '1000'))  # 每页最多备份数
+    
+    # 健康检查配置
+    HEALTH_CHECK_TTL = float(os.getenv('HEALTH_CHECK_TTL', '30'))  # 深度健康检查结果缓存时间（秒）
+    
+    # 系统信息并发查询配置
+    SYSTEM_INFO_WORKERS = int(os.getenv('SYSTEM_INFO_WORKERS', '5'))
+    SYSTEM_INFO_TIMEOUT = float(os.getenv('SYSTEM_INFO_TIMEOUT', '30'))  # 每个数据源的超时时间（秒）
+    # 清单未缓存时Cinder资源只查询数量（with_count，微版本3.45），不读取完整清单
+    SYSTEM_INFO_COUNT_ONLY = os.getenv('SYSTEM_INFO_COUNT_ONLY', 'True').lower() == 'true'
+    
+    # 批量备份并发配置
+    BACKUP_BATCH_CONCURRENCY = int(os.getenv('BACKUP_BATCH_CONCURRENCY', '8'))
+    BACKUP_BATCH_MAX_CONCURRENCY = int(os.getenv('BACKUP_BATCH_MAX_CONCURRENCY', '32'))
+    
+    # 后台任务配置
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+    JOB_PERSIST_INTERVAL = float(os.getenv('JOB_PERSIST_INTERVAL', '1'))  # 进度持久化最小间隔（秒）
+    JOB_MEMORY_LIMIT = int(os.getenv('JOB_MEMORY_LIMIT', '200'))  # 内存中保留的已结束任务数
+    
+    # 资源清单本地镜像配置
+    INVENTORY_MIRROR_ENABLED = os.getenv('INVENTORY_MIRROR_ENABLED', 'False').lower() == 'true'
+    INVENTORY_MIRROR_DELTA_INTERVAL = float(os.getenv('INVENTORY_MIRROR_DELTA_INTERVAL', '15'))  # 增量同步间隔（秒）
+    INVENTORY_MIRROR_FULL_INTERVAL = float(os.getenv('INVENTORY_MIRROR_FULL_INTERVAL', '900'))  # 全量核对间隔（秒）
+    INVENTORY_MIRROR_OVERLAP = float(os.getenv('INVENTORY_MIRROR_OVERLAP', '60'))  # 增量查询起点向前重叠的秒数，容忍时钟偏差
+    INVENTORY_MIRROR_MAX_AGE = float(os.getenv('INVENTORY_MIRROR_MAX_AGE', '300'))  # 超过该秒数未同步成功时不再使用镜像
+    
+    # 事件推送配置（/api/events）
+    EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '10'))  # 比较资源变化的间隔（秒）
+    EVENTS_HEARTBEAT_INTERVAL = float(os.getenv('EVENTS_HEARTBEAT_INTERVAL', '15'))  # 无事件时发送心跳的间隔（秒）
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', '100'))  # 每个连接积压的事件上限
+    EVENTS_MAX_CHANGES = int(os.getenv('EVENTS_MAX_CHANGES', '500'))  # 单次变化超过该数量时通知客户端重新加载
+    
+    # 备份清理并发配置
+    CLEANUP_WORKERS = int(os.getenv('CLEANUP_WORKERS', '4'))
+    CLEANUP_RATE_LIMIT = float(os.getenv('CLEANUP_RATE_LIMIT', '5'))  # 每秒最多删除请求数，0表示不限流
+    CLEANUP_DELETE_WAIT_TIMEOUT = float(os.getenv('CLEANUP_DELETE_WAIT_TIMEOUT', '300'))  # 等待子备份删除完成的超时时间（秒）
+    CLEANUP_DELETE_POLL_INTERVAL = float(os.getenv('CLEANUP_DELETE_POLL_INTERVAL', '2'))
+    # 清理预演在没有实测耗时样本时使用的默认值（秒）
+    CLEANUP_DEFAULT_DELETE_LATENCY = float(os.getenv('CLEANUP_DEFAULT_DELETE_LATENCY', '1'))
+    CLEANUP_DEFAULT_WAIT_LATENCY = float(os.getenv('CLEANUP_DEFAULT_WAIT_LATENCY', '10'))
+    
+    # 定时备份调度配置
+    SCHEDULER_RELOAD_INTERVAL = float(os.getenv('SCHEDULER_RELOAD_INTERVAL', '60'))  # 检查定时任务配置变化的最大间隔（秒）
+    SCHEDULER_MISFIRE_GRACE = int(os.getenv('SCHEDULER_MISFIRE_GRACE', '300'))  # 错过执行时间后仍补执行的容错时间（秒）
+    SCHEDULER_SCHEDULE_CONCURRENCY = int(os.getenv('SCHEDULER_SCHEDULE_CONCURRENCY', '8'))  # 单个定时任务内的并发备份数
+    SCHEDULER_GLOBAL_CONCURRENCY = int(os.getenv('SCHEDULER_GLOBAL_CONCURRENCY', '16'))  # 所有定时任务合计的并发备份数
+    RECONCILE_INTERVAL = float(os.getenv('RECONCILE_INTERVAL', '30'))  # 备份状态同步间隔（秒），0表示不同步
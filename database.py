@@ -7,34 +7,205 @@ MySQL数据库模型和操作
 import mysql.connector
 import json
 import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+class ConnectionPool:
+    """线程安全的MySQL连接池
+    
+    借出连接时做健康检查并自动重连，连接全部借出时限时等待，超时抛出 TimeoutError
+    """
+    
+    def __init__(self, size, timeout, **connect_args):
+        self.size = max(1, int(size))
+        self.timeout = timeout
+        self._connect_args = connect_args
+        self._idle = deque()
+        self._created = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "wait_seconds": 0.0,
+            "max_in_use": 0,
+            "reconnects": 0
+        }
+    
+    def _new_connection(self):
+        return mysql.connector.connect(**self._connect_args)
+    
+    def _check(self, conn):
+        """健康检查，连接失效时重新建立"""
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return conn
+        except Exception as e:
+            logger.warning(f"数据库连接失效，重新建立连接: {e}")
+            try:
+                conn.close()
+            except Exception:
+                pass
+            with self._cond:
+                self._metrics["reconnects"] += 1
+            return self._new_connection()
+    
+    def acquire(self, timeout=None):
+        """借出连接"""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        started = time.monotonic()
+        
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    # 占用名额后在锁外建立新连接
+                    self._created += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise TimeoutError(f"等待数据库连接超时（{timeout}秒），连接池已满: {self.size}")
+                waited = True
+                self._cond.wait(remaining)
+            
+            self._in_use += 1
+            self._metrics["checkouts"] += 1
+            self._metrics["max_in_use"] = max(self._metrics["max_in_use"], self._in_use)
+            if waited:
+                self._metrics["waits"] += 1
+                self._metrics["wait_seconds"] += time.monotonic() - started
+        
+        try:
+            return self._new_connection() if conn is None else self._check(conn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._created -= 1
+                self._cond.notify()
+            raise
+    
+    def release(self, conn):
+        """归还连接，不访问数据库：连接是否可用在下次借出时由 _check 检查"""
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+    
+    @contextmanager
+    def connection(self):
+        """借出连接的上下文管理器"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    def stats(self):
+        """连接池使用情况"""
+        with self._cond:
+            return dict(
+                self._metrics,
+                wait_seconds=round(self._metrics["wait_seconds"], 3),
+                size=self.size,
+                created=self._created,
+                in_use=self._in_use,
+                idle=len(self._idle),
+                saturation=round(self._in_use / self.size, 3)
+            )
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            while self._idle:
+                conn = self._idle.pop()
+                self._created -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
 class DatabaseManager:
     def __init__(self):
         self.config = Config()
         self.connection = None
         self._connect()
         self._init_database()
+        self.pool = ConnectionPool(
+            self.config.MYSQL_POOL_SIZE,
+            self.config.MYSQL_POOL_TIMEOUT,
+            database=self.config.MYSQL_DATABASE,
+            **self._connect_args()
+        )
+        logger.info(f"MySQL连接池初始化完成，最大连接数: {self.pool.size}")
+    
+    def _connect_args(self):
+        return {
+            "host": self.config.MYSQL_HOST,
+            "port": self.config.MYSQL_PORT,
+            "user": self.config.MYSQL_USER,
+            "password": self.config.MYSQL_PASSWORD,
+            "charset": self.config.MYSQL_CHARSET,
+            "autocommit": True
+        }
     
     def _connect(self):
-        """连接MySQL数据库"""
-        try:
-            self.connection = mysql.connector.connect(
-                host=self.config.MYSQL_HOST,
-                port=self.config.MYSQL_PORT,
-                user=self.config.MYSQL_USER,
-                password=self.config.MYSQL_PASSWORD,
-                charset=self.config.MYSQL_CHARSET,
-                autocommit=True
-            )
+        """连接MySQL数据库（用于建库建表和诊断，业务操作使用连接池）"""
+        try:
+            self.connection = mysql.connector.connect(**self._connect_args())
             logger.info("MySQL数据库连接成功")
         except Exception as e:
             logger.error(f"MySQL数据库连接失败: {e}")
             raise
     
+    @contextmanager
+    def _cursor(self, dictionary=False):
+        """从连接池借出连接并创建游标，使用完毕后归还"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def _transaction(self, dictionary=False):
+        """从连接池借出连接并开启事务，正常结束时提交，发生异常时回滚"""
+        with self.pool.connection() as conn:
+            conn.start_transaction()
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                yield cursor
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def get_pool_stats(self):
+        """获取连接池使用情况"""
+        return self.pool.stats()
+    
+    def ping(self):
+        """检查数据库是否可用，失败时抛出异常"""
+        with self._cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        return True
+    
     def _init_database(self):
         """初始化数据库和表结构"""
         try:
@@ -58,10 +229,72 @@ class DatabaseManager:
                     created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
                     last_run TIMESTAMP NULL,
                     next_run TIMESTAMP NULL,
+                    config_version INT UNSIGNED NOT NULL DEFAULT 0,
                     updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """)
             
+            # 旧版本创建的表没有配置版本列，补充添加
+            cursor.execute("SHOW COLUMNS FROM backup_schedules LIKE 'config_version'")
+            if not cursor.fetchall():
+                cursor.execute("""
+                    ALTER TABLE backup_schedules 
+                    ADD COLUMN config_version INT UNSIGNED NOT NULL DEFAULT 0 AFTER next_run
+                """)
+            
+            # 创建后台任务表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backup_jobs (
+                    id VARCHAR(64) PRIMARY KEY,
+                    job_type VARCHAR(50) NOT NULL,
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    params JSON,
+                    total INT NOT NULL DEFAULT 0,
+                    done INT NOT NULL DEFAULT 0,
+                    failed INT NOT NULL DEFAULT 0,
+                    results JSON,
+                    summary JSON,
+                    error TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP NULL,
+                    finished_at TIMESTAMP NULL,
+                    INDEX idx_jobs_status (status),
+                    INDEX idx_jobs_created_at (created_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            
+            # 创建操作耗时样本表（清理预演估算耗时使用，每种操作保留最近的样本）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS operation_latencies (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    operation VARCHAR(50) NOT NULL,
+                    seconds DOUBLE NOT NULL,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_latencies_operation (operation, id)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            
+            # 创建备份历史表
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS backup_history (
+                    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    schedule_id VARCHAR(50),
+                    backup_id VARCHAR(64),
+                    volume_id VARCHAR(64) NOT NULL,
+                    backup_name VARCHAR(255),
+                    backup_type ENUM('full', 'incremental') NOT NULL DEFAULT 'full',
+                    status VARCHAR(20) NOT NULL,
+                    error_message TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_history_schedule (schedule_id, created_at),
+                    INDEX idx_history_volume (volume_id, created_at),
+                    INDEX idx_history_backup (backup_id),
+                    INDEX idx_history_status (status),
+                    INDEX idx_history_created_at (created_at)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            
             cursor.close()
             logger.info("数据库表结构初始化完成")
             
@@ -69,67 +302,77 @@ class DatabaseManager:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
+    def _row_to_schedule(self, row):
+        """将数据库行转换为定时备份配置字典"""
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'backup_type': row['backup_type'],
+            'schedule_type': row['schedule_type'],
+            'schedule_time': str(row['schedule_time']),
+            'weekdays': json.loads(row['weekdays']) if row['weekdays'] else [],
+            'volume_ids': json.loads(row['volume_ids']),
+            'enabled': bool(row['enabled']),
+            'created_at': row['created_at'].isoformat(),
+            'last_run': row['last_run'].isoformat() if row['last_run'] else None,
+            'next_run': row['next_run'].isoformat() if row['next_run'] else None
+        }
+    
     def load_schedules(self):
         """加载所有定时备份配置"""
         try:
-            cursor = self.get_connection().cursor(dictionary=True)
-            cursor.execute("SELECT * FROM backup_schedules ORDER BY created_at DESC")
-            
-            schedules = []
-            for row in cursor.fetchall():
-                schedule = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'backup_type': row['backup_type'],
-                    'schedule_type': row['schedule_type'],
-                    'schedule_time': str(row['schedule_time']),
-                    'weekdays': json.loads(row['weekdays']) if row['weekdays'] else [],
-                    'volume_ids': json.loads(row['volume_ids']),
-                    'enabled': bool(row['enabled']),
-                    'created_at': row['created_at'].isoformat(),
-                    'last_run': row['last_run'].isoformat() if row['last_run'] else None,
-                    'next_run': row['next_run'].isoformat() if row['next_run'] else None
-                }
-                schedules.append(schedule)
+            with self._cursor(dictionary=True) as cursor:
+                cursor.execute("SELECT * FROM backup_schedules ORDER BY created_at DESC")
+                schedules = [self._row_to_schedule(row) for row in cursor.fetchall()]
             
-            cursor.close()
             return schedules
             
         except Exception as e:
             logger.error(f"加载定时备份配置失败: {e}")
             return []
     
+    def get_schedule(self, schedule_id):
+        """按ID获取单个定时备份配置，不存在时返回None"""
+        try:
+            with self._cursor(dictionary=True) as cursor:
+                cursor.execute("SELECT * FROM backup_schedules WHERE id = %s", (schedule_id,))
+                row = cursor.fetchone()
+            return self._row_to_schedule(row) if row else None
+            
+        except Exception as e:
+            logger.error(f"获取定时备份配置失败: {e}")
+            return None
+    
     def save_schedule(self, schedule):
         """保存单个定时备份配置"""
         try:
-            cursor = self.get_connection().cursor()
-            
-            cursor.execute("""
-                INSERT INTO backup_schedules 
-                (id, name, backup_type, schedule_type, schedule_time, weekdays, volume_ids, enabled, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON DUPLICATE KEY UPDATE
-                name = VALUES(name),
-                backup_type = VALUES(backup_type),
-                schedule_type = VALUES(schedule_type),
-                schedule_time = VALUES(schedule_time),
-                weekdays = VALUES(weekdays),
-                volume_ids = VALUES(volume_ids),
-                enabled = VALUES(enabled),
-                updated_at = CURRENT_TIMESTAMP
-            """, (
-                schedule['id'],
-                schedule['name'],
-                schedule['backup_type'],
-                schedule['schedule_type'],
-                schedule['schedule_time'],
-                json.dumps(schedule['weekdays']),
-                json.dumps(schedule['volume_ids']),
-                schedule['enabled'],
-                schedule['created_at']
-            ))
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO backup_schedules 
+                    (id, name, backup_type, schedule_type, schedule_time, weekdays, volume_ids, enabled, created_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                    name = VALUES(name),
+                    backup_type = VALUES(backup_type),
+                    schedule_type = VALUES(schedule_type),
+                    schedule_time = VALUES(schedule_time),
+                    weekdays = VALUES(weekdays),
+                    volume_ids = VALUES(volume_ids),
+                    enabled = VALUES(enabled),
+                    config_version = config_version + 1,
+                    updated_at = CURRENT_TIMESTAMP
+                """, (
+                    schedule['id'],
+                    schedule['name'],
+                    schedule['backup_type'],
+                    schedule['schedule_type'],
+                    schedule['schedule_time'],
+                    json.dumps(schedule['weekdays']),
+                    json.dumps(schedule['volume_ids']),
+                    schedule['enabled'],
+                    schedule['created_at']
+                ))
             
-            cursor.close()
             return True
             
         except Exception as e:
@@ -139,10 +382,9 @@ class DatabaseManager:
     def delete_schedule(self, schedule_id):
         """删除定时备份配置"""
         try:
-            cursor = self.get_connection().cursor()
-            cursor.execute("DELETE FROM backup_schedules WHERE id = %s", (schedule_id,))
-            affected_rows = cursor.rowcount
-            cursor.close()
+            with self._cursor() as cursor:
+                cursor.execute("DELETE FROM backup_schedules WHERE id = %s", (schedule_id,))
+                affected_rows = cursor.rowcount
             return affected_rows > 0
             
         except Exception as e:
@@ -152,45 +394,462 @@ class DatabaseManager:
     def update_schedule_enabled(self, schedule_id, enabled):
         """更新定时备份启用状态"""
         try:
-            cursor = self.get_connection().cursor()
-            cursor.execute("""
-                UPDATE backup_schedules 
-                SET enabled = %s, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = %s
-            """, (enabled, schedule_id))
-            affected_rows = cursor.rowcount
-            cursor.close()
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    UPDATE backup_schedules 
+                    SET enabled = %s, config_version = config_version + 1, updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = %s
+                """, (enabled, schedule_id))
+                affected_rows = cursor.rowcount
             return affected_rows > 0
             
         except Exception as e:
             logger.error(f"更新定时备份状态失败: {e}")
             return False
     
+    def toggle_schedule_enabled(self, schedule_id):
+        """在数据库中原子切换定时备份启用状态
+        
+        返回 {'enabled': 新状态}，定时备份不存在时返回None，失败时返回False
+        """
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    UPDATE backup_schedules 
+                    SET enabled = NOT enabled, config_version = config_version + 1, updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = %s
+                """, (schedule_id,))
+                if cursor.rowcount == 0:
+                    return None
+                cursor.execute("SELECT enabled FROM backup_schedules WHERE id = %s", (schedule_id,))
+                enabled = bool(cursor.fetchone()[0])
+            return {'enabled': enabled}
+            
+        except Exception as e:
+            logger.error(f"切换定时备份状态失败: {e}")
+            return False
+    
+    def add_schedule_volumes(self, schedule_id, volume_ids):
+        """在数据库中向定时备份的云硬盘列表追加云硬盘（已存在的跳过）
+        
+        返回 {'added_count', 'total_volumes'}，定时备份不存在时返回None，失败时返回False
+        """
+        try:
+            with self._transaction() as cursor:
+                # 锁定该行，合并后的列表在同一事务内一次写回
+                cursor.execute("SELECT volume_ids FROM backup_schedules WHERE id = %s FOR UPDATE", (schedule_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                
+                current = json.loads(row[0]) if row[0] else []
+                existing = set(current)
+                added = [volume_id for volume_id in dict.fromkeys(volume_ids) if volume_id not in existing]
+                if added:
+                    cursor.execute("""
+                        UPDATE backup_schedules 
+                        SET volume_ids = %s, config_version = config_version + 1, updated_at = CURRENT_TIMESTAMP 
+                        WHERE id = %s
+                    """, (json.dumps(current + added), schedule_id))
+            return {'added_count': len(added), 'total_volumes': len(current) + len(added)}
+            
+        except Exception as e:
+            logger.error(f"添加定时备份云硬盘失败: {e}")
+            return False
+    
+    def remove_schedule_volumes(self, schedule_id, volume_ids):
+        """在数据库中从定时备份的云硬盘列表移除云硬盘
+        
+        返回 {'removed_count', 'total_volumes'}，定时备份不存在时返回None，失败时返回False
+        """
+        try:
+            with self._transaction() as cursor:
+                # 锁定该行，移除后的列表在同一事务内一次写回
+                cursor.execute("SELECT volume_ids FROM backup_schedules WHERE id = %s FOR UPDATE", (schedule_id,))
+                row = cursor.fetchone()
+                if not row:
+                    return None
+                
+                current = json.loads(row[0]) if row[0] else []
+                removing = set(volume_ids)
+                remaining = [volume_id for volume_id in current if volume_id not in removing]
+                removed_count = len(current) - len(remaining)
+                if removed_count:
+                    cursor.execute("""
+                        UPDATE backup_schedules 
+                        SET volume_ids = %s, config_version = config_version + 1, updated_at = CURRENT_TIMESTAMP 
+                        WHERE id = %s
+                    """, (json.dumps(remaining), schedule_id))
+            return {'removed_count': removed_count, 'total_volumes': len(remaining)}
+            
+        except Exception as e:
+            logger.error(f"移除定时备份云硬盘失败: {e}")
+            return False
+    
     def update_schedule_volumes(self, schedule_id, volume_ids):
         """更新定时备份的云硬盘列表"""
         try:
-            cursor = self.get_connection().cursor()
-            cursor.execute("""
-                UPDATE backup_schedules 
-                SET volume_ids = %s, updated_at = CURRENT_TIMESTAMP 
-                WHERE id = %s
-            """, (json.dumps(volume_ids), schedule_id))
-            affected_rows = cursor.rowcount
-            cursor.close()
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    UPDATE backup_schedules 
+                    SET volume_ids = %s, config_version = config_version + 1, updated_at = CURRENT_TIMESTAMP 
+                    WHERE id = %s
+                """, (json.dumps(volume_ids), schedule_id))
+                affected_rows = cursor.rowcount
             return affected_rows > 0
             
         except Exception as e:
             logger.error(f"更新定时备份云硬盘列表失败: {e}")
             return False
     
+    def get_schedules_version(self):
+        """获取定时备份配置版本，用于判断配置是否变化
+        
+        每次修改配置时行的 config_version 加1，版本为行数和 (id, config_version) 校验和，
+        同一秒内的多次修改、新增和删除都会改变版本；执行时间的更新不改变版本
+        """
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(CRC32(CONCAT(id, ':', config_version))), 0) 
+                    FROM backup_schedules
+                """)
+                count, checksum = cursor.fetchone()
+            return (count, int(checksum))
+            
+        except Exception as e:
+            logger.error(f"获取定时备份配置版本失败: {e}")
+            return None
+    
+    def update_schedule_next_run(self, schedule_id, next_run):
+        """更新定时备份下次执行时间"""
+        try:
+            with self._cursor() as cursor:
+                # 显式保留updated_at，执行时间变化不视为配置变化
+                cursor.execute("""
+                    UPDATE backup_schedules 
+                    SET next_run = %s, updated_at = updated_at 
+                    WHERE id = %s
+                """, (next_run, schedule_id))
+                affected_rows = cursor.rowcount
+            return affected_rows > 0
+            
+        except Exception as e:
+            logger.error(f"更新定时备份下次执行时间失败: {e}")
+            return False
+    
+    def update_schedule_last_run(self, schedule_id, last_run=None, next_run=None):
+        """更新定时备份最后执行时间和下次执行时间"""
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    UPDATE backup_schedules 
+                    SET last_run = %s, next_run = %s, updated_at = updated_at 
+                    WHERE id = %s
+                """, (last_run or datetime.now(), next_run, schedule_id))
+                affected_rows = cursor.rowcount
+            return affected_rows > 0
+            
+        except Exception as e:
+            logger.error(f"更新定时备份执行时间失败: {e}")
+            return False
+    
+    def add_backup_history(self, schedule_id, backup_id, volume_id, backup_name, backup_type, status, error_message=None):
+        """添加单条备份历史记录"""
+        return self.add_backup_history_batch([{
+            'schedule_id': schedule_id,
+            'backup_id': backup_id,
+            'volume_id': volume_id,
+            'backup_name': backup_name,
+            'backup_type': backup_type,
+            'status': status,
+            'error_message': error_message
+        }]) == 1
+    
+    def add_backup_history_batch(self, records):
+        """批量添加备份历史记录（多行INSERT），返回写入条数"""
+        if not records:
+            return 0
+        
+        try:
+            with self._cursor() as cursor:
+                cursor.executemany("""
+                    INSERT INTO backup_history 
+                    (schedule_id, backup_id, volume_id, backup_name, backup_type, status, error_message)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, [(
+                    record.get('schedule_id'),
+                    record.get('backup_id') or None,
+                    record['volume_id'],
+                    record.get('backup_name'),
+                    record.get('backup_type', 'full'),
+                    record['status'],
+                    record.get('error_message')
+                ) for record in records])
+            return len(records)
+            
+        except Exception as e:
+            logger.error(f"添加备份历史记录失败: {e}")
+            return 0
+    
+    def update_backup_history_status(self, backup_id, status, error_message=None):
+        """按Cinder备份ID更新备份历史状态"""
+        if not backup_id:
+            return False
+        
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    UPDATE backup_history 
+                    SET status = %s, error_message = %s 
+                    WHERE backup_id = %s
+                """, (status, error_message, backup_id))
+                affected_rows = cursor.rowcount
+            return affected_rows > 0
+            
+        except Exception as e:
+            logger.error(f"更新备份历史状态失败: {e}")
+            return False
+    
+    def get_pending_backup_history(self, statuses=('creating',), limit=10000):
+        """获取仍处于进行中状态的备份历史 {backup_id: status}"""
+        try:
+            placeholders = ", ".join(["%s"] * len(statuses))
+            with self._cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT backup_id, status FROM backup_history 
+                    WHERE status IN ({placeholders}) AND backup_id IS NOT NULL 
+                    LIMIT %s
+                """, (*statuses, limit))
+                pending = dict(cursor.fetchall())
+            return pending
+            
+        except Exception as e:
+            logger.error(f"获取待同步备份历史失败: {e}")
+            return {}
+    
+    def update_backup_history_statuses(self, updates, chunk_size=500):
+        """批量更新备份历史状态，每批一条 UPDATE ... CASE 语句
+        
+        updates 为 {backup_id: (status, error_message)}，返回更新的行数
+        """
+        items = list(updates.items())
+        updated = 0
+        try:
+            with self._cursor() as cursor:
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    status_cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+                    error_cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    params = []
+                    for backup_id, (status, _) in chunk:
+                        params.extend([backup_id, status])
+                    for backup_id, (_, error_message) in chunk:
+                        params.extend([backup_id, error_message])
+                    params.extend(backup_id for backup_id, _ in chunk)
+                    
+                    cursor.execute(f"""
+                        UPDATE backup_history 
+                        SET status = CASE backup_id {status_cases} ELSE status END, 
+                            error_message = CASE backup_id {error_cases} ELSE error_message END 
+                        WHERE backup_id IN ({placeholders})
+                    """, params)
+                    updated += cursor.rowcount
+            return updated
+            
+        except Exception as e:
+            logger.error(f"批量更新备份历史状态失败: {e}")
+            return updated
+    
+    def _row_to_history(self, row):
+        """将数据库行转换为备份历史字典"""
+        return {
+            'id': row['id'],
+            'schedule_id': row['schedule_id'],
+            'backup_id': row['backup_id'],
+            'volume_id': row['volume_id'],
+            'backup_name': row['backup_name'],
+            'backup_type': row['backup_type'],
+            'status': row['status'],
+            'error_message': row['error_message'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None
+        }
+    
+    def get_backup_history(self, limit=100, schedule_id=None, volume_id=None, marker=None):
+        """按创建时间倒序查询备份历史
+        
+        使用键集分页：marker 为上一页最后一条记录的ID，避免大表上的OFFSET扫描
+        """
+        try:
+            conditions = []
+            params = []
+            if schedule_id:
+                conditions.append("schedule_id = %s")
+                params.append(schedule_id)
+            if volume_id:
+                conditions.append("volume_id = %s")
+                params.append(volume_id)
+            
+            with self._cursor(dictionary=True) as cursor:
+                if marker:
+                    cursor.execute("SELECT created_at FROM backup_history WHERE id = %s", (marker,))
+                    row = cursor.fetchone()
+                    if row:
+                        conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+                        params.extend([row['created_at'], row['created_at'], marker])
+                
+                where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+                cursor.execute(
+                    f"SELECT * FROM backup_history {where} ORDER BY created_at DESC, id DESC LIMIT %s",
+                    (*params, int(limit))
+                )
+                history = [self._row_to_history(row) for row in cursor.fetchall()]
+            return history
+            
+        except Exception as e:
+            logger.error(f"查询备份历史失败: {e}")
+            return []
+    
+    def save_job(self, job):
+        """保存后台任务状态"""
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO backup_jobs
+                    (id, job_type, status, params, total, done, failed, results, summary, error, created_at, started_at, finished_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                    status = VALUES(status),
+                    total = VALUES(total),
+                    done = VALUES(done),
+                    failed = VALUES(failed),
+                    results = VALUES(results),
+                    summary = VALUES(summary),
+                    error = VALUES(error),
+                    started_at = VALUES(started_at),
+                    finished_at = VALUES(finished_at)
+                """, (
+                    job['id'],
+                    job['job_type'],
+                    job['status'],
+                    json.dumps(job['params']),
+                    job['total'],
+                    job['done'],
+                    job['failed'],
+                    json.dumps(job['results']),
+                    json.dumps(job['summary']) if job.get('summary') is not None else None,
+                    job.get('error'),
+                    job['created_at'],
+                    job.get('started_at'),
+                    job.get('finished_at')
+                ))
+            return True
+            
+        except Exception as e:
+            logger.error(f"保存后台任务失败: {e}")
+            return False
+    
+    def _row_to_job(self, row):
+        """将数据库行转换为任务字典"""
+        return {
+            'id': row['id'],
+            'job_type': row['job_type'],
+            'status': row['status'],
+            'params': json.loads(row['params']) if row['params'] else {},
+            'total': row['total'],
+            'done': row['done'],
+            'failed': row['failed'],
+            'results': json.loads(row['results']) if row['results'] else [],
+            'summary': json.loads(row['summary']) if row['summary'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'started_at': row['started_at'].isoformat() if row['started_at'] else None,
+            'finished_at': row['finished_at'].isoformat() if row['finished_at'] else None
+        }
+    
+    def get_job(self, job_id):
+        """获取单个后台任务"""
+        try:
+            with self._cursor(dictionary=True) as cursor:
+                cursor.execute("SELECT * FROM backup_jobs WHERE id = %s", (job_id,))
+                row = cursor.fetchone()
+            return self._row_to_job(row) if row else None
+            
+        except Exception as e:
+            logger.error(f"获取后台任务失败: {e}")
+            return None
+    
+    def load_jobs(self, statuses=None, limit=50):
+        """加载后台任务，可按状态过滤"""
+        try:
+            with self._cursor(dictionary=True) as cursor:
+                if statuses:
+                    placeholders = ", ".join(["%s"] * len(statuses))
+                    cursor.execute(
+                        f"SELECT * FROM backup_jobs WHERE status IN ({placeholders}) ORDER BY created_at DESC LIMIT %s",
+                        (*statuses, limit)
+                    )
+                else:
+                    cursor.execute("SELECT * FROM backup_jobs ORDER BY created_at DESC LIMIT %s", (limit,))
+                jobs = [self._row_to_job(row) for row in cursor.fetchall()]
+            return jobs
+            
+        except Exception as e:
+            logger.error(f"加载后台任务失败: {e}")
+            return []
+    
+    def save_operation_latencies(self, samples, keep=200):
+        """批量保存操作耗时样本 [(操作, 秒数)]，每种操作只保留最近 keep 个"""
+        try:
+            with self._cursor() as cursor:
+                placeholders = ", ".join(["(%s, %s)"] * len(samples))
+                cursor.execute(
+                    f"INSERT INTO operation_latencies (operation, seconds) VALUES {placeholders}",
+                    [value for sample in samples for value in sample]
+                )
+                for operation in {operation for operation, _ in samples}:
+                    cursor.execute("""
+                        DELETE FROM operation_latencies 
+                        WHERE operation = %s AND id <= (
+                            SELECT id FROM (
+                                SELECT id FROM operation_latencies WHERE operation = %s 
+                                ORDER BY id DESC LIMIT 1 OFFSET %s
+                            ) AS oldest_kept
+                        )
+                    """, (operation, operation, keep))
+            return True
+            
+        except Exception as e:
+            logger.error(f"保存操作耗时样本失败: {e}")
+            return False
+    
+    def get_operation_latencies(self, operation, limit=200):
+        """获取指定操作最近的耗时样本（秒），按记录时间正序"""
+        try:
+            with self._cursor() as cursor:
+                cursor.execute("""
+                    SELECT seconds FROM operation_latencies 
+                    WHERE operation = %s ORDER BY id DESC LIMIT %s
+                """, (operation, limit))
+                samples = [row[0] for row in cursor.fetchall()]
+            return samples[::-1]
+            
+        except Exception as e:
+            logger.error(f"获取操作耗时样本失败: {e}")
+            return []
+    
     def get_connection(self):
-        """获取数据库连接"""
+        """获取独立的数据库连接（供诊断脚本使用，业务操作通过连接池）"""
         if not self.connection or not self.connection.is_connected():
             self._connect()
+            self.connection.database = self.config.MYSQL_DATABASE
         return self.connection
     
     def close(self):
-        """关闭数据库连接"""
+        """关闭数据库连接和连接池"""
+        self.pool.close()
         if self.connection and self.connection.is_connected():
             self.connection.close()
             logger.info("数据库连接已关闭")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源变化事件推送
+后台线程按固定间隔读取资源清单和定时备份配置，与上次结果比较后将新增、更新、删除的条目
+广播给所有订阅者（/api/events SSE连接）；无论打开多少个页面，上游都只读取一次
+"""
+
+import logging
+import queue
+import threading
+import time
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+EVENT_CHANGE = 'change'
+EVENT_RESYNC = 'resync'
+
+class EventBroker:
+    """事件广播器 - 单个后台线程比较资源差异，每个订阅者一个有界队列"""
+
+    def __init__(self, sources, interval=None, queue_size=None, max_changes=None):
+        """sources: {资源类型: 加载函数}，加载函数返回资源列表，失败时应抛出异常而不是返回空列表"""
+        self.sources = sources
+        self.interval = Config.EVENTS_POLL_INTERVAL if interval is None else interval
+        self.queue_size = queue_size or Config.EVENTS_QUEUE_SIZE
+        self.max_changes = max_changes or Config.EVENTS_MAX_CHANGES
+        self._subscribers = set()
+        self._snapshots = {}  # 资源类型 -> {id: 条目}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        """新增订阅者，返回其事件队列；首个订阅者出现时启动比较线程"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='event-watcher', daemon=True)
+                self._thread.start()
+        logger.info(f"事件订阅者已连接，当前 {len(self._subscribers)} 个")
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        """移除订阅者"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        logger.info(f"事件订阅者已断开，当前 {len(self._subscribers)} 个")
+
+    def publish(self, event_type, data):
+        """向所有订阅者广播事件；队列已满的订阅者丢弃积压事件并收到重新同步通知"""
+        with self._lock:
+            self._sequence += 1
+            event = {'id': self._sequence, 'type': event_type, 'data': data}
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # 客户端消费过慢，增量事件已不完整，通知其重新加载全部数据
+                while True:
+                    try:
+                        subscriber.get_nowait()
+                    except queue.Empty:
+                        break
+                subscriber.put_nowait({'id': event['id'], 'type': EVENT_RESYNC, 'data': {}})
+
+    def diff(self, resource, items):
+        """与上次的清单比较，返回变化内容；首次比较或没有变化时返回None"""
+        current = {item['id']: item for item in items}
+        with self._lock:
+            previous = self._snapshots.get(resource)
+            self._snapshots[resource] = current
+        if previous is None:
+            return None
+
+        added = [item for item_id, item in current.items() if item_id not in previous]
+        updated = [item for item_id, item in current.items() if item_id in previous and previous[item_id] != item]
+        removed = [item_id for item_id in previous if item_id not in current]
+        if not (added or updated or removed):
+            return None
+        if len(added) + len(updated) + len(removed) > self.max_changes:
+            # 变化过多时让客户端直接重新加载该资源列表
+            return {'resource': resource, 'reload': True}
+        return {'resource': resource, 'added': added, 'updated': updated, 'removed': removed}
+
+    def poll(self):
+        """读取一次所有数据源并广播变化，单个数据源失败时保留其上次的清单"""
+        for resource, loader in self.sources.items():
+            try:
+                items = loader()
+            except Exception as e:
+                logger.error(f"事件推送读取 {resource} 失败: {e}")
+                continue
+            change = self.diff(resource, items)
+            if change:
+                self.publish(EVENT_CHANGE, change)
+
+    def stats(self):
+        """获取订阅者数量和已广播的事件数"""
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'events': self._sequence,
+                'interval': self.interval,
+                'resources': {resource: len(items) for resource, items in self._snapshots.items()}
+            }
+
+    def _run(self):
+        """比较线程 - 有订阅者时按间隔比较，没有订阅者时清空快照，避免重新连接后推送过期的差异"""
+        while True:
+            with self._lock:
+                active = bool(self._subscribers)
+                if not active:
+                    self._snapshots.clear()
+            if active:
+                self.poll()
+            time.sleep(self.interval)
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟OpenStack连接
+在进程内模拟本项目使用的 openstack.connection.Connection 接口（Cinder块存储和Nova计算），
+资源规模、接口延迟和错误率可配置，用于在没有真实云环境时进行压力测试和性能基准测试
+"""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qsl
+from openstack import exceptions
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+class FakeResource:
+    """模拟SDK资源对象 - 通过属性访问字段"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return f"FakeResource(id={self.__dict__.get('id')!r})"
+
+class FakeResponse:
+    """模拟REST响应"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+def _timestamp(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+class FakeCloud:
+    """模拟云环境的资源状态，块存储和计算服务共享"""
+
+    def __init__(self, volumes=1000, backups_per_volume=10, full_backup_interval=7, snapshots_per_volume=1,
+                 servers=200, snapshots_per_server=2, latency=0.0, page_latency=0.0, error_rate=0.0,
+                 page_size=1000, create_delay=0.0, delete_delay=0.0, seed=None):
+        self.latency = latency
+        self.page_latency = page_latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.create_delay = create_delay
+        self.delete_delay = delete_delay
+        self.random = random.Random(seed)
+        self.lock = threading.RLock()
+        self.calls = {}
+
+        self.volumes = {}
+        self.backups = {}
+        self.backups_by_volume = defaultdict(dict)  # volume_id -> {backup_id: 备份}
+        self.volume_snapshots = {}
+        self.servers = {}
+        self.server_snapshots = {}
+        self._populate(volumes, backups_per_volume, full_backup_interval, snapshots_per_volume,
+                       servers, snapshots_per_server)
+
+    def _new_id(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def _populate(self, volume_count, backups_per_volume, full_backup_interval, snapshots_per_volume,
+                  server_count, snapshots_per_server):
+        """生成初始资源：每个云硬盘按天生成备份链，每 full_backup_interval 个备份一个全量备份"""
+        now = datetime.now().replace(microsecond=0)
+
+        for index in range(volume_count):
+            volume_id = self._new_id()
+            created_at = now - timedelta(days=backups_per_volume + 30, minutes=index)
+            self.volumes[volume_id] = FakeResource(
+                id=volume_id,
+                name=f"volume-{index:06d}",
+                size=self.random.choice([10, 20, 50, 100, 200]),
+                status=self.random.choice(['available', 'in-use', 'in-use', 'in-use']),
+                created_at=_timestamp(created_at),
+                updated_at=_timestamp(created_at),
+                description='',
+                volume_type='standard',
+                availability_zone='nova',
+                bootable=False,
+                encrypted=False
+            )
+
+            chain = []
+            for position in range(backups_per_volume):
+                backup_time = now - timedelta(days=backups_per_volume - position, minutes=index % 1440)
+                is_incremental = position % full_backup_interval != 0
+                if not is_incremental:
+                    chain = []
+                backup = self._make_backup(volume_id, f"volume-{index:06d}", is_incremental, backup_time)
+                if chain:
+                    chain[-1].has_dependent_backups = True
+                chain.append(backup)
+
+            for position in range(snapshots_per_volume):
+                snapshot_time = now - timedelta(days=position + 1, minutes=index % 1440)
+                snapshot_id = self._new_id()
+                self.volume_snapshots[snapshot_id] = FakeResource(
+                    id=snapshot_id,
+                    name=f"volume-{index:06d}-snapshot-{position}",
+                    volume_id=volume_id,
+                    status='available',
+                    created_at=_timestamp(snapshot_time),
+                    updated_at=_timestamp(snapshot_time),
+                    metadata={},
+                    description='',
+                    size=self.volumes[volume_id].size,
+                    force=False,
+                    progress='100%',
+                    user_id='fake-user',
+                    project_id='fake-project'
+                )
+
+        for index in range(server_count):
+            server_id = self._new_id()
+            created_at = now - timedelta(days=60, minutes=index)
+            self.servers[server_id] = FakeResource(
+                id=server_id,
+                name=f"server-{index:06d}",
+                status='ACTIVE',
+                created_at=_timestamp(created_at),
+                updated_at=_timestamp(created_at),
+                flavor=FakeResource(id='m1.small', name='m1.small', ram=2048, vcpus=1, disk=20),
+                image=FakeResource(id='fake-image', name='cirros'),
+                networks={'private': ['10.0.0.%d' % (index % 250 + 2)]},
+                key_name='',
+                security_groups=[{'name': 'default'}]
+            )
+            for position in range(snapshots_per_server):
+                snapshot_time = now - timedelta(days=position * 15 + 1, minutes=index)
+                snapshot_id = self._new_id()
+                self.server_snapshots[snapshot_id] = FakeResource(
+                    id=snapshot_id,
+                    name=f"server-{index:06d}-snapshot-{position}",
+                    server_id=server_id,
+                    status='ACTIVE',
+                    created_at=_timestamp(snapshot_time),
+                    updated_at=_timestamp(snapshot_time),
+                    metadata={},
+                    description='',
+                    size=1073741824,
+                    min_disk=20,
+                    min_ram=0,
+                    progress=100,
+                    block_device_mapping=[]
+                )
+
+    def _make_backup(self, volume_id, volume_name, is_incremental, created_at, status='available', name=None):
+        backup_id = self._new_id()
+        kind = 'Incremental' if is_incremental else 'Full'
+        backup = FakeResource(
+            id=backup_id,
+            name=name or f"{volume_name}-backup-{volume_id}-{created_at.strftime('%Y-%m-%d-%H-%M')}",
+            volume_id=volume_id,
+            status=status,
+            created_at=_timestamp(created_at),
+            updated_at=_timestamp(created_at),
+            is_incremental=is_incremental,
+            size=self.volumes[volume_id].size if volume_id in self.volumes else 1,
+            description=f"{kind} backup created at {created_at.isoformat()}",
+            availability_zone='nova',
+            container='backups',
+            fail_reason='',
+            has_dependent_backups=False,
+            snapshot_id=None,
+            data_timestamp=_timestamp(created_at)
+        )
+        self.backups[backup_id] = backup
+        self.backups_by_volume[volume_id][backup_id] = backup
+        return backup
+
+    def later(self, delay, func):
+        """延迟执行状态变化（创建完成、删除完成），delay 不大于0时立即执行"""
+        if delay > 0:
+            timer = threading.Timer(delay, func)
+            timer.daemon = True
+            timer.start()
+        else:
+            func()
+
+    def transition(self, resource, status, **fields):
+        """在 create_delay 之后将资源置为目标状态，返回创建接口响应（创建时的状态副本）"""
+        response = FakeResource(**resource.to_dict())
+
+        def finish():
+            with self.lock:
+                resource.status = status
+                resource.updated_at = _timestamp(datetime.now())
+                resource.__dict__.update(fields)
+
+        self.later(self.create_delay, finish)
+        return response
+
+    def call(self, operation, pages=0):
+        """模拟一次API调用：计数、注入延迟和随机错误"""
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+        delay = self.latency + self.page_latency * pages
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise exceptions.HttpException(f"模拟错误: {operation}")
+
+    def paginate(self, operation, resources, query, sort_key='created_at', sort_dir='desc'):
+        """按Cinder/Nova的分页语义返回资源：支持过滤、排序、marker和limit，逐页请求
+
+        changes_since（Nova）和 updated_at='gte:<时间>'（Cinder 3.60）只返回该时间之后修改过的资源
+        """
+        filters = {
+            key: value for key, value in query.items()
+            if key not in ('limit', 'marker', 'sort_key', 'sort_dir', 'details') and value is not None
+        }
+        since = filters.pop('changes_since', None)
+        updated_at = filters.pop('updated_at', None)
+        if updated_at:
+            operator, _, since = updated_at.partition(':')
+            if operator != 'gte':
+                raise exceptions.BadRequestException(f"不支持的时间比较方式: {operator}")
+        sort_key = query.get('sort_key') or sort_key
+        sort_dir = query.get('sort_dir') or sort_dir
+
+        with self.lock:
+            items = [
+                item for item in resources.values()
+                if all(getattr(item, key, None) == value for key, value in filters.items())
+                and (not since or (getattr(item, 'updated_at', None) or '') >= since)
+            ]
+        items.sort(key=lambda item: (getattr(item, sort_key, None) or '', item.id), reverse=sort_dir == 'desc')
+
+        marker = query.get('marker')
+        if marker:
+            ids = [item.id for item in items]
+            if marker not in ids:
+                raise exceptions.BadRequestException(f"marker {marker} 不存在")
+            items = items[ids.index(marker) + 1:]
+
+        page_size = min(int(query.get('limit') or self.page_size), self.page_size)
+        for start in range(0, max(len(items), 1), page_size):
+            self.call(operation, pages=1)
+            for item in items[start:start + page_size]:
+                yield item
+
+    def stats(self):
+        """各接口调用次数和资源数量"""
+        with self.lock:
+            return {
+                'calls': dict(self.calls),
+                'volumes': len(self.volumes),
+                'backups': len(self.backups),
+                'volume_snapshots': len(self.volume_snapshots),
+                'servers': len(self.servers),
+                'server_snapshots': len(self.server_snapshots)
+            }
+
+class FakeBlockStorage:
+    """模拟Cinder块存储服务"""
+
+    def __init__(self, cloud):
+        self.cloud = cloud
+
+    def _get(self, resources, resource_id, operation):
+        self.cloud.call(operation)
+        with self.cloud.lock:
+            resource = resources.get(resource_id)
+        if resource is None:
+            raise exceptions.ResourceNotFound(f"{resource_id} 不存在")
+        return resource
+
+    def get(self, url, microversion=None, raise_exc=True, **kwargs):
+        """模拟Cinder REST列表查询（/volumes、/backups、/snapshots），微版本3.45起支持with_count"""
+        parsed = urlparse(url)
+        query = dict(parse_qsl(parsed.query))
+        collections = {
+            '/volumes': ('volumes', self.cloud.volumes),
+            '/backups': ('backups', self.cloud.backups),
+            '/snapshots': ('snapshots', self.cloud.volume_snapshots)
+        }
+        if parsed.path.rstrip('/') not in collections:
+            return FakeResponse(404, {'error': f"{parsed.path} 不存在"})
+        name, resources = collections[parsed.path.rstrip('/')]
+        self.cloud.call(f'get_{name}')
+
+        with_count = query.pop('with_count', 'false').lower() == 'true'
+        limit = int(query.pop('limit', self.cloud.page_size))
+        with self.cloud.lock:
+            items = [
+                item for item in resources.values()
+                if all(str(getattr(item, key, None)) == value for key, value in query.items())
+            ]
+        body = {name: [{'id': item.id, 'name': item.name} for item in items[:limit]]}
+        version = tuple(int(part) for part in (microversion or '3.0').split('.'))
+        if with_count and version >= (3, 45):
+            body['count'] = len(items)
+        return FakeResponse(200, body)
+
+    def volumes(self, details=True, **query):
+        return self.cloud.paginate('volumes', self.cloud.volumes, query)
+
+    def get_volume(self, volume_id):
+        return self._get(self.cloud.volumes, volume_id, 'get_volume')
+
+    def backups(self, details=True, **query):
+        return self.cloud.paginate('backups', self.cloud.backups, query)
+
+    def get_backup(self, backup_id):
+        return self._get(self.cloud.backups, backup_id, 'get_backup')
+
+    def create_backup(self, volume_id, name=None, force=False, incremental=False, description=None):
+        self.cloud.call('create_backup')
+        with self.cloud.lock:
+            volume = self.cloud.volumes.get(volume_id)
+            if volume is None:
+                raise exceptions.ResourceNotFound(f"云硬盘 {volume_id} 不存在")
+            # 增量备份依赖该云硬盘最新的可用备份
+            parent = max(
+                (b for b in self.cloud.backups_by_volume[volume_id].values() if b.status == 'available'),
+                key=lambda b: b.created_at,
+                default=None
+            )
+            if incremental and parent is None:
+                raise exceptions.BadRequestException("没有可用的全量备份，无法创建增量备份")
+            if incremental and not parent.has_dependent_backups:
+                parent.has_dependent_backups = True
+                parent.updated_at = _timestamp(datetime.now())
+            backup = self.cloud._make_backup(volume_id, volume.name, incremental, datetime.now(),
+                                             status='creating', name=name)
+            if description:
+                backup.description = description
+        # 与Cinder一致：创建接口返回 creating，之后变为 available
+        return self.cloud.transition(backup, 'available')
+
+    def delete_backup(self, backup, ignore_missing=True, force=False):
+        self.cloud.call('delete_backup')
+        backup_id = getattr(backup, 'id', backup)
+        with self.cloud.lock:
+            target = self.cloud.backups.get(backup_id)
+            if target is None:
+                if ignore_missing:
+                    return None
+                raise exceptions.ResourceNotFound(f"备份 {backup_id} 不存在")
+            if target.has_dependent_backups and not force:
+                raise exceptions.BadRequestException(f"备份 {backup_id} 存在依赖的增量备份")
+            target.status = 'deleting'
+            target.updated_at = _timestamp(datetime.now())
+
+        def finish():
+            with self.cloud.lock:
+                removed = self.cloud.backups.pop(backup_id, None)
+                if removed:
+                    self.cloud.backups_by_volume[removed.volume_id].pop(backup_id, None)
+                    self._refresh_dependents(removed.volume_id)
+
+        self.cloud.later(self.cloud.delete_delay, finish)
+        return None
+
+    def _refresh_dependents(self, volume_id):
+        """删除增量备份后重新计算依赖标记"""
+        chain = sorted(self.cloud.backups_by_volume[volume_id].values(), key=lambda b: b.created_at)
+        for current, following in zip(chain, chain[1:] + [None]):
+            dependent = bool(following and following.is_incremental)
+            if current.has_dependent_backups != dependent:
+                current.has_dependent_backups = dependent
+                current.updated_at = _timestamp(datetime.now())
+
+    def restore_backup(self, backup, volume_id=None, name=None):
+        self.cloud.call('restore_backup')
+        backup = self.get_backup(getattr(backup, 'id', backup))
+        with self.cloud.lock:
+            if volume_id:
+                target = self.cloud.volumes.get(volume_id)
+                if target is None:
+                    raise exceptions.ResourceNotFound(f"云硬盘 {volume_id} 不存在")
+                return target
+            volume_id = self.cloud._new_id()
+            now = datetime.now()
+            volume = FakeResource(
+                id=volume_id, name=name, size=backup.size, status='restoring-backup',
+                created_at=_timestamp(now), updated_at=_timestamp(now), description='',
+                volume_type='standard', availability_zone='nova', bootable=False, encrypted=False
+            )
+            self.cloud.volumes[volume_id] = volume
+        return self.cloud.transition(volume, 'available')
+
+    def get_backup_export_record(self, backup):
+        backup = self.get_backup(getattr(backup, 'id', backup))
+        return FakeResource(backup_service='cinder.backup.drivers.fake', backup_url=f"fake://{backup.id}")
+
+    def import_backup(self, backup_service, backup_url, name=None):
+        self.cloud.call('import_backup')
+        with self.cloud.lock:
+            volume_id = next(iter(self.cloud.volumes), None)
+            if volume_id is None:
+                raise exceptions.BadRequestException("没有云硬盘，无法导入备份")
+            return self.cloud._make_backup(volume_id, 'imported', False, datetime.now(), name=name)
+
+    def snapshots(self, details=True, **query):
+        # 与openstacksdk一致：云硬盘快照查询不支持排序参数，传入时被丢弃，按默认顺序返回
+        query = {key: value for key, value in query.items() if key not in ('sort_key', 'sort_dir')}
+        return self.cloud.paginate('volume_snapshots', self.cloud.volume_snapshots, query)
+
+    def create_snapshot(self, volume_id, name=None, description=None, force=False):
+        self.cloud.call('create_snapshot')
+        with self.cloud.lock:
+            volume = self.cloud.volumes.get(volume_id)
+            if volume is None:
+                raise exceptions.ResourceNotFound(f"云硬盘 {volume_id} 不存在")
+            snapshot_id = self.cloud._new_id()
+            now = _timestamp(datetime.now())
+            snapshot = FakeResource(
+                id=snapshot_id, name=name, volume_id=volume_id, status='creating',
+                created_at=now, updated_at=now, metadata={}, description=description or '',
+                size=volume.size, force=force, progress='0%', user_id='fake-user', project_id='fake-project'
+            )
+            self.cloud.volume_snapshots[snapshot_id] = snapshot
+        return self.cloud.transition(snapshot, 'available', progress='100%')
+
+    def delete_snapshot(self, snapshot, ignore_missing=True, force=False):
+        self.cloud.call('delete_snapshot')
+        snapshot_id = getattr(snapshot, 'id', snapshot)
+        with self.cloud.lock:
+            target = self.cloud.volume_snapshots.get(snapshot_id)
+            if target is None:
+                if ignore_missing:
+                    return None
+                raise exceptions.ResourceNotFound(f"快照 {snapshot_id} 不存在")
+            target.status = 'deleting'
+            target.updated_at = _timestamp(datetime.now())
+
+        def finish():
+            with self.cloud.lock:
+                self.cloud.volume_snapshots.pop(snapshot_id, None)
+
+        self.cloud.later(self.cloud.delete_delay, finish)
+        return None
+
+class FakeCompute:
+    """模拟Nova计算服务"""
+
+    def __init__(self, cloud):
+        self.cloud = cloud
+
+    def servers(self, details=True, **query):
+        return self.cloud.paginate('servers', self.cloud.servers, query)
+
+    def snapshots(self, details=True, **query):
+        return self.cloud.paginate('server_snapshots', self.cloud.server_snapshots, query)
+
+    def create_server_snapshot(self, server, name=None, description=None):
+        self.cloud.call('create_server_snapshot')
+        server_id = getattr(server, 'id', server)
+        with self.cloud.lock:
+            if server_id not in self.cloud.servers:
+                raise exceptions.ResourceNotFound(f"云主机 {server_id} 不存在")
+            snapshot_id = self.cloud._new_id()
+            now = _timestamp(datetime.now())
+            snapshot = FakeResource(
+                id=snapshot_id, name=name, server_id=server_id, status='SAVING',
+                created_at=now, updated_at=now, metadata={}, description=description or '',
+                size=0, min_disk=20, min_ram=0, progress=0, block_device_mapping=[]
+            )
+            self.cloud.server_snapshots[snapshot_id] = snapshot
+        # 与Nova镜像状态一致：SAVING 完成后变为 ACTIVE
+        return self.cloud.transition(snapshot, 'ACTIVE', progress=100, size=1073741824)
+
+    def delete_server_snapshot(self, snapshot, ignore_missing=True):
+        self.cloud.call('delete_server_snapshot')
+        snapshot_id = getattr(snapshot, 'id', snapshot)
+        with self.cloud.lock:
+            if self.cloud.server_snapshots.pop(snapshot_id, None) is None and not ignore_missing:
+                raise exceptions.ResourceNotFound(f"云主机快照 {snapshot_id} 不存在")
+        return None
+
+class FakeConnection:
+    """模拟 openstack.connection.Connection"""
+
+    def __init__(self, **options):
+        self.cloud = FakeCloud(**options)
+        self.block_storage = FakeBlockStorage(self.cloud)
+        self.compute = FakeCompute(self.cloud)
+
+    @classmethod
+    def from_config(cls):
+        """按配置中的 FAKE_OPENSTACK_* 参数创建"""
+        return cls(
+            volumes=Config.FAKE_OPENSTACK_VOLUMES,
+            backups_per_volume=Config.FAKE_OPENSTACK_BACKUPS_PER_VOLUME,
+            servers=Config.FAKE_OPENSTACK_SERVERS,
+            latency=Config.FAKE_OPENSTACK_LATENCY,
+            page_latency=Config.FAKE_OPENSTACK_PAGE_LATENCY,
+            error_rate=Config.FAKE_OPENSTACK_ERROR_RATE,
+            page_size=Config.FAKE_OPENSTACK_PAGE_SIZE,
+            create_delay=Config.FAKE_OPENSTACK_CREATE_DELAY,
+            delete_delay=Config.FAKE_OPENSTACK_DELETE_DELAY,
+            seed=Config.FAKE_OPENSTACK_SEED
+        )
+
+    def authorize(self):
+        self.cloud.call('authorize')
+        return 'fake-token'
+
+    def stats(self):
+        return self.cloud.stats()
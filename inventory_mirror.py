@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源清单本地镜像
+后台线程在进程内维护云硬盘、备份、云硬盘快照、云主机和云主机快照的镜像：
+按 INVENTORY_MIRROR_DELTA_INTERVAL 只读取有变化的资源（changes-since / updated_at），
+按 INVENTORY_MIRROR_FULL_INTERVAL 全量核对一次；读请求直接由镜像返回，
+上游请求量与变化量成正比，而不是与资源总量成正比
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+import openstack
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 资源类型 -> 建立二级索引的字段（状态和备份类型索引同时用于系统信息统计）
+MIRROR_INDEXES = {
+    "volumes": ("status",),
+    "backups": ("volume_id", "status", "backup_type"),
+    "volume_snapshots": ("volume_id", "status"),
+    "servers": ("status",),
+    "server_snapshots": ("server_id", "status")
+}
+
+# 增量结果中表示资源已删除的状态（Nova changes-since 会返回已删除的云主机）
+REMOVED_STATUSES = ('DELETED', 'deleted')
+
+# 删除中的Cinder资源删除完成后不再出现在增量结果中，需要单独确认；
+# 其他客户端直接删除的资源同样不会出现在增量结果中，每次增量同步后比较Cinder返回的总数
+DELETING_STATUS = 'deleting'
+DELETING_CHECK_RESOURCES = ('volumes', 'backups', 'volume_snapshots')
+
+def inventory_digest(items):
+    """资源列表的内容版本（按ID排序后的SHA1摘要），镜像和缓存使用同一算法，内容相同则版本相同"""
+    ordered = sorted(items, key=lambda item: str(item.get("id")))
+    return hashlib.sha1(
+        json.dumps(ordered, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    ).hexdigest()
+
+class MirrorStore:
+    """单类资源的镜像 - 按ID存储，维护二级索引、内容版本和按创建时间排序的列表"""
+
+    def __init__(self, index_fields=()):
+        self.items = {}
+        self.indexes = {field: defaultdict(set) for field in index_fields}
+        self.generation = 0
+        self.synced_at = None  # 最近一次成功同步的时间（monotonic）
+        self.full_synced_at = None
+        self.watermark = None  # 下次增量同步的起始时间（UTC ISO格式）
+        self.delta_supported = True
+        self.count_supported = True
+        self._sorted = None
+        self._digest = None
+
+    def replace(self, items):
+        """全量替换，返回是否有变化"""
+        current = {item["id"]: item for item in items}
+        if current == self.items:
+            return False
+        self.items = current
+        for field, index in self.indexes.items():
+            index.clear()
+            for item in current.values():
+                index[item.get(field)].add(item["id"])
+        self._changed()
+        return True
+
+    def upsert(self, item):
+        """新增或更新一个条目，返回是否有变化"""
+        previous = self.items.get(item["id"])
+        if previous == item:
+            return False
+        if previous:
+            self._unindex(previous)
+        self.items[item["id"]] = item
+        for field, index in self.indexes.items():
+            index[item.get(field)].add(item["id"])
+        self._changed()
+        return True
+
+    def remove(self, item_id):
+        """删除一个条目，返回是否有变化"""
+        previous = self.items.pop(item_id, None)
+        if previous is None:
+            return False
+        self._unindex(previous)
+        self._changed()
+        return True
+
+    def sorted_items(self):
+        """按创建时间倒序的条目列表（与Cinder/Nova默认顺序一致），内容变化后首次读取时重新排序"""
+        if self._sorted is None:
+            self._sorted = sorted(
+                self.items.values(),
+                key=lambda item: (item.get("created_at") or "", item["id"]),
+                reverse=True
+            )
+        return self._sorted
+
+    def digest(self):
+        """镜像内容版本，内容变化后首次读取时重新计算"""
+        if self._digest is None:
+            self._digest = inventory_digest(self.items.values())
+        return self._digest
+
+    def _unindex(self, item):
+        for field, index in self.indexes.items():
+            ids = index.get(item.get(field))
+            if ids:
+                ids.discard(item["id"])
+                if not ids:
+                    del index[item.get(field)]
+
+    def _changed(self):
+        self.generation += 1
+        self._sorted = None
+        self._digest = None
+
+class InventoryMirror:
+    """资源清单镜像 - 单个后台线程增量同步，定期全量核对"""
+
+    def __init__(self, client, resources=None, delta_interval=None, full_interval=None, overlap=None, max_age=None):
+        """client 为 OpenStackClient，提供 _inventory_loaders、iter_changes、list_ids_by_status、count_resources 和 list_ids"""
+        self.client = client
+        self.delta_interval = Config.INVENTORY_MIRROR_DELTA_INTERVAL if delta_interval is None else delta_interval
+        self.full_interval = Config.INVENTORY_MIRROR_FULL_INTERVAL if full_interval is None else full_interval
+        self.overlap = Config.INVENTORY_MIRROR_OVERLAP if overlap is None else overlap
+        self.max_age = Config.INVENTORY_MIRROR_MAX_AGE if max_age is None else max_age
+        self.stores = {resource: MirrorStore(MIRROR_INDEXES[resource]) for resource in (resources or MIRROR_INDEXES)}
+        self._stats = defaultdict(lambda: {"full_syncs": 0, "delta_syncs": 0, "changes": 0, "errors": 0})
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台同步线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='inventory-mirror', daemon=True)
+            self._thread.start()
+            logger.info(f"资源清单镜像已启动: 增量同步间隔 {self.delta_interval} 秒，全量核对间隔 {self.full_interval} 秒")
+
+    def stop(self):
+        """停止后台同步线程"""
+        self._stop_event.set()
+        self._wakeup.set()
+
+    def request_sync(self):
+        """本地修改资源后立即触发一次增量同步"""
+        self._wakeup.set()
+
+    def discard(self, resource, item_id):
+        """本地删除资源成功后直接从镜像移除，不等待增量同步确认"""
+        store = self.stores.get(resource)
+        if store is None:
+            return
+        with self._lock:
+            if store.remove(item_id):
+                self._stats[resource]["changes"] += 1
+
+    def is_warm(self, resource):
+        """镜像已完成全量加载且最近同步未超过 INVENTORY_MIRROR_MAX_AGE"""
+        store = self.stores.get(resource)
+        with self._lock:
+            return bool(store and store.synced_at is not None
+                        and time.monotonic() - store.synced_at <= self.max_age)
+
+    def items(self, resource):
+        """镜像中的资源列表，镜像未就绪时返回None"""
+        if not self.is_warm(resource):
+            return None
+        with self._lock:
+            return list(self.stores[resource].sorted_items())
+
+    def find(self, resource, field, value):
+        """按二级索引查找资源，镜像未就绪或字段未建立索引时返回None"""
+        if not self.is_warm(resource) or field not in self.stores[resource].indexes:
+            return None
+        with self._lock:
+            store = self.stores[resource]
+            return [store.items[item_id] for item_id in store.indexes[field].get(value, ())]
+
+    def counts(self, resource, fields):
+        """按二级索引统计数量，返回 (总数, {字段: {取值: 数量}})；镜像未就绪或字段未建立索引时返回None"""
+        if not self.is_warm(resource) or any(field not in self.stores[resource].indexes for field in fields):
+            return None
+        with self._lock:
+            store = self.stores[resource]
+            histograms = {
+                field: {("unknown" if value is None else str(value)): len(ids)
+                        for value, ids in store.indexes[field].items()}
+                for field in fields
+            }
+            return len(store.items), histograms
+
+    def version(self, resource):
+        """镜像内容版本（与缓存相同的内容摘要，镜像和缓存之间切换时ETag不变）；镜像未就绪时返回None"""
+        if not self.is_warm(resource):
+            return None
+        with self._lock:
+            return self.stores[resource].digest()
+
+    def sync(self, resource, full=False):
+        """同步一类资源：尚未加载或全量核对到期时全量读取，否则只读取变化的资源；不支持增量查询时只做全量核对"""
+        store = self.stores[resource]
+        now = time.monotonic()
+        with self._lock:
+            # 不支持增量查询或数量查询（无法发现其他客户端的删除）时缩短全量核对间隔，保证镜像不超过 INVENTORY_MIRROR_MAX_AGE
+            reliable = store.delta_supported and store.count_supported
+            interval = self.full_interval if reliable else min(self.full_interval, self.max_age / 2)
+            full = full or store.full_synced_at is None or now - store.full_synced_at >= interval
+            since = store.watermark
+            if not full and not store.delta_supported:
+                return
+
+        # 本次同步开始时间减去重叠时间作为下次的起点，容忍时钟偏差和同步期间的修改
+        started_at = datetime.now(timezone.utc) - timedelta(seconds=self.overlap)
+        watermark = started_at.strftime('%Y-%m-%dT%H:%M:%S')
+        try:
+            if full:
+                changed = self._full_sync(resource)
+            else:
+                changed = self._delta_sync(resource, since)
+        except Exception as e:
+            with self._lock:
+                self._stats[resource]["errors"] += 1
+            logger.error(f"同步资源清单镜像 {resource} 失败: {e}")
+            return
+
+        with self._lock:
+            store.synced_at = now
+            store.watermark = watermark
+            if full:
+                store.full_synced_at = now
+            stats = self._stats[resource]
+            stats["full_syncs" if full else "delta_syncs"] += 1
+            stats["changes"] += changed
+        if changed:
+            logger.info(f"资源清单镜像 {resource} 同步完成，{changed} 项变化（{'全量' if full else '增量'}）")
+
+    def _full_sync(self, resource):
+        items = self.client._inventory_loaders()[resource]()
+        with self._lock:
+            store = self.stores[resource]
+            before = store.items
+            if not store.replace(items):
+                return 0
+            after = store.items
+        return sum(1 for item_id, item in after.items() if before.get(item_id) != item) + \
+            sum(1 for item_id in before if item_id not in after)
+
+    def _delta_sync(self, resource, since):
+        try:
+            changes = list(self.client.iter_changes(resource, since))
+        except (openstack.exceptions.BadRequestException, openstack.exceptions.InvalidResourceQuery) as e:
+            # 云平台不支持该过滤条件，之后只做全量核对
+            with self._lock:
+                self.stores[resource].delta_supported = False
+            logger.warning(f"{resource} 不支持增量查询，改为定期全量核对: {e}")
+            return 0
+
+        changed = 0
+        with self._lock:
+            store = self.stores[resource]
+            for item in changes:
+                if item.get("status") in REMOVED_STATUSES:
+                    changed += store.remove(item["id"])
+                elif item.get("status") == DELETING_STATUS and item["id"] not in store.items:
+                    # 已由本地删除移出镜像，或首次出现就已在删除中，不再加入
+                    continue
+                else:
+                    changed += store.upsert(item)
+            deleting = set(store.indexes["status"].get(DELETING_STATUS, ())) if "status" in store.indexes else set()
+
+        if resource not in DELETING_CHECK_RESOURCES:
+            return changed
+
+        if deleting:
+            # 删除完成的资源不会出现在增量结果中：仍处于删除中的以外均已删除
+            still_deleting = self.client.list_ids_by_status(resource, DELETING_STATUS)
+            with self._lock:
+                store = self.stores[resource]
+                for item_id in deleting - still_deleting:
+                    if store.items.get(item_id, {}).get("status") == DELETING_STATUS:
+                        changed += store.remove(item_id)
+        return changed + self._remove_missing(resource)
+
+    def _remove_missing(self, resource):
+        """一次数量查询与镜像比较，数量不一致时读取ID列表，移除其他客户端已删除的资源"""
+        store = self.stores[resource]
+        if not store.count_supported:
+            return 0
+        try:
+            upstream = self.client.count_resources(resource)
+        except ValueError as e:
+            with self._lock:
+                store.count_supported = False
+            logger.warning(f"{resource} 不支持数量查询，改为缩短全量核对间隔: {e}")
+            return 0
+        except Exception as e:
+            # 数量查询临时失败不影响本次增量结果，下次同步再比较
+            logger.warning(f"查询 {resource} 数量失败，跳过删除检查: {e}")
+            return 0
+
+        with self._lock:
+            if upstream == len(store.items):
+                return 0
+        ids = self.client.list_ids(resource)
+        removed = 0
+        with self._lock:
+            for item_id in [item_id for item_id in store.items if item_id not in ids]:
+                removed += store.remove(item_id)
+        return removed
+
+    def stats(self):
+        """各类资源的镜像数量、版本、同步次数和距上次同步的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "delta_interval": self.delta_interval,
+                "full_interval": self.full_interval,
+                "resources": {
+                    resource: dict(
+                        self._stats[resource],
+                        items=len(store.items),
+                        generation=store.generation,
+                        delta_supported=store.delta_supported,
+                        count_supported=store.count_supported,
+                        warm=store.synced_at is not None and now - store.synced_at <= self.max_age,
+                        seconds_since_sync=round(now - store.synced_at, 1) if store.synced_at is not None else None
+                    )
+                    for resource, store in self.stores.items()
+                }
+            }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            for resource in self.stores:
+                if self._stop_event.is_set():
+                    break
+                self.sync(resource)
+            self._wakeup.wait(self.delta_interval)
+            self._wakeup.clear()
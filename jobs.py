@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务队列
+批量备份、清理、快照创建和备份恢复等耗时操作在后台线程池中执行，
+接口立即返回任务ID，通过 /api/jobs/<job_id> 查询进度
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+class JobProgress:
+    """任务进度上报 - 由任务处理函数调用"""
+
+    def __init__(self, manager, job_id):
+        self._manager = manager
+        self._job_id = job_id
+
+    def set_total(self, total):
+        """设置任务包含的条目总数"""
+        self._manager._update(self._job_id, total=total, results=[None] * total)
+
+    def report(self, index, item, result):
+        """上报单个条目的执行结果"""
+        self._manager._report(self._job_id, index, item, result)
+
+class JobManager:
+    """后台任务管理器 - 线程池执行任务，任务状态持久化到MySQL"""
+
+    def __init__(self, db_manager=None, max_workers=None):
+        self.db_manager = db_manager
+        self.handlers = {}
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._last_persist = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.JOB_WORKERS,
+            thread_name_prefix='job-worker'
+        )
+
+    def register(self, job_type, handler):
+        """注册任务处理函数
+
+        handler(params, progress) 返回任务汇总字典，抛出异常时任务标记为失败
+        """
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type, params):
+        """提交任务，立即返回任务信息"""
+        if job_type not in self.handlers:
+            raise ValueError(f"未知的任务类型: {job_type}")
+
+        job = {
+            'id': f"job_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            'job_type': job_type,
+            'status': JOB_QUEUED,
+            'params': params,
+            'total': 0,
+            'done': 0,
+            'failed': 0,
+            'results': [],
+            'summary': None,
+            'error': None,
+            'created_at': datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None
+        }
+        with self._lock:
+            self.jobs[job['id']] = job
+        self._persist(job['id'], force=True)
+
+        self._executor.submit(self._run, job['id'])
+        logger.info(f"后台任务已提交: {job['id']} ({job_type})")
+        return self.get_job(job['id'])
+
+    def get_job(self, job_id):
+        """获取任务状态，内存中不存在时从数据库读取"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                return dict(job, results=list(job['results']))
+
+        if self.db_manager:
+            return self.db_manager.get_job(job_id)
+        return None
+
+    def list_jobs(self, limit=50):
+        """列出最近的任务（不含逐条结果）"""
+        if self.db_manager:
+            jobs = self.db_manager.load_jobs(limit=limit)
+        else:
+            with self._lock:
+                jobs = sorted(self.jobs.values(), key=lambda j: j['created_at'], reverse=True)[:limit]
+
+        # 内存中的运行中任务进度比数据库更新
+        with self._lock:
+            jobs = [self.jobs.get(job['id'], job) for job in jobs]
+            return [{k: v for k, v in job.items() if k != 'results'} for job in jobs]
+
+    def recover(self):
+        """服务启动时恢复任务：排队中的任务重新入队，运行中的任务标记为中断"""
+        if not self.db_manager:
+            return
+
+        for job in self.db_manager.load_jobs(statuses=[JOB_QUEUED, JOB_RUNNING], limit=1000):
+            if job['job_type'] not in self.handlers:
+                continue
+
+            with self._lock:
+                self.jobs[job['id']] = job
+
+            if job['status'] == JOB_QUEUED:
+                self._executor.submit(self._run, job['id'])
+                logger.info(f"恢复排队中的后台任务: {job['id']}")
+            else:
+                # 运行中的任务可能已部分执行，重新执行会产生重复操作
+                self._update(job['id'], status=JOB_FAILED, error='服务重启，任务中断',
+                             finished_at=datetime.now().isoformat())
+                self._persist(job['id'], force=True)
+                logger.warning(f"后台任务 {job['id']} 因服务重启中断")
+
+    def _run(self, job_id):
+        """在工作线程中执行任务"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            job_type, params = job['job_type'], job['params']
+
+        self._update(job_id, status=JOB_RUNNING, started_at=datetime.now().isoformat())
+        self._persist(job_id, force=True)
+
+        try:
+            summary = self.handlers[job_type](params, JobProgress(self, job_id))
+            self._update(job_id, status=JOB_COMPLETED, summary=summary,
+                         finished_at=datetime.now().isoformat())
+            logger.info(f"后台任务完成: {job_id}")
+        except Exception as e:
+            self._update(job_id, status=JOB_FAILED, error=str(e),
+                         finished_at=datetime.now().isoformat())
+            logger.error(f"后台任务失败: {job_id} - {e}")
+
+        self._persist(job_id, force=True)
+        self._prune()
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _report(self, job_id, index, item, result):
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            if index >= len(job['results']):
+                job['results'].extend([None] * (index + 1 - len(job['results'])))
+                job['total'] = max(job['total'], len(job['results']))
+            job['results'][index] = dict(result, item=item)
+            job['done'] += 1
+            if not result.get('success'):
+                job['failed'] += 1
+        self._persist(job_id)
+
+    def _persist(self, job_id, force=False):
+        """持久化任务状态，进度更新按JOB_PERSIST_INTERVAL节流"""
+        if not self.db_manager:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            if not force and now - self._last_persist.get(job_id, 0) < Config.JOB_PERSIST_INTERVAL:
+                return
+            self._last_persist[job_id] = now
+            snapshot = dict(job, results=list(job['results']))
+
+        self.db_manager.save_job(snapshot)
+
+    def _prune(self):
+        """内存中只保留最近的已结束任务，更早的任务从数据库读取"""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job['status'] in (JOB_COMPLETED, JOB_FAILED)]
+            if len(finished) <= Config.JOB_MEMORY_LIMIT:
+                return
+            finished.sort(key=lambda j: j['finished_at'] or '')
+            for job in finished[:len(finished) - Config.JOB_MEMORY_LIMIT]:
+                self.jobs.pop(job['id'], None)
+                self._last_persist.pop(job['id'], None)
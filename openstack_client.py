@@ -1,21 +1,351 @@
 import openstack
 from openstack import connection
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from urllib.parse import urlencode
+import heapq
 import logging
+import threading
+import time
 from config import Config
+from retention import plan_chain_deletions, evaluate_retention
+from inventory_mirror import InventoryMirror, inventory_digest
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 系统信息统计布局: 资源类型 -> (需要统计分布的字段, {统计项: (字段, 取值)})
+INVENTORY_STATS_LAYOUT = {
+    "volumes": (("status",), {
+        "available": ("status", "available"),
+        "in_use": ("status", "in-use"),
+        "error": ("status", "error"),
+        "creating": ("status", "creating"),
+        "deleting": ("status", "deleting")
+    }),
+    "backups": (("status", "backup_type"), {
+        "full": ("backup_type", "full"),
+        "incremental": ("backup_type", "incremental"),
+        "available": ("status", "available"),
+        "creating": ("status", "creating"),
+        "error": ("status", "error")
+    }),
+    "servers": (("status",), {
+        "active": ("status", "ACTIVE"),
+        "shutoff": ("status", "SHUTOFF"),
+        "error": ("status", "ERROR"),
+        "building": ("status", "BUILD"),
+        "deleted": ("status", "DELETED")
+    }),
+    "server_snapshots": (("status",), {
+        "active": ("status", "ACTIVE"),
+        "creating": ("status", "BUILDING"),
+        "error": ("status", "ERROR")
+    }),
+    "volume_snapshots": (("status",), {
+        "available": ("status", "available"),
+        "creating": ("status", "creating"),
+        "error": ("status", "error")
+    })
+}
+
+def count_by_fields(items, fields=("status",)):
+    """单次遍历统计资源清单，返回 (总数, {字段: {取值: 数量}})"""
+    counters = [(field, Counter()) for field in fields]
+    total = 0
+    for item in items:
+        total += 1
+        for field, counter in counters:
+            counter[item.get(field)] += 1
+    # 统一转为字符串键，缺失字段记为unknown
+    histograms = {
+        field: {("unknown" if value is None else str(value)): count for value, count in counter.items()}
+        for field, counter in counters
+    }
+    return total, histograms
+
+def summarize_inventory(resource, items):
+    """按INVENTORY_STATS_LAYOUT生成资源统计，返回 (统计字典, 分布直方图)"""
+    fields, _ = INVENTORY_STATS_LAYOUT[resource]
+    total, histograms = count_by_fields(items, fields)
+    return stats_from_histograms(resource, total, histograms), histograms
+
+def stats_from_histograms(resource, total, histograms):
+    """按INVENTORY_STATS_LAYOUT从分布直方图取出各统计项，直方图中没有的字段记为None（未知）"""
+    _, layout = INVENTORY_STATS_LAYOUT[resource]
+    stats = {"total": total}
+    for key, (field, value) in layout.items():
+        stats[key] = histograms[field].get(value, 0) if field in histograms else None
+    return stats
+
+# Cinder 3.45 起列表接口支持 with_count 返回符合条件的资源总数
+CINDER_COUNT_MICROVERSION = "3.45"
+CINDER_COUNT_PATHS = {
+    "volumes": "/volumes",
+    "backups": "/backups",
+    "volume_snapshots": "/snapshots"
+}
+
+def run_parallel(func, items, max_workers, on_result=None):
+    """在有界线程池中对每个元素执行func，按输入顺序返回结果
+    
+    单个元素抛出异常时返回 {"success": False, "error": ...}，不影响其他元素；
+    on_result(索引, 元素, 结果) 在每个元素完成时回调，可用于上报进度
+    """
+    items = list(items)
+    if not items:
+        return []
+    
+    def call(index, item):
+        try:
+            result = func(item)
+        except Exception as e:
+            logger.error(f"并发任务 {item} 执行异常: {e}")
+            result = {"success": False, "error": str(e)}
+        if on_result:
+            on_result(index, item, result)
+        return result
+    
+    max_workers = max(1, min(int(max_workers or 1), len(items)))
+    if max_workers == 1:
+        return [call(index, item) for index, item in enumerate(items)]
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(call, range(len(items)), items))
+
+def estimate_deletion_seconds(lane_lengths, delete_latency, wait_latency, workers, rate_limit):
+    """估算删除耗时 - 按最长队列优先分配到各工作线程，并考虑限流下限"""
+    workers = max(1, int(workers or 1))
+    loads = [0.0] * min(workers, max(1, len(lane_lengths)))
+    for length in sorted(lane_lengths, reverse=True):
+        # 队列内每次删除后需等待删除完成才能删除父备份
+        cost = length * delete_latency + (length - 1) * wait_latency
+        heapq.heapreplace(loads, loads[0] + cost)
+    makespan = max(loads) if lane_lengths else 0.0
+    total = sum(lane_lengths)
+    rate_bound = total / rate_limit if rate_limit and rate_limit > 0 else 0.0
+    return round(max(makespan, rate_bound), 1)
+
+class RateLimiter:
+    """令牌桶限流器 - 限制每秒调用次数，rate<=0 表示不限流"""
+    
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate or 0)
+        self.capacity = max(1.0, float(burst or self.rate or 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """获取一个令牌，令牌不足时阻塞等待"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+# 备份列表支持的排序字段
+BACKUP_SORT_KEYS = ("created_at", "name", "status", "size", "volume_id")
+
+# 每种操作保留的耗时样本数，以及未保存样本达到多少个时批量写入存储
+LATENCY_SAMPLES = 200
+LATENCY_FLUSH_SIZE = 50
+
+class InventoryCache:
+    """资源清单缓存 - 按资源类型缓存列表结果，支持TTL、容量限制、主动失效和命中统计"""
+    
+    def __init__(self, ttl=None, max_entries=None, max_items=None):
+        self.ttl = Config.INVENTORY_CACHE_TTL if ttl is None else ttl
+        self.max_entries = Config.INVENTORY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_items = Config.INVENTORY_CACHE_MAX_ITEMS if max_items is None else max_items
+        self._entries = OrderedDict()  # (resource, key) -> [过期时间, 资源列表, 内容版本, {字段: 索引}]
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        # 失效代数：每次失效递增，加载期间代数变化说明结果可能已过时，不写入缓存
+        self._generations = defaultdict(int)
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0})
+    
+    def get_or_load(self, resource, loader, key=None):
+        """从缓存读取资源列表，未命中或过期时调用loader加载；同一条目的并发加载只会执行一次"""
+        if self.ttl <= 0:
+            return loader()
+        
+        cache_key = (resource, key)
+        items = self._get(cache_key)
+        if items is not None:
+            return list(items)
+        
+        with self._lock:
+            load_lock = self._load_locks.setdefault(cache_key, threading.Lock())
+        
+        with load_lock:
+            # 等待锁期间其他线程可能已完成加载
+            items = self._get(cache_key, count=False)
+            if items is not None:
+                return list(items)
+            
+            generation = self._generation(resource)
+            items = loader()
+            self._put(cache_key, items, generation)
+            return list(items)
+    
+    def peek(self, resource, key=None):
+        """读取未过期的缓存条目，不触发加载，未缓存时返回None"""
+        if self.ttl <= 0:
+            return None
+        items = self._get((resource, key), count=False)
+        return list(items) if items is not None else None
+    
+    def version(self, resource, key=None):
+        """未过期缓存条目的内容版本（inventory_digest 摘要），未缓存时返回None
+        
+        摘要在条目加载后首次读取时计算并随条目保存，重新加载的内容不变时版本也不变
+        """
+        if self.ttl <= 0:
+            return None
+        cache_key = (resource, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if not entry or entry[0] <= time.monotonic():
+                return None
+            if entry[2] is not None:
+                return entry[2]
+            items = entry[1]
+        
+        digest = inventory_digest(items)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[1] is items:
+                entry[2] = digest
+        return digest
+    
+    def lookup(self, resource, field, value, key=None):
+        """按字段值查找未过期缓存条目中的资源，按创建时间倒序；未缓存时返回None
+        
+        索引在条目加载后首次查找时一次遍历构建并随条目保存，之后每次查找只与匹配的数量有关
+        """
+        if self.ttl <= 0:
+            return None
+        cache_key = (resource, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if not entry or entry[0] <= time.monotonic():
+                return None
+            index = entry[3].get(field)
+            items = entry[1]
+        
+        if index is None:
+            index = defaultdict(list)
+            for item in items:
+                index[item.get(field)].append(item)
+            for group in index.values():
+                group.sort(key=lambda item: item.get("created_at") or "", reverse=True)
+            index = dict(index)
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry and entry[1] is items:
+                    entry[3][field] = index
+        return list(index.get(value, ()))
+    
+    def _get(self, cache_key, count=True):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(cache_key)
+                if count:
+                    self._stats[cache_key[0]]["hits"] += 1
+                return entry[1]
+            if entry:
+                del self._entries[cache_key]
+            if count:
+                self._stats[cache_key[0]]["misses"] += 1
+            return None
+    
+    def _generation(self, resource):
+        with self._lock:
+            return self._generations[None], self._generations[resource]
+    
+    def _put(self, cache_key, items, generation):
+        if len(items) > self.max_items:
+            logger.warning(f"资源清单 {cache_key[0]} 共 {len(items)} 项，超过缓存上限 {self.max_items}，不缓存")
+            return
+        with self._lock:
+            if (self._generations[None], self._generations[cache_key[0]]) != generation:
+                logger.debug(f"资源清单 {cache_key[0]} 加载期间缓存已失效，不缓存本次结果")
+                return
+            self._entries[cache_key] = [time.monotonic() + self.ttl, items, None, {}]
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._stats[evicted_key[0]]["evictions"] += 1
+    
+    def invalidate(self, *resources):
+        """使指定资源类型的缓存失效，不指定时清空全部缓存"""
+        with self._lock:
+            for resource in resources or (None,):
+                self._generations[resource] += 1
+            for cache_key in list(self._entries):
+                if not resources or cache_key[0] in resources:
+                    del self._entries[cache_key]
+                    self._stats[cache_key[0]]["invalidations"] += 1
+    
+    def stats(self):
+        """获取缓存统计信息"""
+        with self._lock:
+            entries = defaultdict(int)
+            for resource, _ in self._entries:
+                entries[resource] += 1
+            resources = {}
+            for resource, counters in self._stats.items():
+                lookups = counters["hits"] + counters["misses"]
+                resources[resource] = dict(
+                    counters,
+                    entries=entries.get(resource, 0),
+                    hit_rate=round(counters["hits"] / lookups, 4) if lookups else 0.0
+                )
+            return {
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+                "max_items": self.max_items,
+                "entries": len(self._entries),
+                "resources": resources
+            }
+
 class OpenStackClient:
-    def __init__(self):
-        self.conn = None
-        self._connect()
+    def __init__(self, conn=None):
+        """conn 可传入已建立的连接（如 fake_openstack.FakeConnection），未传入时按配置连接OpenStack"""
+        self.conn = conn
+        self.cache = InventoryCache()
+        self.mirror = None
+        # Cinder是否支持with_count，首次查询失败后改为读取完整清单统计
+        self._count_supported = Config.SYSTEM_INFO_COUNT_ONLY
+        # 最近的删除耗时样本（秒），用于估算清理耗时
+        self._latencies = defaultdict(lambda: deque(maxlen=LATENCY_SAMPLES))
+        # 耗时样本的持久化存储（DatabaseManager），设置后样本在进程重启和命令行工具之间共享
+        self.latency_store = None
+        self._latency_lock = threading.Lock()
+        self._loaded_latencies = set()
+        self._unsaved_latencies = []
+        if self.conn is None:
+            self._connect()
     
     def _connect(self):
         """建立OpenStack连接 - 适配OpenStack 28.4.1"""
+        if Config.OPENSTACK_FAKE:
+            from fake_openstack import FakeConnection
+            self.conn = FakeConnection.from_config()
+            logger.warning("使用本地模拟OpenStack连接（OPENSTACK_FAKE）")
+            return
+        
         try:
             auth_args = {
                 "auth_url": Config.OS_AUTH_URL,
@@ -33,74 +363,303 @@ class OpenStackClient:
             logger.error(f"OpenStack连接失败: {e}")
             raise
     
-    def get_volumes(self):
+    def start_mirror(self):
+        """启动资源清单本地镜像，镜像就绪后资源列表直接由镜像返回"""
+        if self.mirror is None:
+            self.mirror = InventoryMirror(self)
+            self.mirror.start()
+        return self.mirror
+    
+    def get_mirror_stats(self):
+        """获取资源清单镜像的同步统计，未启用时返回None"""
+        return self.mirror.stats() if self.mirror else None
+    
+    def _load_inventory(self, resource, loader, use_cache=True):
+        """通过镜像或缓存加载资源清单"""
+        if not use_cache:
+            return loader()
+        if self.mirror:
+            items = self.mirror.items(resource)
+            if items is not None:
+                return items
+        return self.cache.get_or_load(resource, loader)
+    
+    def _peek_inventory(self, resource):
+        """读取已就绪的镜像或未过期的缓存，不触发加载，都没有时返回None"""
+        if self.mirror:
+            items = self.mirror.items(resource)
+            if items is not None:
+                return items
+        return self.cache.peek(resource)
+    
+    def invalidate_cache(self, *resources):
+        """使资源清单缓存失效，启用镜像时立即触发一次增量同步"""
+        self.cache.invalidate(*resources)
+        if self.mirror:
+            self.mirror.request_sync()
+    
+    def check_token(self):
+        """验证Keystone令牌是否有效 - 令牌未过期时直接使用会话中缓存的令牌，不请求资源列表"""
+        return self.conn.authorize()
+    
+    def _record_latency(self, operation, started):
+        """记录一次操作耗时，未保存的样本积累到一定数量时批量写入存储"""
+        seconds = time.monotonic() - started
+        with self._latency_lock:
+            self._latencies[operation].append(seconds)
+            self._unsaved_latencies.append((operation, seconds))
+            full = len(self._unsaved_latencies) >= LATENCY_FLUSH_SIZE
+        if full:
+            self.flush_latencies()
+    
+    def flush_latencies(self):
+        """将未保存的耗时样本批量写入存储，未设置存储时丢弃"""
+        with self._latency_lock:
+            samples, self._unsaved_latencies = self._unsaved_latencies, []
+        if samples and self.latency_store:
+            self.latency_store.save_operation_latencies(samples, keep=LATENCY_SAMPLES)
+    
+    def _latency_samples(self, operation):
+        """最近的操作耗时样本，首次读取时从存储加载历史样本，与本进程记录的样本合并"""
+        with self._latency_lock:
+            load = self.latency_store is not None and operation not in self._loaded_latencies
+            self._loaded_latencies.add(operation)
+        if load:
+            stored = self.latency_store.get_operation_latencies(operation, limit=LATENCY_SAMPLES)
+            with self._latency_lock:
+                # 未保存的样本在存储之外，保留在最近的位置
+                unsaved = [seconds for name, seconds in self._unsaved_latencies if name == operation]
+                self._latencies[operation] = deque(stored + unsaved, maxlen=LATENCY_SAMPLES)
+        with self._latency_lock:
+            return list(self._latencies[operation])
+    
+    def _average_latency(self, operation, default):
+        """最近操作的平均耗时，没有样本时返回默认值"""
+        samples = self._latency_samples(operation)
+        return sum(samples) / len(samples) if samples else default
+    
+    def inventory_version(self, resource):
+        """资源清单的内容版本，用于生成ETag；清单未缓存时返回None"""
+        if self.mirror:
+            version = self.mirror.version(resource)
+            if version is not None:
+                return version
+        return self.cache.version(resource)
+    
+    def get_cache_stats(self):
+        """获取资源清单缓存统计"""
+        return self.cache.stats()
+    
+    def get_volumes(self, use_cache=True):
         """获取所有云硬盘 - 适配OpenStack 28.4.1"""
         try:
-            volumes = []
-            # 使用新的API调用方式
-            for volume in self.conn.block_storage.volumes(details=True):
-                volumes.append({
-                    "id": volume.id,
-                    "name": volume.name,
-                    "size": volume.size,
-                    "status": volume.status,
-                    "created_at": volume.created_at,
-                    "description": getattr(volume, 'description', ''),
-                    "volume_type": getattr(volume, 'volume_type', ''),
-                    "availability_zone": getattr(volume, 'availability_zone', ''),
-                    "bootable": getattr(volume, 'bootable', False),
-                    "encrypted": getattr(volume, 'encrypted', False)
-                })
-            return volumes
+            return self._load_inventory("volumes", self._list_volumes, use_cache)
         except Exception as e:
             logger.error(f"获取云硬盘列表失败: {e}")
             return []
     
-    def get_backups(self):
+    def _list_volumes(self):
+        """从Cinder分页读取全部云硬盘"""
+        return list(self.iter_volumes())
+    
+    def iter_volumes(self, **query):
+        """逐条读取云硬盘，由SDK按需请求下一页；query 为下推到Cinder的过滤参数"""
+        # 使用新的API调用方式
+        for volume in self.conn.block_storage.volumes(details=True, **query):
+            yield {
+                "id": volume.id,
+                "name": volume.name,
+                "size": volume.size,
+                "status": volume.status,
+                "created_at": volume.created_at,
+                "description": getattr(volume, 'description', ''),
+                "volume_type": getattr(volume, 'volume_type', ''),
+                "availability_zone": getattr(volume, 'availability_zone', ''),
+                "bootable": getattr(volume, 'bootable', False),
+                "encrypted": getattr(volume, 'encrypted', False)
+            }
+    
+    def get_backups(self, use_cache=True):
         """获取所有备份 - 适配OpenStack 28.4.1，根据描述判断备份类型"""
         try:
-            backups = []
-            # 使用新的API调用方式
-            for backup in self.conn.block_storage.backups(details=True):
-                description = getattr(backup, "description", "")
-                is_incremental = getattr(backup, "is_incremental", False)
-                
-                # 根据描述判断备份类型
-                backup_type = "unknown"
-                if description:
-                    if "Full backup" in description or "full backup" in description.lower():
-                        backup_type = "full"
-                    elif "Incremental backup" in description or "incremental backup" in description.lower():
-                        backup_type = "incremental"
-                    else:
-                        # 如果描述中没有明确标识，则使用API的is_incremental字段
-                        backup_type = "incremental" if is_incremental else "full"
-                else:
-                    # 如果描述为空，则使用API的is_incremental字段
-                    backup_type = "incremental" if is_incremental else "full"
-                
-                backups.append({
-                    "id": backup.id,
-                    "name": backup.name,
-                    "volume_id": backup.volume_id,
-                    "status": backup.status,
-                    "created_at": backup.created_at,
-                    "is_incremental": is_incremental,
-                    "backup_type": backup_type,  # 新增字段：根据描述判断的备份类型
-                    "size": getattr(backup, "size", 0),
-                    "description": description,
-                    "availability_zone": getattr(backup, "availability_zone", ""),
-                    "container": getattr(backup, "container", ""),
-                    "fail_reason": getattr(backup, "fail_reason", ""),
-                    "has_dependent_backups": getattr(backup, "has_dependent_backups", False),
-                    "snapshot_id": getattr(backup, "snapshot_id", None),
-                    "data_timestamp": getattr(backup, "data_timestamp", None)
-                })
-            return backups
+            return self._load_inventory("backups", self._list_backups, use_cache)
         except Exception as e:
             logger.error(f"获取备份列表失败: {e}")
             return []
     
+    def _list_backups(self):
+        """从Cinder分页读取全部备份"""
+        return list(self.iter_backups())
+    
+    def _format_backup(self, backup):
+        """将Cinder备份对象转换为字典"""
+        description = getattr(backup, "description", "")
+        is_incremental = getattr(backup, "is_incremental", False)
+        
+        # 根据描述判断备份类型
+        backup_type = "unknown"
+        if description:
+            if "Full backup" in description or "full backup" in description.lower():
+                backup_type = "full"
+            elif "Incremental backup" in description or "incremental backup" in description.lower():
+                backup_type = "incremental"
+            else:
+                # 如果描述中没有明确标识，则使用API的is_incremental字段
+                backup_type = "incremental" if is_incremental else "full"
+        else:
+            # 如果描述为空，则使用API的is_incremental字段
+            backup_type = "incremental" if is_incremental else "full"
+        
+        return {
+            "id": backup.id,
+            "name": backup.name,
+            "volume_id": backup.volume_id,
+            "status": backup.status,
+            "created_at": backup.created_at,
+            "updated_at": getattr(backup, "updated_at", None),
+            "is_incremental": is_incremental,
+            "backup_type": backup_type,  # 新增字段：根据描述判断的备份类型
+            "size": getattr(backup, "size", 0),
+            "description": description,
+            "availability_zone": getattr(backup, "availability_zone", ""),
+            "container": getattr(backup, "container", ""),
+            "fail_reason": getattr(backup, "fail_reason", ""),
+            "has_dependent_backups": getattr(backup, "has_dependent_backups", False),
+            "snapshot_id": getattr(backup, "snapshot_id", None),
+            "data_timestamp": getattr(backup, "data_timestamp", None)
+        }
+    
+    def iter_backups(self, volume_id=None, status=None, marker=None, sort_key=None, sort_dir=None, page_size=None):
+        """按Cinder原生分页逐条读取备份，过滤条件、marker和排序下推到Cinder，只在需要时请求下一页"""
+        query = {}
+        if sort_key:
+            query["sort_key"] = sort_key
+            query["sort_dir"] = sort_dir or "desc"
+        if volume_id:
+            query["volume_id"] = volume_id
+        if status:
+            query["status"] = status
+        if marker:
+            query["marker"] = marker
+        if page_size:
+            query["limit"] = page_size
+        
+        for backup in self.conn.block_storage.backups(details=True, **query):
+            yield self._format_backup(backup)
+    
+    def get_volume_backups(self, volume_id):
+        """获取单个云硬盘的备份，按创建时间倒序
+        
+        镜像或缓存已就绪时查按volume_id建立的索引，否则volume_id下推到Cinder只读取该云硬盘的备份，
+        耗时只与该云硬盘的备份数量有关
+        """
+        items = self._volume_backup_index(volume_id)
+        if items is not None:
+            return items
+        return list(self.iter_backups(volume_id=volume_id, sort_key="created_at", sort_dir="desc"))
+    
+    def _volume_backup_index(self, volume_id):
+        """从镜像或缓存的volume_id索引读取备份，都未就绪时返回None"""
+        if self.mirror:
+            items = self.mirror.find("backups", "volume_id", volume_id)
+            if items is not None:
+                return sorted(items, key=lambda item: item.get("created_at") or "", reverse=True)
+        return self.cache.lookup("backups", "volume_id", volume_id)
+    
+    def stream_inventory(self, resource, **filters):
+        """逐条返回资源清单：缓存命中时直接使用缓存，否则从SDK生成器边读边返回，不在内存中构建完整列表"""
+        if resource == "backups" and filters.get("volume_id"):
+            cached = self._volume_backup_index(filters["volume_id"])
+        else:
+            cached = self._peek_inventory(resource)
+        if cached is not None:
+            return (item for item in cached if all(item.get(k) == v for k, v in filters.items() if v))
+        if resource == "backups":
+            return self.iter_backups(**filters)
+        iterators = {
+            "volumes": self.iter_volumes,
+            "servers": self.iter_servers,
+            "server_snapshots": self.iter_server_snapshots,
+            "volume_snapshots": self.iter_volume_snapshots
+        }
+        return iterators[resource]()
+    
+    def query_backups(self, limit=100, marker=None, sort_key="created_at", sort_dir="desc", volume_id=None,
+                      status=None, backup_type=None, created_after=None, created_before=None, with_counts=False):
+        """分页、过滤、排序查询备份
+        
+        返回 {"backups": 当前页, "counts": 符合条件的备份数量（with_counts 为True时）, "next_marker": 下一页起始备份ID}。
+        缓存中已有备份清单时在内存中处理；否则 volume_id/status/排序下推到Cinder，
+        不需要数量统计时 marker 也下推，读满一页即停止请求。marker 不存在时抛出ValueError
+        """
+        if sort_key not in BACKUP_SORT_KEYS:
+            raise ValueError(f"不支持的排序字段: {sort_key}")
+        if sort_dir not in ("asc", "desc"):
+            raise ValueError(f"不支持的排序方向: {sort_dir}")
+        
+        cached = self._volume_backup_index(volume_id) if volume_id else self._peek_inventory("backups")
+        if cached is None and with_counts and not (volume_id or status):
+            # 统计数量需要完整清单，加载后供后续翻页复用
+            cached = self.get_backups()
+        
+        marker_pushed = False
+        if cached is not None:
+            items = [
+                b for b in cached
+                if (not volume_id or b.get("volume_id") == volume_id) and (not status or b.get("status") == status)
+            ]
+            empty = 0 if sort_key == "size" else ""
+            items.sort(key=lambda b: b.get(sort_key) or empty, reverse=sort_dir == "desc")
+        else:
+            marker_pushed = not with_counts
+            items = self.iter_backups(
+                volume_id=volume_id,
+                status=status,
+                marker=marker if marker_pushed else None,
+                sort_key=sort_key,
+                sort_dir=sort_dir,
+                page_size=limit + 1 if marker_pushed and limit else None
+            )
+        
+        page = []
+        counts = Counter() if with_counts else None
+        before_marker = bool(marker) and not marker_pushed
+        has_more = False
+        try:
+            for backup in items:
+                created_at = backup.get("created_at") or ""
+                if backup_type and backup.get("backup_type") != backup_type:
+                    continue
+                if (created_after and created_at < created_after) or (created_before and created_at > created_before):
+                    continue
+                
+                if counts is not None:
+                    counts["total"] += 1
+                    counts[backup.get("backup_type", "unknown")] += 1
+                
+                if before_marker:
+                    before_marker = backup["id"] != marker
+                    continue
+                if limit and len(page) >= limit:
+                    has_more = True
+                    if counts is None:
+                        break
+                    continue
+                page.append(backup)
+        except openstack.exceptions.BadRequestException as e:
+            # Cinder对不存在的marker返回400
+            if marker_pushed:
+                raise ValueError(f"marker {marker} 不存在或已删除") from e
+            raise
+        if before_marker:
+            raise ValueError(f"marker {marker} 不存在或已删除")
+        
+        return {
+            "backups": page,
+            "counts": {"total": 0, "full": 0, "incremental": 0, **counts} if counts is not None else None,
+            "next_marker": page[-1]["id"] if has_more and page else None
+        }
+    
     def create_full_backup(self, volume_id, name=None):
         """创建全量备份 - 适配OpenStack 28.4.1"""
         try:
@@ -115,6 +674,7 @@ class OpenStackClient:
                 incremental=False,
                 description=f"Full backup created at {datetime.now().isoformat()}"
             )
+            self.invalidate_cache("backups", "volumes")
             logger.info(f"全量备份创建成功: {backup.id}")
             return {
                 "id": backup.id,
@@ -140,6 +700,7 @@ class OpenStackClient:
                 incremental=True,
                 description=f"Incremental backup created at {datetime.now().isoformat()}"
             )
+            self.invalidate_cache("backups", "volumes")
             logger.info(f"增量备份创建成功: {backup.id}")
             return {
                 "id": backup.id,
@@ -151,45 +712,218 @@ class OpenStackClient:
             logger.error(f"创建增量备份失败: {e}")
             return {"success": False, "error": str(e)}
     
+    def create_backups(self, volume_ids, backup_type="full", name=None, concurrency=None, on_result=None):
+        """批量创建备份 - 通过有界线程池并发提交，结果按volume_ids顺序返回"""
+        concurrency = concurrency or Config.BACKUP_BATCH_CONCURRENCY
+        concurrency = max(1, min(int(concurrency), Config.BACKUP_BATCH_MAX_CONCURRENCY))
+        create = self.create_incremental_backup if backup_type == "incremental" else self.create_full_backup
+        
+        def create_one(volume_id):
+            result = create(volume_id, name)
+            result["volume_id"] = volume_id
+            return result
+        
+        logger.info(f"批量创建{backup_type}备份: {len(volume_ids)} 个云硬盘，并发数 {concurrency}")
+        return run_parallel(create_one, volume_ids, concurrency, on_result)
+    
     def delete_backup(self, backup_id):
         """删除备份 - 适配OpenStack 28.4.1"""
         try:
             # 使用新的删除API
+            started = time.monotonic()
             self.conn.block_storage.delete_backup(backup_id, ignore_missing=True, force=False)
+            self._record_latency("delete_backup", started)
+            self._discard_from_mirror("backups", backup_id)
+            self.invalidate_cache("backups")
             logger.info(f"备份删除成功: {backup_id}")
             return {"success": True}
         except Exception as e:
             logger.error(f"删除备份失败: {e}")
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _backup_age_days(backup, current_time):
+        """计算备份创建至今的天数"""
+        backup_time = datetime.fromisoformat(backup["created_at"].replace('Z', '+00:00'))
+        return (current_time - backup_time).days
+    
+    def _select_expired_backups(self, backups, retention_for):
+        """筛选超过保留天数的备份，retention_for(backup) 返回该备份适用的保留天数"""
+        current_time = datetime.now()
+        expired = []
+        for backup in backups:
+            try:
+                days_old = self._backup_age_days(backup, current_time)
+                if days_old > retention_for(backup):
+                    expired.append(backup)
+            except Exception as e:
+                logger.error(f"处理备份 {backup.get('id')} 时出错: {e}")
+        return expired
+    
+    def _wait_backup_deleted(self, backup_id, timeout=None):
+        """等待备份删除完成，删除出错或超时返回False"""
+        timeout = Config.CLEANUP_DELETE_WAIT_TIMEOUT if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while time.monotonic() < deadline:
+            try:
+                backup = self.conn.block_storage.get_backup(backup_id)
+            except openstack.exceptions.ResourceNotFound:
+                self._record_latency("wait_backup_deleted", started)
+                return True
+            if backup.status == "error_deleting":
+                return False
+            time.sleep(Config.CLEANUP_DELETE_POLL_INTERVAL)
+        return False
+    
+    def _select_policy_deletions(self, all_backups, volume_policies=None, default_policy=None):
+        """按云硬盘策略筛选待删除备份
+        
+        策略为数字时表示保留天数；为字典时按GFS策略保留 full 个全量、incremental 个增量备份，
+        以及 daily/weekly/monthly 周期备份。未配置策略的云硬盘使用 default_policy，默认保留30天
+        """
+        volume_policies = volume_policies or {}
+        fallback = default_policy if default_policy is not None else 30
+        
+        def policy_for(volume_id):
+            return volume_policies.get(volume_id, fallback)
+        
+        age_based = []
+        gfs_based = []
+        for backup in all_backups:
+            (gfs_based if isinstance(policy_for(backup["volume_id"]), dict) else age_based).append(backup)
+        
+        expired = self._select_expired_backups(age_based, lambda backup: int(policy_for(backup["volume_id"])))
+        return expired + evaluate_retention(gfs_based, policy_for)
+    
+    def delete_backups_concurrently(self, backups, all_backups=None, workers=None, rate_limit=None):
+        """按依赖链并发删除备份 - 有界线程池加令牌桶限流，避免压垮cinder-backup
+        
+        每条增量链从叶子开始按顺序删除，并等待子备份删除完成后再删除父备份；
+        不同的链并行删除。仍被保留备份依赖的备份会被跳过，不发起删除请求。
+        返回汇总结果，volume_stats 按云硬盘统计删除成功和失败数量
+        """
+        workers = workers or Config.CLEANUP_WORKERS
+        limiter = RateLimiter(Config.CLEANUP_RATE_LIMIT if rate_limit is None else rate_limit)
+        lanes, blocked = plan_chain_deletions(backups, all_backups if all_backups is not None else backups)
+        
+        def delete_lane(lane):
+            outcomes = []
+            for position, backup in enumerate(lane):
+                limiter.acquire()
+                result = self.delete_backup(backup["id"])
+                outcomes.append((backup, result))
+                if not result.get("success"):
+                    break
+                # 下一个备份是当前备份的父备份，需等待当前备份真正删除
+                if position < len(lane) - 1 and not self._wait_backup_deleted(backup["id"]):
+                    outcomes.append((lane[position + 1], {"success": False, "error": f"等待子备份 {backup['id']} 删除超时"}))
+                    break
+            # 链中剩余的备份因依赖未解除而不再尝试
+            for backup in lane[len(outcomes):]:
+                outcomes.append((backup, {"success": False, "error": "依赖的备份未能删除"}))
+            return outcomes
+        
+        lane_results = run_parallel(delete_lane, lanes, workers)
+        
+        volume_stats = defaultdict(lambda: {"deleted": 0, "failed": 0, "blocked": 0})
+        deleted_details = []
+        failed_details = []
+        for lane, outcomes in zip(lanes, lane_results):
+            if isinstance(outcomes, dict):
+                # 整条链执行异常，链中备份均记为失败
+                outcomes = [(backup, outcomes) for backup in lane]
+            for backup, result in outcomes:
+                volume_id = backup.get("volume_id")
+                detail = {
+                    "id": backup["id"],
+                    "name": backup.get("name"),
+                    "volume_id": volume_id,
+                    "created_at": backup.get("created_at")
+                }
+                if result.get("success"):
+                    volume_stats[volume_id]["deleted"] += 1
+                    deleted_details.append(detail)
+                else:
+                    volume_stats[volume_id]["failed"] += 1
+                    failed_details.append(dict(detail, error=result.get("error")))
+                    logger.error(f"删除过期备份失败: {backup['id']} - {result.get('error')}")
+        
+        blocked_details = []
+        for backup in blocked:
+            volume_stats[backup.get("volume_id")]["blocked"] += 1
+            blocked_details.append({
+                "id": backup["id"],
+                "name": backup.get("name"),
+                "volume_id": backup.get("volume_id"),
+                "created_at": backup.get("created_at")
+            })
+        if blocked:
+            logger.info(f"{len(blocked)} 个过期备份仍被保留的增量备份依赖，本次跳过")
+        self.flush_latencies()
+        
+        return {
+            "deleted_count": len(deleted_details),
+            "failed_count": len(failed_details),
+            "blocked_count": len(blocked_details),
+            "volume_stats": dict(volume_stats),
+            "deleted_details": deleted_details,
+            "failed_details": failed_details,
+            "blocked_details": blocked_details
+        }
+    
+    def plan_backup_cleanup(self, retention_days=30, volume_policies=None, default_policy=None):
+        """清理预演 - 不调用任何删除接口，基于一次缓存的清单计算删除集合和耗时估算"""
+        try:
+            all_backups = self.get_backups()
+            by_policy = bool(volume_policies) or default_policy is not None
+            if by_policy:
+                expired = self._select_policy_deletions(all_backups, volume_policies, default_policy)
+            else:
+                expired = self._select_expired_backups(all_backups, lambda backup: retention_days)
+            lanes, blocked = plan_chain_deletions(expired, all_backups)
+            
+            affected = defaultdict(lambda: {"delete_count": 0, "reclaim_gb": 0, "blocked_count": 0})
+            for lane in lanes:
+                for backup in lane:
+                    affected[backup["volume_id"]]["delete_count"] += 1
+                    affected[backup["volume_id"]]["reclaim_gb"] += backup.get("size") or 0
+            for backup in blocked:
+                affected[backup["volume_id"]]["blocked_count"] += 1
+            
+            delete_latency = self._average_latency("delete_backup", Config.CLEANUP_DEFAULT_DELETE_LATENCY)
+            wait_latency = self._average_latency("wait_backup_deleted", Config.CLEANUP_DEFAULT_WAIT_LATENCY)
+            delete_count = sum(len(lane) for lane in lanes)
+            return {
+                "success": True,
+                "dry_run": True,
+                "total_backups": len(all_backups),
+                "delete_count": delete_count,
+                "blocked_count": len(blocked),
+                "reclaim_gb": sum(stats["reclaim_gb"] for stats in affected.values()),
+                "affected_volume_count": len(affected),
+                "affected_volumes": dict(affected),
+                "estimated_seconds": estimate_deletion_seconds(
+                    [len(lane) for lane in lanes], delete_latency, wait_latency,
+                    Config.CLEANUP_WORKERS, Config.CLEANUP_RATE_LIMIT
+                ),
+                "latency_samples": len(self._latency_samples("delete_backup")),
+                "retention_days": None if by_policy else retention_days
+            }
+        except Exception as e:
+            logger.error(f"备份清理预演失败: {e}")
+            return {"success": False, "error": str(e)}
+    
     def cleanup_backups(self, retention_days=30):
         """清理备份策略 - 适配OpenStack 28.4.1，支持自定义保留天数"""
         try:
             all_backups = self.get_backups()
-            current_time = datetime.now()
-            deleted_count = 0
-            
-            for backup in all_backups:
-                try:
-                    # 解析备份创建时间
-                    backup_time = datetime.fromisoformat(backup["created_at"].replace('Z', '+00:00'))
-                    # 计算备份天数
-                    days_old = (current_time - backup_time).days
-                    
-                    # 如果备份超过指定天数，则删除
-                    if days_old > retention_days:
-                        result = self.delete_backup(backup["id"])
-                        if result["success"]:
-                            deleted_count += 1
-                            logger.info(f"删除过期备份: {backup['name']} (创建于 {days_old} 天前，超过 {retention_days} 天保留期)")
-                        else:
-                            logger.error(f"删除过期备份失败: {backup['id']} - {result.get('error')}")
-                except Exception as e:
-                    logger.error(f"处理备份 {backup.get('id')} 时出错: {e}")
-                    continue
+            expired = self._select_expired_backups(all_backups, lambda backup: retention_days)
+            result = self.delete_backups_concurrently(expired, all_backups)
+            deleted_count = result["deleted_count"]
             
             logger.info(f"备份清理完成，共删除 {deleted_count} 个超过 {retention_days} 天的过期备份")
-            return {"success": True, "deleted_count": deleted_count, "retention_days": retention_days}
+            return dict(result, success=True, retention_days=retention_days)
         except Exception as e:
             logger.error(f"备份清理失败: {e}")
             return {"success": False, "error": str(e)}
@@ -212,6 +946,26 @@ class OpenStackClient:
             logger.error(f"获取备份状态失败: {e}")
             return None
     
+    def list_backup_statuses(self, status):
+        """一次列表请求获取指定状态的全部备份 {backup_id: fail_reason}，不经过缓存"""
+        return {
+            backup.id: getattr(backup, "fail_reason", "") or ""
+            for backup in self.conn.block_storage.backups(details=True, status=status)
+        }
+    
+    def backup_statuses_since(self, since, backup_ids):
+        """获取 since（UTC时间，ISO格式）之后有变化的备份中指定备份的状态 {backup_id: (状态, 失败原因)}
+        
+        与清单镜像增量同步相同，按updated_at倒序读取到 since 为止，since 为None时读取全部备份；
+        未出现在结果中的备份在此期间没有变化或已被删除
+        """
+        wanted = set(backup_ids)
+        items = self.iter_changes("backups", since) if since else self.iter_backups()
+        return {
+            item["id"]: (item["status"], item.get("fail_reason") or "")
+            for item in items if item["id"] in wanted
+        }
+    
     def restore_backup(self, backup_id, volume_id=None, name=None):
         """从备份恢复云硬盘 - 适配OpenStack 28.4.1"""
         try:
@@ -224,6 +978,7 @@ class OpenStackClient:
                 volume_id=volume_id,
                 name=name
             )
+            self.invalidate_cache("backups", "volumes")
             logger.info(f"备份恢复成功: {restored_volume.id}")
             return {
                 "id": restored_volume.id,
@@ -259,6 +1014,7 @@ class OpenStackClient:
                 backup_url,
                 name=name
             )
+            self.invalidate_cache("backups")
             logger.info(f"备份导入成功: {imported_backup.id}")
             return {
                 "id": imported_backup.id,
@@ -270,106 +1026,248 @@ class OpenStackClient:
             logger.error(f"备份导入失败: {e}")
             return {"success": False, "error": str(e)}
     
-    def cleanup_backups_by_volume(self, volume_retention_policies):
-        """按云硬盘清理备份 - 支持不同云硬盘的不同保留策略"""
+    def cleanup_backups_by_volume(self, volume_retention_policies, default_policy=None):
+        """按云硬盘清理备份 - 支持不同云硬盘的不同保留策略（保留天数或GFS策略）"""
         try:
             all_backups = self.get_backups()
-            current_time = datetime.now()
-            deleted_count = 0
-            volume_stats = defaultdict(lambda: {"total": 0, "deleted": 0})
             
+            # 获取每个备份所属云硬盘的保留策略，默认为30天
+            expired = self._select_policy_deletions(all_backups, volume_retention_policies, default_policy)
+            result = self.delete_backups_concurrently(expired, all_backups)
+            
+            volume_stats = defaultdict(lambda: {"total": 0, "deleted": 0, "failed": 0, "blocked": 0})
             for backup in all_backups:
-                try:
-                    volume_id = backup["volume_id"]
-                    volume_stats[volume_id]["total"] += 1
-                    
-                    # 获取该云硬盘的保留策略，默认为30天
-                    retention_days = volume_retention_policies.get(volume_id, 30)
-                    
-                    # 解析备份创建时间
-                    backup_time = datetime.fromisoformat(backup["created_at"].replace('Z', '+00:00'))
-                    days_old = (current_time - backup_time).days
-                    
-                    # 如果备份超过指定天数，则删除
-                    if days_old > retention_days:
-                        result = self.delete_backup(backup["id"])
-                        if result["success"]:
-                            deleted_count += 1
-                            volume_stats[volume_id]["deleted"] += 1
-                            logger.info(f"删除过期备份: {backup['name']} (云硬盘: {volume_id}, 创建于 {days_old} 天前，超过 {retention_days} 天保留期)")
-                        else:
-                            logger.error(f"删除过期备份失败: {backup['id']} - {result.get('error')}")
-                except Exception as e:
-                    logger.error(f"处理备份 {backup.get('id')} 时出错: {e}")
-                    continue
+                volume_stats[backup["volume_id"]]["total"] += 1
+            for volume_id, stats in result["volume_stats"].items():
+                volume_stats[volume_id].update(stats)
             
-            logger.info(f"按云硬盘清理备份完成，共删除 {deleted_count} 个过期备份")
-            return {
-                "success": True, 
-                "deleted_count": deleted_count, 
-                "volume_stats": dict(volume_stats)
-            }
+            logger.info(f"按云硬盘清理备份完成，共删除 {result['deleted_count']} 个过期备份")
+            return dict(result, success=True, volume_stats=dict(volume_stats))
         except Exception as e:
             logger.error(f"按云硬盘清理备份失败: {e}")
             return {"success": False, "error": str(e)}
     
-    def get_system_info(self):
-        """获取系统信息"""
+    def _inventory_loaders(self):
+        """资源类型 -> 分页读取全部资源的函数"""
+        return {
+            "volumes": self._list_volumes,
+            "backups": self._list_backups,
+            "servers": self._list_servers,
+            "server_snapshots": self._list_server_snapshots,
+            "volume_snapshots": self._list_volume_snapshots
+        }
+    
+    def load_inventory(self, resource):
+        """通过缓存加载指定类型的资源清单，与get_*方法不同，失败时抛出异常而不是返回空列表"""
+        return self._load_inventory(resource, self._inventory_loaders()[resource])
+    
+    def iter_changes(self, resource, since):
+        """逐条读取 since（UTC时间，ISO格式）之后有变化的资源，用于清单镜像的增量同步
+        
+        Nova使用changes-since过滤，结果包含已删除（DELETED）的云主机；Cinder云硬盘使用updated_at
+        比较过滤（微版本3.60）；备份按updated_at倒序读取，遇到更早的条目即停止请求。
+        SDK的云硬盘快照查询不支持排序和updated_at过滤（参数被丢弃），无法只读取变化的快照，
+        抛出 InvalidResourceQuery，清单镜像改为定期全量核对
+        """
+        if resource == "servers":
+            yield from self.iter_servers(changes_since=since)
+        elif resource == "server_snapshots":
+            yield from self.iter_server_snapshots(changes_since=since)
+        elif resource == "volumes":
+            yield from self.iter_volumes(updated_at=f"gte:{since}")
+        elif resource == "backups":
+            for item in self.iter_backups(sort_key="updated_at", sort_dir="desc"):
+                if (item.get("updated_at") or "") < since:
+                    break
+                yield item
+        else:
+            raise openstack.exceptions.InvalidResourceQuery(message=f"{resource} 不支持按修改时间查询")
+    
+    def list_ids_by_status(self, resource, status):
+        """列出指定状态的Cinder资源ID，清单镜像用于确认删除中的资源是否已删除"""
+        iterators = {
+            "volumes": self.iter_volumes,
+            "backups": self.iter_backups,
+            "volume_snapshots": self.iter_volume_snapshots
+        }
+        return {item["id"] for item in iterators[resource](status=status)}
+    
+    def list_ids(self, resource):
+        """列出Cinder资源的全部ID（不读取详情），清单镜像用于发现其他客户端删除的资源"""
+        listings = {
+            "volumes": self.conn.block_storage.volumes,
+            "backups": self.conn.block_storage.backups,
+            "volume_snapshots": self.conn.block_storage.snapshots
+        }
+        return {item.id for item in listings[resource](details=False)}
+    
+    def _discard_from_mirror(self, resource, item_id):
+        """本地删除成功后从镜像中移除该资源"""
+        if self.mirror:
+            self.mirror.discard(resource, item_id)
+    
+    def _fetch_inventories(self, sources, max_workers=None, timeout=None):
+        """并发获取多个资源清单，单个数据源失败或超时时返回部分结果
+        
+        sources: {资源类型: 加载函数}
+        返回 (结果字典, 错误字典)，失败的数据源结果为空列表
+        """
+        max_workers = max_workers or Config.SYSTEM_INFO_WORKERS
+        timeout = Config.SYSTEM_INFO_TIMEOUT if timeout is None else timeout
+        results = {}
+        errors = {}
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(sources))))
         try:
-            volumes = self.get_volumes()
-            backups = self.get_backups()
-            servers = self.get_servers()
-            server_snapshots = self.get_server_snapshots()
-            volume_snapshots = self.get_volume_snapshots()
-            
-            # 统计信息
-            volume_stats = {
-                "total": len(volumes),
-                "available": len([v for v in volumes if v["status"] == "available"]),
-                "in_use": len([v for v in volumes if v["status"] == "in-use"]),
-                "error": len([v for v in volumes if v["status"] == "error"]),
-                "creating": len([v for v in volumes if v["status"] == "creating"]),
-                "deleting": len([v for v in volumes if v["status"] == "deleting"])
-            }
-            
-            backup_stats = {
-                "total": len(backups),
-                "full": len([b for b in backups if b.get("backup_type") == "full"]),
-                "incremental": len([b for b in backups if b.get("backup_type") == "incremental"]),
-                "available": len([b for b in backups if b["status"] == "available"]),
-                "creating": len([b for b in backups if b["status"] == "creating"]),
-                "error": len([b for b in backups if b["status"] == "error"])
+            futures = {
+                resource: executor.submit(self._load_inventory, resource, loader)
+                for resource, loader in sources.items()
             }
+            deadline = time.monotonic() + timeout
+            for resource, future in futures.items():
+                try:
+                    results[resource] = future.result(timeout=max(0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    future.cancel()
+                    errors[resource] = f"超过 {timeout} 秒未返回"
+                    results[resource] = []
+                    logger.warning(f"获取 {resource} 超时，返回部分结果")
+                except Exception as e:
+                    errors[resource] = str(e)
+                    results[resource] = []
+                    logger.error(f"获取 {resource} 失败: {e}")
+        finally:
+            # 不等待超时的请求结束，避免拖慢整个接口
+            executor.shutdown(wait=False)
+        
+        return results, errors
+    
+    def count_resources(self, resource, **filters):
+        """只查询符合条件的Cinder资源数量：with_count 加 limit=1，不读取资源详情"""
+        query = dict(filters, with_count="true", limit=1)
+        response = self.conn.block_storage.get(
+            f"{CINDER_COUNT_PATHS[resource]}?{urlencode(query)}",
+            microversion=CINDER_COUNT_MICROVERSION,
+            raise_exc=False
+        )
+        if response.status_code in (400, 404, 406):
+            raise ValueError(f"Cinder不支持 {resource} 数量查询: HTTP {response.status_code}")
+        if response.status_code >= 400:
+            raise RuntimeError(f"统计 {resource} 数量失败: HTTP {response.status_code}")
+        body = response.json()
+        if "count" not in body:
+            raise ValueError(f"Cinder未返回 {resource} 数量，可能不支持微版本 {CINDER_COUNT_MICROVERSION}")
+        return body["count"]
+    
+    def _local_summary(self, resource):
+        """从已就绪的镜像索引或未过期的缓存统计，不请求上游；都没有时返回None"""
+        fields, _ = INVENTORY_STATS_LAYOUT[resource]
+        counted = self.mirror.counts(resource, fields) if self.mirror else None
+        if counted is None:
+            items = self.cache.peek(resource)
+            if items is None:
+                return None
+            counted = count_by_fields(items, fields)
+        total, histograms = counted
+        return stats_from_histograms(resource, total, histograms), histograms
+    
+    def get_resource_count(self, resource):
+        """资源数量：镜像或缓存已就绪时直接统计，否则Cinder资源用with_count只查询数量；无法获取时返回None"""
+        summary = self._local_summary(resource)
+        if summary:
+            return summary[0]["total"]
+        if resource in CINDER_COUNT_PATHS and self._count_supported:
+            try:
+                return self.count_resources(resource)
+            except ValueError as e:
+                logger.warning(f"查询 {resource} 数量失败: {e}")
+        return None
+    
+    def _count_summaries(self, resources):
+        """用with_count并发查询Cinder资源的总数和各状态数量
+        
+        只能按状态过滤，备份的全量/增量数量等无法查询的统计项为None，直方图只包含查询过的状态。
+        返回 {资源类型: (统计字典, 直方图)}，查询失败的资源不在结果中
+        """
+        queries = []
+        for resource in resources:
+            _, layout = INVENTORY_STATS_LAYOUT[resource]
+            queries.append((resource, None))
+            queries.extend((resource, value) for field, value in layout.values() if field == "status")
+        
+        def count(query):
+            resource, status = query
+            filters = {"status": status} if status else {}
+            try:
+                return {"success": True, "count": self.count_resources(resource, **filters)}
+            except ValueError as e:
+                return {"success": False, "error": str(e), "unsupported": True}
+        
+        results = run_parallel(count, queries, Config.SYSTEM_INFO_WORKERS)
+        failed = {resource for (resource, _), result in zip(queries, results) if not result.get("success")}
+        unsupported = next((result for result in results if result.get("unsupported")), None)
+        if unsupported:
+            # 云平台不支持with_count，之后不再尝试
+            self._count_supported = False
+            logger.warning(f"系统信息改为读取完整清单统计: {unsupported['error']}")
+        
+        totals = {}
+        status_counts = defaultdict(dict)
+        for (resource, status), result in zip(queries, results):
+            if resource in failed:
+                continue
+            if status is None:
+                totals[resource] = result["count"]
+            else:
+                status_counts[resource][status] = result["count"]
+        return {
+            resource: (stats_from_histograms(resource, totals[resource], {"status": status_counts[resource]}),
+                       {"status": status_counts[resource]})
+            for resource in totals
+        }
+    
+    def get_system_info(self):
+        """获取系统信息 - 镜像或缓存中已有清单时直接统计；Cinder资源用with_count只查询数量
+        （备份的全量/增量数量只在镜像或缓存就绪时统计，否则为None），不支持时和Nova资源一样并发获取完整清单统计
+        """
+        try:
+            stats = {}
+            histograms = {}
+            sources = {}
+            for resource in INVENTORY_STATS_LAYOUT:
+                summary = self._local_summary(resource)
+                if summary:
+                    stats[resource], histograms[resource] = summary
+                    sources[resource] = "local"
             
-            server_stats = {
-                "total": len(servers),
-                "active": len([s for s in servers if s["status"] == "ACTIVE"]),
-                "shutoff": len([s for s in servers if s["status"] == "SHUTOFF"]),
-                "error": len([s for s in servers if s["status"] == "ERROR"]),
-                "building": len([s for s in servers if s["status"] == "BUILD"]),
-                "deleted": len([s for s in servers if s["status"] == "DELETED"])
-            }
+            pending = [resource for resource in INVENTORY_STATS_LAYOUT if resource not in stats]
+            countable = [resource for resource in pending if resource in CINDER_COUNT_PATHS]
+            if countable and self._count_supported:
+                for resource, summary in self._count_summaries(countable).items():
+                    stats[resource], histograms[resource] = summary
+                    sources[resource] = "count"
             
-            snapshot_stats = {
-                "server_snapshots": {
-                    "total": len(server_snapshots),
-                    "active": len([s for s in server_snapshots if s["status"] == "ACTIVE"]),
-                    "creating": len([s for s in server_snapshots if s["status"] == "BUILDING"]),
-                    "error": len([s for s in server_snapshots if s["status"] == "ERROR"])
-                },
-                "volume_snapshots": {
-                    "total": len(volume_snapshots),
-                    "available": len([s for s in volume_snapshots if s["status"] == "available"]),
-                    "creating": len([s for s in volume_snapshots if s["status"] == "creating"]),
-                    "error": len([s for s in volume_snapshots if s["status"] == "error"])
-                }
-            }
+            loaders = self._inventory_loaders()
+            inventories, errors = self._fetch_inventories(
+                {resource: loaders[resource] for resource in INVENTORY_STATS_LAYOUT if resource not in stats}
+            )
+            # 统计信息 - 每类资源只遍历一次
+            for resource, items in inventories.items():
+                stats[resource], histograms[resource] = summarize_inventory(resource, items)
+                sources[resource] = "list"
             
             return {
-                "volumes": volume_stats,
-                "backups": backup_stats,
-                "servers": server_stats,
-                "snapshots": snapshot_stats,
+                "volumes": stats["volumes"],
+                "backups": stats["backups"],
+                "servers": stats["servers"],
+                "snapshots": {
+                    "server_snapshots": stats["server_snapshots"],
+                    "volume_snapshots": stats["volume_snapshots"]
+                },
+                "histograms": histograms,
+                "sources": sources,
+                "partial": bool(errors),
+                "errors": errors,
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
@@ -378,65 +1276,77 @@ class OpenStackClient:
     
     # ==================== 云主机快照功能 ====================
     
-    def get_servers(self):
+    def get_servers(self, use_cache=True):
         """获取所有云主机"""
         try:
-            servers = []
-            for server in self.conn.compute.servers(details=True):
-                servers.append({
-                    "id": server.id,
-                    "name": server.name,
-                    "status": server.status,
-                    "created_at": server.created_at,
-                    "flavor": {
-                        "id": server.flavor.id,
-                        "name": getattr(server.flavor, 'name', ''),
-                        "ram": server.flavor.ram,
-                        "vcpus": server.flavor.vcpus,
-                        "disk": server.flavor.disk
-                    },
-                    "image": {
-                        "id": server.image.id if server.image else None,
-                        "name": getattr(server.image, 'name', '') if server.image else ''
-                    },
-                    "networks": server.networks,
-                    "availability_zone": getattr(server, 'OS-EXT-AZ:availability_zone', ''),
-                    "power_state": getattr(server, 'OS-EXT-STS:power_state', ''),
-                    "task_state": getattr(server, 'OS-EXT-STS:task_state', ''),
-                    "vm_state": getattr(server, 'OS-EXT-STS:vm_state', ''),
-                    "key_name": getattr(server, 'key_name', ''),
-                    "security_groups": getattr(server, 'security_groups', [])
-                })
-            return servers
+            return self._load_inventory("servers", self._list_servers, use_cache)
         except Exception as e:
             logger.error(f"获取云主机列表失败: {e}")
             return []
     
-    def get_server_snapshots(self):
+    def _list_servers(self):
+        """从Nova分页读取全部云主机"""
+        return list(self.iter_servers())
+    
+    def iter_servers(self, **query):
+        """逐条读取云主机，由SDK按需请求下一页；query 为下推到Nova的过滤参数"""
+        for server in self.conn.compute.servers(details=True, **query):
+            yield {
+                "id": server.id,
+                "name": server.name,
+                "status": server.status,
+                "created_at": server.created_at,
+                "flavor": {
+                    "id": server.flavor.id,
+                    "name": getattr(server.flavor, 'name', ''),
+                    "ram": server.flavor.ram,
+                    "vcpus": server.flavor.vcpus,
+                    "disk": server.flavor.disk
+                },
+                "image": {
+                    "id": server.image.id if server.image else None,
+                    "name": getattr(server.image, 'name', '') if server.image else ''
+                },
+                "networks": server.networks,
+                "availability_zone": getattr(server, 'OS-EXT-AZ:availability_zone', ''),
+                "power_state": getattr(server, 'OS-EXT-STS:power_state', ''),
+                "task_state": getattr(server, 'OS-EXT-STS:task_state', ''),
+                "vm_state": getattr(server, 'OS-EXT-STS:vm_state', ''),
+                "key_name": getattr(server, 'key_name', ''),
+                "security_groups": getattr(server, 'security_groups', [])
+            }
+    
+    def get_server_snapshots(self, use_cache=True):
         """获取所有云主机快照"""
         try:
-            snapshots = []
-            for snapshot in self.conn.compute.snapshots(details=True):
-                snapshots.append({
-                    "id": snapshot.id,
-                    "name": snapshot.name,
-                    "server_id": snapshot.server_id,
-                    "status": snapshot.status,
-                    "created_at": snapshot.created_at,
-                    "updated_at": snapshot.updated_at,
-                    "metadata": getattr(snapshot, 'metadata', {}),
-                    "description": getattr(snapshot, 'description', ''),
-                    "size": getattr(snapshot, 'size', 0),
-                    "min_disk": getattr(snapshot, 'min_disk', 0),
-                    "min_ram": getattr(snapshot, 'min_ram', 0),
-                    "progress": getattr(snapshot, 'progress', 0),
-                    "block_device_mapping": getattr(snapshot, 'block_device_mapping', [])
-                })
-            return snapshots
+            return self._load_inventory("server_snapshots", self._list_server_snapshots, use_cache)
         except Exception as e:
             logger.error(f"获取云主机快照列表失败: {e}")
             return []
     
+    def _list_server_snapshots(self):
+        """从Nova读取全部云主机快照"""
+        return list(self.iter_server_snapshots())
+    
+    def iter_server_snapshots(self, **query):
+        """逐条读取云主机快照；query 为下推到Nova的过滤参数"""
+        for snapshot in self.conn.compute.snapshots(details=True, **query):
+            yield {
+                "id": snapshot.id,
+                "name": snapshot.name,
+                "server_id": snapshot.server_id,
+                "status": snapshot.status,
+                "created_at": snapshot.created_at,
+                "updated_at": snapshot.updated_at,
+                "metadata": getattr(snapshot, 'metadata', {}),
+                "description": getattr(snapshot, 'description', ''),
+                "size": getattr(snapshot, 'size', 0),
+                "min_disk": getattr(snapshot, 'min_disk', 0),
+                "min_ram": getattr(snapshot, 'min_ram', 0),
+                "progress": getattr(snapshot, 'progress', 0),
+                "block_device_mapping": getattr(snapshot, 'block_device_mapping', [])
+            }
+    
     def create_server_snapshot(self, server_id, name=None, description=None):
         """创建云主机快照"""
         try:
@@ -449,6 +1359,7 @@ class OpenStackClient:
                 description=description or f"Server snapshot created at {datetime.now().isoformat()}"
             )
             
+            self.invalidate_cache("server_snapshots")
             logger.info(f"云主机快照创建成功: {snapshot.id}")
             return {
                 "id": snapshot.id,
@@ -463,42 +1374,78 @@ class OpenStackClient:
     def delete_server_snapshot(self, snapshot_id):
         """删除云主机快照"""
         try:
+            started = time.monotonic()
             self.conn.compute.delete_server_snapshot(snapshot_id, ignore_missing=True)
+            self._record_latency("delete_server_snapshot", started)
+            self._discard_from_mirror("server_snapshots", snapshot_id)
+            self.invalidate_cache("server_snapshots")
             logger.info(f"云主机快照删除成功: {snapshot_id}")
             return {"success": True}
         except Exception as e:
             logger.error(f"删除云主机快照失败: {e}")
             return {"success": False, "error": str(e)}
     
+    def _select_expired_server_snapshots(self, snapshots, retention_days):
+        """筛选超过保留天数且已完成的云主机快照"""
+        current_time = datetime.now()
+        expired = []
+        for snapshot in snapshots:
+            try:
+                # 只处理已完成的快照
+                if snapshot["status"] != "ACTIVE":
+                    continue
+                snapshot_time = datetime.fromisoformat(snapshot["created_at"].replace('Z', '+00:00'))
+                if (current_time - snapshot_time).days > retention_days:
+                    expired.append(snapshot)
+            except Exception as e:
+                logger.error(f"处理云主机快照 {snapshot.get('id')} 时出错: {e}")
+        return expired
+    
+    def plan_server_snapshot_cleanup(self, retention_days=30):
+        """云主机快照清理预演 - 不调用删除接口"""
+        try:
+            all_snapshots = self.get_server_snapshots()
+            expired = self._select_expired_server_snapshots(all_snapshots, retention_days)
+            
+            affected = defaultdict(lambda: {"delete_count": 0, "reclaim_gb": 0})
+            for snapshot in expired:
+                affected[snapshot["server_id"]]["delete_count"] += 1
+                # 镜像大小单位为字节
+                affected[snapshot["server_id"]]["reclaim_gb"] += (snapshot.get("size") or 0) / 1024 ** 3
+            
+            delete_latency = self._average_latency("delete_server_snapshot", Config.CLEANUP_DEFAULT_DELETE_LATENCY)
+            return {
+                "success": True,
+                "dry_run": True,
+                "total_snapshots": len(all_snapshots),
+                "delete_count": len(expired),
+                "reclaim_gb": round(sum(stats["reclaim_gb"] for stats in affected.values()), 2),
+                "affected_server_count": len(affected),
+                "affected_servers": dict(affected),
+                # 云主机快照逐个删除
+                "estimated_seconds": round(len(expired) * delete_latency, 1),
+                "latency_samples": len(self._latency_samples("delete_server_snapshot")),
+                "retention_days": retention_days
+            }
+        except Exception as e:
+            logger.error(f"云主机快照清理预演失败: {e}")
+            return {"success": False, "error": str(e)}
+    
     def cleanup_server_snapshots(self, retention_days=30):
         """清理云主机快照"""
         try:
             all_snapshots = self.get_server_snapshots()
-            current_time = datetime.now()
             deleted_count = 0
             
-            for snapshot in all_snapshots:
-                try:
-                    # 只处理已完成的快照
-                    if snapshot["status"] != "ACTIVE":
-                        continue
-                    
-                    # 解析快照创建时间
-                    snapshot_time = datetime.fromisoformat(snapshot["created_at"].replace('Z', '+00:00'))
-                    days_old = (current_time - snapshot_time).days
-                    
-                    # 如果快照超过指定天数，则删除
-                    if days_old > retention_days:
-                        result = self.delete_server_snapshot(snapshot["id"])
-                        if result["success"]:
-                            deleted_count += 1
-                            logger.info(f"删除过期云主机快照: {snapshot['name']} (创建于 {days_old} 天前，超过 {retention_days} 天保留期)")
-                        else:
-                            logger.error(f"删除过期云主机快照失败: {snapshot['id']} - {result.get('error')}")
-                except Exception as e:
-                    logger.error(f"处理云主机快照 {snapshot.get('id')} 时出错: {e}")
-                    continue
+            for snapshot in self._select_expired_server_snapshots(all_snapshots, retention_days):
+                result = self.delete_server_snapshot(snapshot["id"])
+                if result["success"]:
+                    deleted_count += 1
+                    logger.info(f"删除过期云主机快照: {snapshot['name']} (超过 {retention_days} 天保留期)")
+                else:
+                    logger.error(f"删除过期云主机快照失败: {snapshot['id']} - {result.get('error')}")
             
+            self.flush_latencies()
             logger.info(f"云主机快照清理完成，共删除 {deleted_count} 个超过 {retention_days} 天的过期快照")
             return {"success": True, "deleted_count": deleted_count, "retention_days": retention_days}
         except Exception as e:
@@ -507,31 +1454,37 @@ class OpenStackClient:
     
     # ==================== 云硬盘快照功能 ====================
     
-    def get_volume_snapshots(self):
+    def get_volume_snapshots(self, use_cache=True):
         """获取所有云硬盘快照"""
         try:
-            snapshots = []
-            for snapshot in self.conn.block_storage.snapshots(details=True):
-                snapshots.append({
-                    "id": snapshot.id,
-                    "name": snapshot.name,
-                    "volume_id": snapshot.volume_id,
-                    "status": snapshot.status,
-                    "created_at": snapshot.created_at,
-                    "updated_at": snapshot.updated_at,
-                    "metadata": getattr(snapshot, 'metadata', {}),
-                    "description": getattr(snapshot, 'description', ''),
-                    "size": snapshot.size,
-                    "force": getattr(snapshot, 'force', False),
-                    "progress": getattr(snapshot, 'progress', 0),
-                    "user_id": getattr(snapshot, 'user_id', ''),
-                    "project_id": getattr(snapshot, 'project_id', '')
-                })
-            return snapshots
+            return self._load_inventory("volume_snapshots", self._list_volume_snapshots, use_cache)
         except Exception as e:
             logger.error(f"获取云硬盘快照列表失败: {e}")
             return []
     
+    def _list_volume_snapshots(self):
+        """从Cinder分页读取全部云硬盘快照"""
+        return list(self.iter_volume_snapshots())
+    
+    def iter_volume_snapshots(self, **query):
+        """逐条读取云硬盘快照，由SDK按需请求下一页；query 为下推到Cinder的过滤参数（SDK不支持排序参数）"""
+        for snapshot in self.conn.block_storage.snapshots(details=True, **query):
+            yield {
+                "id": snapshot.id,
+                "name": snapshot.name,
+                "volume_id": snapshot.volume_id,
+                "status": snapshot.status,
+                "created_at": snapshot.created_at,
+                "updated_at": snapshot.updated_at,
+                "metadata": getattr(snapshot, 'metadata', {}),
+                "description": getattr(snapshot, 'description', ''),
+                "size": snapshot.size,
+                "force": getattr(snapshot, 'force', False),
+                "progress": getattr(snapshot, 'progress', 0),
+                "user_id": getattr(snapshot, 'user_id', ''),
+                "project_id": getattr(snapshot, 'project_id', '')
+            }
+    
     def create_volume_snapshot(self, volume_id, name=None, description=None, force=False):
         """创建云硬盘快照"""
         try:
@@ -545,6 +1498,7 @@ class OpenStackClient:
                 force=force
             )
             
+            self.invalidate_cache("volume_snapshots", "volumes")
             logger.info(f"云硬盘快照创建成功: {snapshot.id}")
             return {
                 "id": snapshot.id,
@@ -560,6 +1514,8 @@ class OpenStackClient:
         """删除云硬盘快照"""
         try:
             self.conn.block_storage.delete_snapshot(snapshot_id, ignore_missing=True, force=False)
+            self._discard_from_mirror("volume_snapshots", snapshot_id)
+            self.invalidate_cache("volume_snapshots")
             logger.info(f"云硬盘快照删除成功: {snapshot_id}")
             return {"success": True}
         except Exception as e:
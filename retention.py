@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份保留与清理规划
+根据增量备份依赖链计算安全的删除顺序，支持按数量和日历周期的GFS保留策略
+"""
+
+from collections import defaultdict
+from datetime import date
+from config import Config
+
+# 失败的备份不包含数据，也不会被增量备份依赖
+STANDALONE_STATUSES = ('error',)
+
+# 仍在进行中的备份既不计入保留数量也不删除
+IN_PROGRESS_STATUSES = ('creating', 'deleting', 'restoring', 'backing-up')
+
+def build_backup_chains(backups):
+    """按云硬盘构建增量备份链
+
+    返回 {volume_id: [链, ...]}，每条链以全量备份开头、按创建时间升序排列，
+    后面的增量备份依赖前面的备份
+    """
+    by_volume = defaultdict(list)
+    for backup in backups:
+        by_volume[backup.get("volume_id")].append(backup)
+
+    chains = {}
+    for volume_id, volume_backups in by_volume.items():
+        volume_backups.sort(key=lambda b: b.get("created_at") or "")
+        volume_chains = []
+        current = None
+        for backup in volume_backups:
+            if backup.get("status") in STANDALONE_STATUSES:
+                volume_chains.append([backup])
+                continue
+            if not backup.get("is_incremental") or current is None:
+                current = [backup]
+                volume_chains.append(current)
+            else:
+                current.append(backup)
+        chains[volume_id] = volume_chains
+    return chains
+
+def plan_chain_deletions(candidates, all_backups):
+    """按依赖关系规划删除顺序
+
+    同一条链内从最新的备份开始删除（叶子优先）；链中更新的备份被保留时，
+    更早的备份仍被依赖，不能删除。返回:
+        lanes: 删除队列列表，每个队列对应一条链，队列内需按顺序删除，不同队列可并行
+        blocked: 因仍有依赖而跳过的备份
+    """
+    candidate_ids = {backup["id"] for backup in candidates}
+    involved_volumes = {backup.get("volume_id") for backup in candidates}
+    lanes = []
+    blocked = []
+
+    chains = build_backup_chains(b for b in all_backups if b.get("volume_id") in involved_volumes)
+    for volume_chains in chains.values():
+        for chain in volume_chains:
+            lane = []
+            tail_kept = False
+            for position in range(len(chain) - 1, -1, -1):
+                backup = chain[position]
+                if backup["id"] not in candidate_ids:
+                    tail_kept = True
+                    continue
+                # 链末端却标记了依赖，说明存在清单之外的依赖备份
+                unknown_dependents = backup.get("has_dependent_backups") and position == len(chain) - 1
+                if tail_kept or unknown_dependents:
+                    blocked.append(backup)
+                    tail_kept = True
+                else:
+                    lane.append(backup)
+            if lane:
+                lanes.append(lane)
+
+    # 最长的队列优先调度，缩短整体耗时
+    lanes.sort(key=len, reverse=True)
+    return lanes, blocked
+
+def _week_key(created_at):
+    """ISO周编号，如 (2025, 26)"""
+    return date.fromisoformat(created_at[:10]).isocalendar()[:2]
+
+def normalize_policy(policy):
+    """补全GFS保留策略，未指定的数量使用配置中的默认值"""
+    policy = policy or {}
+    return {
+        "full": int(policy.get("full", Config.FULL_BACKUP_RETENTION)),
+        "incremental": int(policy.get("incremental", Config.INCREMENTAL_BACKUP_RETENTION)),
+        "daily": int(policy.get("daily", Config.RETENTION_KEEP_DAILY)),
+        "weekly": int(policy.get("weekly", Config.RETENTION_KEEP_WEEKLY)),
+        "monthly": int(policy.get("monthly", Config.RETENTION_KEEP_MONTHLY))
+    }
+
+def evaluate_volume_retention(volume_backups, policy):
+    """计算单个云硬盘的保留/删除集合（祖父-父-子策略）
+
+    按创建时间从新到旧一次遍历：保留最新的 full 个全量备份和 incremental 个增量备份，
+    另外保留最近 daily 天、weekly 周、monthly 月中每个周期最新的一个备份。
+    失败的备份直接删除，进行中的备份始终保留。返回 (保留列表, 删除列表)
+    """
+    keep = []
+    delete = []
+    full_left = policy["full"]
+    incremental_left = policy["incremental"]
+    buckets = (
+        ("daily", lambda created_at: created_at[:10], set()),
+        ("weekly", _week_key, set()),
+        ("monthly", lambda created_at: created_at[:7], set())
+    )
+
+    for backup in sorted(volume_backups, key=lambda b: b.get("created_at") or "", reverse=True):
+        status = backup.get("status")
+        if status in STANDALONE_STATUSES:
+            delete.append(backup)
+            continue
+        if status in IN_PROGRESS_STATUSES:
+            keep.append(backup)
+            continue
+
+        retained = False
+        if backup.get("backup_type", "incremental" if backup.get("is_incremental") else "full") == "incremental":
+            if incremental_left > 0:
+                incremental_left -= 1
+                retained = True
+        elif full_left > 0:
+            full_left -= 1
+            retained = True
+
+        created_at = backup.get("created_at") or ""
+        for name, key_of, seen in buckets:
+            if not created_at or len(seen) >= policy[name]:
+                continue
+            key = key_of(created_at)
+            if key not in seen:
+                # 每个周期保留最新的一个备份
+                seen.add(key)
+                retained = True
+
+        (keep if retained else delete).append(backup)
+
+    return keep, delete
+
+def evaluate_retention(backups, policy):
+    """按云硬盘分组计算GFS保留策略的删除集合
+
+    policy 可以是统一的策略字典，也可以是 volume_id -> 策略字典 的函数
+    """
+    by_volume = defaultdict(list)
+    for backup in backups:
+        by_volume[backup.get("volume_id")].append(backup)
+
+    policy_for = policy if callable(policy) else (lambda volume_id: policy)
+    to_delete = []
+    for volume_id, volume_backups in by_volume.items():
+        _, delete = evaluate_volume_retention(volume_backups, normalize_policy(policy_for(volume_id)))
+        to_delete.extend(delete)
+    return to_delete
@@ -3,14 +3,17 @@
 """
 定时备份任务执行器
 支持每日和每周定时备份
+按下次执行时间维护优先队列，休眠到最早的执行时间，配置变化时才重新加载
 """
 
+import heapq
 import json
 import os
+import threading
 import time
 import logging
-from datetime import datetime, timedelta
-from openstack_client import OpenStackClient
+from datetime import datetime, timedelta, timezone
+from openstack_client import OpenStackClient, run_parallel
 from config import Config
 from database import get_db_manager
 
@@ -25,10 +28,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def parse_schedule_time(schedule_time):
+    """解析执行时间，兼容 '02:00' 和数据库TIME字段的 '2:00:00' 格式"""
+    parts = str(schedule_time or '02:00').split(':')
+    return int(parts[0]), int(parts[1])
+
+def parse_run_time(value):
+    """解析数据库中的执行时间"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+def compute_next_run(schedule, after):
+    """计算定时任务在 after 之后的下一次执行时间，任务禁用或配置无效时返回None"""
+    if not schedule.get('enabled', True):
+        return None
+    
+    try:
+        hour, minute = parse_schedule_time(schedule.get('schedule_time', '02:00'))
+    except (ValueError, IndexError):
+        logger.error(f"无效的时间格式: {schedule.get('schedule_time')}")
+        return None
+    
+    schedule_type = schedule.get('schedule_type')
+    if schedule_type == 'daily':
+        weekdays = set(range(1, 8))
+    elif schedule_type == 'weekly':
+        weekdays = set(schedule.get('weekdays') or [])
+        if not weekdays:
+            return None
+    else:
+        return None
+    
+    # 最多向后查找8天即可覆盖一周中的任意一天
+    for offset in range(8):
+        day = after.date() + timedelta(days=offset)
+        if day.isoweekday() not in weekdays:
+            continue
+        candidate = datetime(day.year, day.month, day.day, hour, minute)
+        if candidate > after:
+            return candidate
+    return None
+
 class BackupScheduler:
     def __init__(self):
         self.db_manager = None
         self.openstack_client = None
+        self.schedules = {}
+        self._queue = []  # (下次执行时间, 定时任务ID) 小顶堆
+        self._schedules_version = None
+        self._reconcile_since = None  # 上一轮状态同步的起点（UTC），只读取此后有变化的备份
+        self._stop_event = threading.Event()
+        # 所有定时任务共享的全局并发上限
+        self._backup_slots = threading.BoundedSemaphore(max(1, Config.SCHEDULER_GLOBAL_CONCURRENCY))
         self._init_components()
     
     def _init_components(self):
@@ -59,46 +113,82 @@ class BackupScheduler:
             logger.error(f"加载定时备份配置失败: {e}")
             return []
     
-    def should_run_schedule(self, schedule):
-        """判断定时任务是否应该执行"""
-        if not schedule.get('enabled', True):
-            return False
+    def should_run_schedule(self, schedule, now=None):
+        """判断定时任务当前是否到达执行时间"""
+        now = now or datetime.now()
+        next_run = compute_next_run(schedule, now - timedelta(seconds=Config.SCHEDULER_MISFIRE_GRACE))
+        return next_run is not None and next_run <= now
+    
+    def load_volume_names(self):
+        """一次性获取云硬盘名称索引 {volume_id: name}，同一轮执行的所有定时任务共用"""
+        if not self.openstack_client:
+            return {}
         
-        now = datetime.now()
-        schedule_time = schedule.get('schedule_time', '02:00')
+        volumes = self.openstack_client.get_volumes()
+        return {volume['id']: volume.get('name') or 'unnamed' for volume in volumes}
+    
+    def _resolve_volume_info(self, volume_id, volume_names):
+        """从名称索引获取云硬盘信息，索引中不存在时单独查询"""
+        if volume_id in volume_names:
+            return {'name': volume_names[volume_id], 'id': volume_id}
         
         try:
-            hour, minute = map(int, schedule_time.split(':'))
-            schedule_datetime = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        except ValueError:
-            logger.error(f"无效的时间格式: {schedule_time}")
-            return False
-        
-        # 检查是否是每日执行
-        if schedule.get('schedule_type') == 'daily':
-            # 如果当前时间接近计划时间（前后5分钟内），则执行
-            time_diff = abs((now - schedule_datetime).total_seconds())
-            return time_diff <= 300  # 5分钟 = 300秒
+            volume = self.openstack_client.conn.block_storage.get_volume(volume_id)
+            return {
+                'name': volume.name or 'unnamed',
+                'id': volume.id
+            }
+        except:
+            return {'name': 'unknown', 'id': volume_id}
+    
+    def _backup_volume(self, schedule, volume_id, volume_names):
+        """为定时任务中的单个云硬盘创建备份"""
+        backup_type = schedule.get('backup_type', 'full')
+        schedule_id = schedule.get('id', '')
         
-        # 检查是否是每周执行
-        elif schedule.get('schedule_type') == 'weekly':
-            weekdays = schedule.get('weekdays', [])
-            if not weekdays:
-                return False
-            
-            # 检查今天是否是计划中的星期
-            current_weekday = now.isoweekday()  # 1=周一, 7=周日
-            if current_weekday not in weekdays:
-                return False
+        with self._backup_slots:
+            try:
+                # 获取云硬盘信息以生成备份名称
+                volume_info = self._resolve_volume_info(volume_id, volume_names)
+                
+                # 生成备份名称：云硬盘名称-backup-云硬盘ID-时间戳
+                current_time = datetime.now().strftime('%Y-%m-%d-%H-%M')
+                backup_name = f"{volume_info['name']}-backup-{volume_info['id']}-{current_time}"
+                
+                if backup_type == 'full':
+                    result = self.openstack_client.create_full_backup(volume_id, backup_name)
+                else:
+                    result = self.openstack_client.create_incremental_backup(volume_id, backup_name)
+                
+                if result.get('success'):
+                    logger.info(f"云硬盘 {volume_info['name']} ({volume_id}) 备份创建成功: {result.get('id')}")
+                else:
+                    logger.error(f"云硬盘 {volume_info['name']} ({volume_id}) 备份创建失败: {result.get('error')}")
+                return dict(result, backup_name=backup_name)
             
-            # 检查时间是否接近
-            time_diff = abs((now - schedule_datetime).total_seconds())
-            return time_diff <= 300  # 5分钟 = 300秒
-        
-        return False
+            except Exception as e:
+                logger.error(f"云硬盘 {volume_id} 备份创建异常: {e}")
+                return {"success": False, "error": str(e)}
+    
+    def _history_record(self, schedule, volume_id, result):
+        """根据备份结果生成备份历史记录"""
+        success = result.get('success')
+        return {
+            'schedule_id': schedule.get('id', ''),
+            'backup_id': result.get('id') if success else None,
+            'volume_id': volume_id,
+            'backup_name': result.get('backup_name', ''),
+            'backup_type': schedule.get('backup_type', 'full'),
+            # 记录Cinder返回的实际状态，后续由状态同步更新
+            'status': (result.get('status') or 'creating') if success else 'error',
+            'error_message': None if success else result.get('error', '未知错误')
+        }
     
-    def execute_schedule(self, schedule):
-        """执行定时备份任务"""
+    def execute_schedule(self, schedule, volume_names=None):
+        """执行定时备份任务，各云硬盘在有界线程池中并发备份
+        
+        volume_names 为云硬盘名称索引，未提供时在执行前获取一次
+        """
         if not self.openstack_client:
             logger.error("OpenStack客户端未初始化，无法执行备份")
             return False
@@ -111,7 +201,6 @@ class BackupScheduler:
             volume_ids = schedule.get('volume_ids', [])
             backup_type = schedule.get('backup_type', 'full')
             schedule_name = schedule.get('name', '')
-            schedule_id = schedule.get('id', '')
             
             if not volume_ids:
                 logger.warning(f"定时备份 {schedule.get('id')} 没有选择云硬盘")
@@ -119,49 +208,21 @@ class BackupScheduler:
             
             logger.info(f"开始执行定时备份: {schedule_name} ({backup_type})")
             
-            success_count = 0
-            for volume_id in volume_ids:
-                try:
-                    # 获取云硬盘信息以生成备份名称
-                    volume_info = None
-                    try:
-                        volume = self.openstack_client.conn.block_storage.get_volume(volume_id)
-                        volume_info = {
-                            'name': volume.name or 'unnamed',
-                            'id': volume.id
-                        }
-                    except:
-                        volume_info = {'name': 'unknown', 'id': volume_id}
-                    
-                    # 生成备份名称：云硬盘名称-backup-云硬盘ID-时间戳
-                    current_time = datetime.now().strftime('%Y-%m-%d-%H-%M')
-                    backup_name = f"{volume_info['name']}-backup-{volume_info['id']}-{current_time}"
-                    
-                    # 记录备份历史
-                    self.db_manager.add_backup_history(
-                        schedule_id, '', volume_id, backup_name, backup_type, 'creating'
-                    )
-                    
-                    if backup_type == 'full':
-                        result = self.openstack_client.create_full_backup(volume_id, backup_name)
-                    else:
-                        result = self.openstack_client.create_incremental_backup(volume_id, backup_name)
-                    
-                    if result.get('success'):
-                        success_count += 1
-                        backup_id = result.get('id', '')
-                        # 更新备份历史状态
-                        self.db_manager.update_backup_history_status(backup_id, 'available')
-                        logger.info(f"云硬盘 {volume_info['name']} ({volume_id}) 备份创建成功: {backup_id}")
-                    else:
-                        # 更新备份历史状态为错误
-                        self.db_manager.update_backup_history_status('', 'error', result.get('error', '未知错误'))
-                        logger.error(f"云硬盘 {volume_info['name']} ({volume_id}) 备份创建失败: {result.get('error')}")
-                
-                except Exception as e:
-                    logger.error(f"云硬盘 {volume_id} 备份创建异常: {e}")
-                    # 更新备份历史状态为错误
-                    self.db_manager.update_backup_history_status('', 'error', str(e))
+            if volume_names is None:
+                volume_names = self.load_volume_names()
+            
+            results = run_parallel(
+                lambda volume_id: self._backup_volume(schedule, volume_id, volume_names),
+                volume_ids,
+                Config.SCHEDULER_SCHEDULE_CONCURRENCY
+            )
+            success_count = sum(1 for result in results if result.get('success'))
+            
+            # 本次执行的备份历史一次批量写入
+            self.db_manager.add_backup_history_batch([
+                self._history_record(schedule, volume_id, result)
+                for volume_id, result in zip(volume_ids, results)
+            ])
             
             logger.info(f"定时备份执行完成: {success_count}/{len(volume_ids)} 成功")
             return success_count > 0
@@ -170,45 +231,183 @@ class BackupScheduler:
             logger.error(f"执行定时备份失败: {e}")
             return False
     
-    def update_schedule_last_run(self, schedule_id):
-        """更新定时任务最后执行时间"""
+    def update_schedule_last_run(self, schedule_id, last_run=None, next_run=None):
+        """更新定时任务最后执行时间和下次执行时间"""
         if not self.db_manager:
             logger.error("数据库管理器未初始化，无法更新执行时间")
             return False
         
         try:
-            return self.db_manager.update_schedule_last_run(schedule_id)
+            return self.db_manager.update_schedule_last_run(schedule_id, last_run, next_run)
         except Exception as e:
             logger.error(f"更新定时任务最后执行时间失败: {e}")
             return False
     
+    def _schedules_changed(self):
+        """通过配置版本判断定时任务是否有变化"""
+        if not self.db_manager:
+            return False
+        version = self.db_manager.get_schedules_version()
+        if version is None or version == self._schedules_version:
+            return False
+        self._schedules_version = version
+        return True
+    
+    def reload_schedules(self, now=None):
+        """重新加载定时任务并重建执行队列"""
+        now = now or datetime.now()
+        self.schedules = {}
+        self._queue = []
+        
+        for schedule in self.load_schedules():
+            persisted_next_run = parse_run_time(schedule.get('next_run'))
+            
+            # 在容错时间内错过的执行会被补上，已执行过的不会重复执行
+            next_run = compute_next_run(schedule, now - timedelta(seconds=Config.SCHEDULER_MISFIRE_GRACE))
+            last_run = parse_run_time(schedule.get('last_run'))
+            if next_run and last_run and next_run <= last_run:
+                next_run = compute_next_run(schedule, max(last_run, now))
+            
+            schedule['next_run'] = next_run
+            self.schedules[schedule['id']] = schedule
+            if next_run:
+                heapq.heappush(self._queue, (next_run, schedule['id']))
+            
+            if self.db_manager and persisted_next_run != next_run:
+                self.db_manager.update_schedule_next_run(schedule['id'], next_run)
+        
+        logger.info(f"已加载 {len(self.schedules)} 个定时任务，{len(self._queue)} 个待执行")
+    
+    def run_due_schedules(self, now=None):
+        """执行所有已到期的定时任务，并计算各自的下次执行时间
+        
+        同时到期的多个定时任务并发执行，总并发受全局并发上限约束
+        """
+        now = now or datetime.now()
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            run_at, schedule_id = heapq.heappop(self._queue)
+            schedule = self.schedules.get(schedule_id)
+            if not schedule or schedule.get('next_run') != run_at:
+                # 已被重新加载替换的过期条目
+                continue
+            due.append((run_at, schedule))
+        
+        if not due:
+            return
+        
+        # 同一轮到期的定时任务共用一次云硬盘列表查询
+        volume_names = self.load_volume_names()
+        
+        def run_one(entry):
+            run_at, schedule = entry
+            logger.info(f"执行定时备份: {schedule.get('name', schedule['id'])}")
+            if self.execute_schedule(schedule, volume_names):
+                logger.info(f"定时备份执行成功: {schedule.get('name', schedule['id'])}")
+            else:
+                logger.error(f"定时备份执行失败: {schedule.get('name', schedule['id'])}")
+            
+            # 从执行时间和当前时间中较晚者向后计算，避免长时间执行后连续补跑
+            next_run = compute_next_run(schedule, max(run_at, datetime.now()))
+            self.update_schedule_last_run(schedule['id'], run_at, next_run)
+            return {"success": True, "next_run": next_run}
+        
+        results = run_parallel(run_one, due, len(due))
+        for (run_at, schedule), result in zip(due, results):
+            next_run = result.get('next_run') or compute_next_run(schedule, max(run_at, datetime.now()))
+            schedule['next_run'] = next_run
+            if next_run:
+                heapq.heappush(self._queue, (next_run, schedule['id']))
+    
+    def _seconds_until_next_run(self, now=None):
+        """距离最早的执行时间的秒数，最长不超过配置检查间隔"""
+        now = now or datetime.now()
+        wait = Config.SCHEDULER_RELOAD_INTERVAL
+        if self._queue:
+            wait = min(wait, max(0.0, (self._queue[0][0] - now).total_seconds()))
+        return wait
+    
+    def reconcile_backup_statuses(self):
+        """同步备份历史中创建中备份的状态
+        
+        每轮查询一次创建中的备份列表，再按updated_at倒序读取上一轮以来有变化的备份（首轮读取全部）：
+        仍在创建中的保持不变，有变化的写入实际状态（可用、失败、删除中等），其余已被删除；
+        本轮的状态全部写入后才推进起点，写入失败时下一轮重新读取
+        """
+        if not self.db_manager or not self.openstack_client:
+            return 0
+        
+        pending = self.db_manager.get_pending_backup_history()
+        if not pending:
+            return 0
+        
+        # 本轮开始时间减去重叠时间作为下一轮的起点，容忍时钟偏差和同步期间的修改
+        started_at = datetime.now(timezone.utc) - timedelta(seconds=Config.INVENTORY_MIRROR_OVERLAP)
+        creating = self.openstack_client.list_backup_statuses('creating')
+        changed = self.openstack_client.backup_statuses_since(self._reconcile_since, pending)
+        
+        updates = {}
+        for backup_id in pending:
+            if backup_id in creating:
+                continue
+            status, fail_reason = changed.get(backup_id, ('deleted', ''))
+            if status == 'creating':
+                continue
+            if status == 'error':
+                updates[backup_id] = ('error', fail_reason or '备份创建失败')
+            else:
+                updates[backup_id] = (status, None)
+        
+        updated = self.db_manager.update_backup_history_statuses(updates) if updates else 0
+        if updated >= len(updates):
+            self._reconcile_since = started_at.strftime('%Y-%m-%dT%H:%M:%S')
+        if updates:
+            logger.info(f"备份状态同步: {len(pending)} 个创建中，{updated} 个状态已更新")
+        return len(updates)
+    
+    def _reconcile_loop(self):
+        """备份状态同步线程"""
+        while not self._stop_event.wait(Config.RECONCILE_INTERVAL):
+            try:
+                self.reconcile_backup_statuses()
+            except Exception as e:
+                logger.error(f"备份状态同步失败: {e}")
+    
+    def start_reconciler(self):
+        """启动备份状态同步线程"""
+        if Config.RECONCILE_INTERVAL <= 0:
+            return None
+        thread = threading.Thread(target=self._reconcile_loop, name='backup-reconciler', daemon=True)
+        thread.start()
+        logger.info(f"备份状态同步已启动，间隔 {Config.RECONCILE_INTERVAL} 秒")
+        return thread
+    
+    def stop(self):
+        """停止调度器"""
+        self._stop_event.set()
+    
     def run(self):
         """运行定时任务调度器"""
         logger.info("定时备份调度器启动")
+        self.start_reconciler()
         
-        while True:
+        while not self._stop_event.is_set():
             try:
-                schedules = self.load_schedules()
+                # 只在配置变化时重新加载定时任务
+                if self._schedules_changed():
+                    self.reload_schedules()
                 
-                for schedule in schedules:
-                    if self.should_run_schedule(schedule):
-                        logger.info(f"执行定时备份: {schedule.get('name', schedule.get('id'))}")
-                        
-                        if self.execute_schedule(schedule):
-                            self.update_schedule_last_run(schedule.get('id'))
-                            logger.info(f"定时备份执行成功: {schedule.get('name', schedule.get('id'))}")
-                        else:
-                            logger.error(f"定时备份执行失败: {schedule.get('name', schedule.get('id'))}")
+                self.run_due_schedules()
                 
-                # 每分钟检查一次
-                time.sleep(60)
+                # 休眠到最早的执行时间，期间定期检查配置版本
+                self._stop_event.wait(self._seconds_until_next_run())
                 
             except KeyboardInterrupt:
                 logger.info("定时备份调度器停止")
                 break
             except Exception as e:
                 logger.error(f"定时备份调度器异常: {e}")
-                time.sleep(60)  # 发生异常时等待1分钟后继续
+                self._stop_event.wait(60)  # 发生异常时等待1分钟后继续
 
 def main():
     """主函数"""
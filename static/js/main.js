@@ -5,16 +5,167 @@ let schedules = [];
 let serverSnapshots = [];
 let volumeSnapshots = [];
 let servers = [];
+// 备份列表下一页的起始标记，没有更多备份时为null
+let backupsNextMarker = null;
+
+// 选中云硬盘超过该数量时以后台任务方式创建备份
+const ASYNC_BACKUP_THRESHOLD = 20;
+
+// 备份列表分页加载的每页数量
+const BACKUP_PAGE_SIZE = 500;
+
+// 事件流不可用时的轮询间隔；事件流连接正常时只做低频兜底刷新
+const POLL_INTERVAL = 30000;
+const FALLBACK_REFRESH_INTERVAL = 300000;
+
+// 列表接口的条件请求缓存: URL -> { etag, data }
+const etagCache = new Map();
 
 // 页面加载完成后初始化
 document.addEventListener('DOMContentLoaded', function() {
     checkHealth();
     loadData();
     
-    // 定期刷新数据
-    setInterval(loadData, 30000); // 每30秒刷新一次
+    // 服务端推送变化事件，不支持EventSource的浏览器定期轮询
+    if (window.EventSource) {
+        subscribeEvents();
+        setInterval(loadData, FALLBACK_REFRESH_INTERVAL);
+    } else {
+        setInterval(loadData, POLL_INTERVAL);
+    }
 });
 
+// 订阅服务端资源变化事件（/api/events）
+function subscribeEvents() {
+    const source = new EventSource('/api/events');
+    let connected = false;
+    
+    source.addEventListener('open', () => {
+        // 断线重连期间可能错过事件，重新加载一次（未变化的列表只返回304）
+        if (connected) {
+            loadData();
+        }
+        connected = true;
+    });
+    source.addEventListener('change', event => applyChange(JSON.parse(event.data)));
+    source.addEventListener('resync', () => loadData());
+    source.addEventListener('error', () => {
+        // 服务端不提供事件流时浏览器不再重连，退回定期轮询
+        if (source.readyState === EventSource.CLOSED) {
+            console.warn('事件流不可用，改为定期刷新');
+            setInterval(loadData, POLL_INTERVAL);
+        }
+    });
+}
+
+// 事件中的资源类型对应的本地数据、表格和加载函数
+const EVENT_RESOURCES = {
+    volumes: {
+        get: () => volumes,
+        set: list => { volumes = list; },
+        tables: ['volumesTableBody'],
+        row: volume => volumeRow(volume),
+        render: () => renderVolumesTable(),
+        load: () => loadVolumes()
+    },
+    backups: {
+        get: () => backups.all_backups,
+        set: list => { backups = groupBackups(list); },
+        tables: ['fullBackupsTableBody', 'incrementalBackupsTableBody'],
+        row: backup => backupRow(backup),
+        render: () => renderBackupsTables(),
+        load: () => loadBackups()
+    },
+    schedules: {
+        get: () => schedules,
+        set: list => { schedules = list; },
+        tables: ['schedulesTableBody'],
+        row: schedule => scheduleRow(schedule),
+        render: () => renderSchedulesTable(),
+        load: () => loadSchedules()
+    },
+    server_snapshots: {
+        get: () => serverSnapshots,
+        set: list => { serverSnapshots = list; },
+        tables: ['serverSnapshotsTableBody'],
+        row: snapshot => serverSnapshotRow(snapshot),
+        render: () => renderServerSnapshotsTable(),
+        load: () => loadServerSnapshots()
+    },
+    volume_snapshots: {
+        get: () => volumeSnapshots,
+        set: list => { volumeSnapshots = list; },
+        tables: ['volumeSnapshotsTableBody'],
+        row: snapshot => volumeSnapshotRow(snapshot),
+        render: () => renderVolumeSnapshotsTable(),
+        load: () => loadVolumeSnapshots()
+    },
+    servers: {
+        get: () => servers,
+        set: list => { servers = list; },
+        load: () => loadServers()
+    }
+};
+
+// 将变化事件合并到本地数据，只替换或移除变化的表格行
+function applyChange(change) {
+    const resource = EVENT_RESOURCES[change.resource];
+    if (!resource) {
+        return;
+    }
+    if (change.reload) {
+        resource.load();
+        return;
+    }
+    
+    const updated = new Map(change.updated.map(item => [item.id, item]));
+    const removed = new Set(change.removed);
+    const current = resource.get();
+    const known = new Set(current.map(item => item.id));
+    const added = change.added.filter(item => !known.has(item.id));
+    resource.set([...added, ...current.filter(item => !removed.has(item.id)).map(item => updated.get(item.id) || item)]);
+    
+    if (!resource.tables) {
+        return;
+    }
+    // 新增条目需要按顺序插入，直接重绘该表格
+    if (added.length || !patchRows(resource, change)) {
+        resource.render();
+    }
+}
+
+// 替换更新的行、移除删除的行，表格被删空时返回false由调用方重绘
+function patchRows(resource, change) {
+    const findRow = id => resource.tables
+        .map(tableId => document.querySelector(`#${tableId} tr[data-id="${CSS.escape(id)}"]`))
+        .find(Boolean);
+    
+    change.removed.forEach(id => {
+        const row = findRow(id);
+        if (row) {
+            row.remove();
+        }
+    });
+    change.updated.forEach(item => {
+        const row = findRow(item.id);
+        if (!row) {
+            return;
+        }
+        // 保留行内复选框的选中状态
+        const checked = row.querySelector('input[type="checkbox"]:checked');
+        const template = document.createElement('template');
+        template.innerHTML = resource.row(item).trim();
+        const newRow = template.content.firstElementChild;
+        const checkbox = newRow.querySelector('input[type="checkbox"]');
+        if (checked && checkbox && !checkbox.disabled) {
+            checkbox.checked = true;
+        }
+        row.replaceWith(newRow);
+    });
+    
+    return resource.tables.every(tableId => document.querySelector(`#${tableId} tr`));
+}
+
 // 检查系统健康状态
 async function checkHealth() {
     try {
@@ -26,7 +177,8 @@ async function checkHealth() {
         
         if (data.status === 'healthy') {
             statusBar.className = 'alert alert-success';
-            statusText.innerHTML = `<i class="bi bi-check-circle"></i> 系统正常 - OpenStack已连接，共 ${data.volume_count} 个云硬盘`;
+            const volumeCount = data.volume_count === null ? '' : `，共 ${data.volume_count} 个云硬盘`;
+            statusText.innerHTML = `<i class="bi bi-check-circle"></i> 系统正常 - OpenStack已连接${volumeCount}`;
         } else {
             statusBar.className = 'alert alert-danger';
             statusText.innerHTML = `<i class="bi bi-exclamation-triangle"></i> 系统异常 - ${data.error}`;
@@ -52,13 +204,34 @@ async function loadData() {
     ]);
 }
 
+// 带ETag的GET请求 - 服务端返回304时复用上次的数据，modified为false表示数据未变化
+async function fetchWithETag(url) {
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers });
+    if (response.status === 304 && cached) {
+        return { data: cached.data, modified: false };
+    }
+    
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (response.ok && etag) {
+        etagCache.set(url, { etag, data });
+    } else {
+        etagCache.delete(url);
+    }
+    return { data, modified: true };
+}
+
 // 加载云硬盘列表
 async function loadVolumes() {
     try {
         showLoading(true);
-        const response = await fetch('/api/volumes');
-        volumes = await response.json();
-        renderVolumesTable();
+        const { data, modified } = await fetchWithETag('/api/volumes');
+        if (modified) {
+            volumes = data;
+            renderVolumesTable();
+        }
     } catch (error) {
         console.error('加载云硬盘失败:', error);
         showMessage('错误', '加载云硬盘列表失败: ' + error.message);
@@ -67,24 +240,77 @@ async function loadVolumes() {
     }
 }
 
-// 加载备份列表
+// 按备份类型分组
+function groupBackups(allBackups) {
+    return {
+        full_backups: allBackups.filter(b => b.backup_type === 'full'),
+        incremental_backups: allBackups.filter(b => b.backup_type === 'incremental'),
+        all_backups: allBackups
+    };
+}
+
+// 备份列表一页的请求地址，marker为空时为第一页
+function backupPageUrl(marker) {
+    const params = new URLSearchParams({ limit: BACKUP_PAGE_SIZE, with_counts: 0 });
+    if (marker) {
+        params.set('marker', marker);
+    }
+    return `/api/backups?${params}`;
+}
+
+// 还有下一页时显示"加载更多"按钮
+function updateLoadMoreBackups() {
+    document.getElementById('loadMoreBackupsBtn').classList.toggle('d-none', !backupsNextMarker);
+}
+
+// 加载备份列表 - 只加载第一页，第一页未变化时不重新渲染；后续页通过"加载更多"按需加载
 async function loadBackups() {
     try {
-        const response = await fetch('/api/backups');
-        backups = await response.json();
-        renderBackupsTables();
+        const { data: page, modified } = await fetchWithETag(backupPageUrl(null));
+        if (page.error) {
+            throw new Error(page.error);
+        }
+        if (modified) {
+            backups = groupBackups(page.backups);
+            backupsNextMarker = page.next_marker;
+            renderBackupsTables();
+            updateLoadMoreBackups();
+        }
     } catch (error) {
         console.error('加载备份失败:', error);
         showMessage('错误', '加载备份列表失败: ' + error.message);
     }
 }
 
+// 加载下一页备份并追加到列表
+async function loadMoreBackups() {
+    if (!backupsNextMarker) {
+        return;
+    }
+    try {
+        const response = await fetch(backupPageUrl(backupsNextMarker));
+        const page = await response.json();
+        if (page.error) {
+            throw new Error(page.error);
+        }
+        backups = groupBackups(backups.all_backups.concat(page.backups));
+        backupsNextMarker = page.next_marker;
+        renderBackupsTables();
+        updateLoadMoreBackups();
+    } catch (error) {
+        console.error('加载更多备份失败:', error);
+        showMessage('错误', '加载更多备份失败: ' + error.message);
+    }
+}
+
 // 加载定时备份列表
 async function loadSchedules() {
     try {
-        const response = await fetch('/api/schedules');
-        schedules = await response.json();
-        renderSchedulesTable();
+        const { data, modified } = await fetchWithETag('/api/schedules');
+        if (modified) {
+            schedules = data;
+            renderSchedulesTable();
+        }
     } catch (error) {
         console.error('加载定时备份失败:', error);
         showMessage('错误', '加载定时备份列表失败: ' + error.message);
@@ -94,9 +320,11 @@ async function loadSchedules() {
 // 加载云主机快照列表
 async function loadServerSnapshots() {
     try {
-        const response = await fetch('/api/server-snapshots');
-        serverSnapshots = await response.json();
-        renderServerSnapshotsTable();
+        const { data, modified } = await fetchWithETag('/api/server-snapshots');
+        if (modified) {
+            serverSnapshots = data;
+            renderServerSnapshotsTable();
+        }
     } catch (error) {
         console.error('加载云主机快照列表失败:', error);
         showMessage('错误', '加载云主机快照列表失败: ' + error.message);
@@ -106,9 +334,11 @@ async function loadServerSnapshots() {
 // 加载云硬盘快照列表
 async function loadVolumeSnapshots() {
     try {
-        const response = await fetch('/api/volume-snapshots');
-        volumeSnapshots = await response.json();
-        renderVolumeSnapshotsTable();
+        const { data, modified } = await fetchWithETag('/api/volume-snapshots');
+        if (modified) {
+            volumeSnapshots = data;
+            renderVolumeSnapshotsTable();
+        }
     } catch (error) {
         console.error('加载云硬盘快照列表失败:', error);
         showMessage('错误', '加载云硬盘快照列表失败: ' + error.message);
@@ -118,8 +348,8 @@ async function loadVolumeSnapshots() {
 // 加载云主机列表
 async function loadServers() {
     try {
-        const response = await fetch('/api/servers');
-        servers = await response.json();
+        const { data } = await fetchWithETag('/api/servers');
+        servers = data;
     } catch (error) {
         console.error('加载云主机列表失败:', error);
     }
@@ -134,8 +364,13 @@ function renderVolumesTable() {
         return;
     }
     
-    tbody.innerHTML = volumes.map(volume => `
-        <tr>
+    tbody.innerHTML = volumes.map(volumeRow).join('');
+}
+
+// 云硬盘表格行
+function volumeRow(volume) {
+    return `
+        <tr data-id="${volume.id}">
             <td>
                 <input type="checkbox" class="volume-checkbox" value="${volume.id}" 
                        ${volume.backupable ? '' : 'disabled'}>
@@ -151,7 +386,7 @@ function renderVolumesTable() {
             </td>
             <td>${formatDateTime(volume.created_at)}</td>
         </tr>
-    `).join('');
+    `;
 }
 
 // 渲染备份表格 - 分离全量备份和增量备份
@@ -161,27 +396,7 @@ function renderBackupsTables() {
     if (backups.full_backups && backups.full_backups.length === 0) {
         fullTbody.innerHTML = '<tr><td colspan="7" class="text-center">暂无全量备份</td></tr>';
     } else {
-        fullTbody.innerHTML = backups.full_backups.map(backup => `
-            <tr class="backup-full">
-                <td><code>${backup.id}</code></td>
-                <td>${backup.name || '未命名'}</td>
-                <td><code>${backup.volume_id}</code></td>
-                <td>${backup.size || '未知'}</td>
-                <td>
-                    <span class="badge bg-${getStatusColor(backup.status)}">
-                        ${backup.status}
-                    </span>
-                </td>
-                <td>${formatDateTime(backup.created_at)}</td>
-                <td>
-                    <button class="btn btn-sm btn-outline-danger" 
-                            onclick="deleteBackup('${backup.id}')" 
-                            ${backup.status === 'available' ? '' : 'disabled'}>
-                        <i class="bi bi-trash"></i>
-                    </button>
-                </td>
-            </tr>
-        `).join('');
+        fullTbody.innerHTML = backups.full_backups.map(backupRow).join('');
     }
     
     // 渲染增量备份表格
@@ -189,30 +404,35 @@ function renderBackupsTables() {
     if (backups.incremental_backups && backups.incremental_backups.length === 0) {
         incrementalTbody.innerHTML = '<tr><td colspan="7" class="text-center">暂无增量备份</td></tr>';
     } else {
-        incrementalTbody.innerHTML = backups.incremental_backups.map(backup => `
-            <tr class="backup-incremental">
-                <td><code>${backup.id}</code></td>
-                <td>${backup.name || '未命名'}</td>
-                <td><code>${backup.volume_id}</code></td>
-                <td>${backup.size || '未知'}</td>
-                <td>
-                    <span class="badge bg-${getStatusColor(backup.status)}">
-                        ${backup.status}
-                    </span>
-                </td>
-                <td>${formatDateTime(backup.created_at)}</td>
-                <td>
-                    <button class="btn btn-sm btn-outline-danger" 
-                            onclick="deleteBackup('${backup.id}')" 
-                            ${backup.status === 'available' ? '' : 'disabled'}>
-                        <i class="bi bi-trash"></i>
-                    </button>
-                </td>
-            </tr>
-        `).join('');
+        incrementalTbody.innerHTML = backups.incremental_backups.map(backupRow).join('');
     }
 }
 
+// 备份表格行
+function backupRow(backup) {
+    return `
+        <tr class="backup-${backup.backup_type === 'full' ? 'full' : 'incremental'}" data-id="${backup.id}">
+            <td><code>${backup.id}</code></td>
+            <td>${backup.name || '未命名'}</td>
+            <td><code>${backup.volume_id}</code></td>
+            <td>${backup.size || '未知'}</td>
+            <td>
+                <span class="badge bg-${getStatusColor(backup.status)}">
+                    ${backup.status}
+                </span>
+            </td>
+            <td>${formatDateTime(backup.created_at)}</td>
+            <td>
+                <button class="btn btn-sm btn-outline-danger" 
+                        onclick="deleteBackup('${backup.id}')" 
+                        ${backup.status === 'available' ? '' : 'disabled'}>
+                    <i class="bi bi-trash"></i>
+                </button>
+            </td>
+        </tr>
+    `;
+}
+
 // 渲染定时备份表格
 function renderSchedulesTable() {
     const tbody = document.getElementById('schedulesTableBody');
@@ -221,35 +441,38 @@ function renderSchedulesTable() {
         return;
     }
 
-    tbody.innerHTML = schedules.map(schedule => {
-        const volumeCount = schedule.volume_ids ? schedule.volume_ids.length : 0;
-        const statusClass = schedule.enabled ? 'schedule-enabled' : 'schedule-disabled';
-        const statusText = schedule.enabled ? '启用' : '禁用';
-        
-        return `
-            <tr>
-                <td>${schedule.name || '未命名'}</td>
-                <td>${schedule.backup_type === 'full' ? '全量备份' : '增量备份'}</td>
-                <td>${volumeCount}</td>
-                <td>${schedule.schedule_type === 'daily' ? '每日' : '每周'} ${schedule.schedule_time}</td>
-                <td><span class="${statusClass}">${statusText}</span></td>
-                <td>${formatDateTime(schedule.created_at)}</td>
-                <td>
-                    <div class="btn-group btn-group-sm" role="group">
-                        <button type="button" class="btn btn-outline-primary" onclick="toggleSchedule('${schedule.id}')">
-                            <i class="bi bi-${schedule.enabled ? 'pause' : 'play'}"></i>
-                        </button>
-                        <button type="button" class="btn btn-outline-info" onclick="manageScheduleVolumes('${schedule.id}')">
-                            <i class="bi bi-gear"></i>
-                        </button>
-                        <button type="button" class="btn btn-outline-danger" onclick="deleteSchedule('${schedule.id}')">
-                            <i class="bi bi-trash"></i>
-                        </button>
-                    </div>
-                </td>
-            </tr>
-        `;
-    }).join('');
+    tbody.innerHTML = schedules.map(scheduleRow).join('');
+}
+
+// 定时备份表格行
+function scheduleRow(schedule) {
+    const volumeCount = schedule.volume_ids ? schedule.volume_ids.length : 0;
+    const statusClass = schedule.enabled ? 'schedule-enabled' : 'schedule-disabled';
+    const statusText = schedule.enabled ? '启用' : '禁用';
+    
+    return `
+        <tr data-id="${schedule.id}">
+            <td>${schedule.name || '未命名'}</td>
+            <td>${schedule.backup_type === 'full' ? '全量备份' : '增量备份'}</td>
+            <td>${volumeCount}</td>
+            <td>${schedule.schedule_type === 'daily' ? '每日' : '每周'} ${schedule.schedule_time}</td>
+            <td><span class="${statusClass}">${statusText}</span></td>
+            <td>${formatDateTime(schedule.created_at)}</td>
+            <td>
+                <div class="btn-group btn-group-sm" role="group">
+                    <button type="button" class="btn btn-outline-primary" onclick="toggleSchedule('${schedule.id}')">
+                        <i class="bi bi-${schedule.enabled ? 'pause' : 'play'}"></i>
+                    </button>
+                    <button type="button" class="btn btn-outline-info" onclick="manageScheduleVolumes('${schedule.id}')">
+                        <i class="bi bi-gear"></i>
+                    </button>
+                    <button type="button" class="btn btn-outline-danger" onclick="deleteSchedule('${schedule.id}')">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>
+    `;
 }
 
 // 渲染云主机快照表格
@@ -260,26 +483,29 @@ function renderServerSnapshotsTable() {
         return;
     }
 
-    tbody.innerHTML = serverSnapshots.map(snapshot => {
-        const statusClass = getStatusClass(snapshot.status);
-        return `
-            <tr>
-                <td>${snapshot.id}</td>
-                <td>${snapshot.name || '未命名'}</td>
-                <td>${snapshot.server_id}</td>
-                <td>${snapshot.size || 0}</td>
-                <td><span class="${statusClass}">${snapshot.status}</span></td>
-                <td>${formatDateTime(snapshot.created_at)}</td>
-                <td>
-                    <div class="btn-group btn-group-sm" role="group">
-                        <button type="button" class="btn btn-outline-danger" onclick="deleteServerSnapshot('${snapshot.id}')">
-                            <i class="bi bi-trash"></i>
-                        </button>
-                    </div>
-                </td>
-            </tr>
-        `;
-    }).join('');
+    tbody.innerHTML = serverSnapshots.map(serverSnapshotRow).join('');
+}
+
+// 云主机快照表格行
+function serverSnapshotRow(snapshot) {
+    const statusClass = getStatusClass(snapshot.status);
+    return `
+        <tr data-id="${snapshot.id}">
+            <td>${snapshot.id}</td>
+            <td>${snapshot.name || '未命名'}</td>
+            <td>${snapshot.server_id}</td>
+            <td>${snapshot.size || 0}</td>
+            <td><span class="${statusClass}">${snapshot.status}</span></td>
+            <td>${formatDateTime(snapshot.created_at)}</td>
+            <td>
+                <div class="btn-group btn-group-sm" role="group">
+                    <button type="button" class="btn btn-outline-danger" onclick="deleteServerSnapshot('${snapshot.id}')">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>
+    `;
 }
 
 // 渲染云硬盘快照表格
@@ -290,26 +516,29 @@ function renderVolumeSnapshotsTable() {
         return;
     }
 
-    tbody.innerHTML = volumeSnapshots.map(snapshot => {
-        const statusClass = getStatusClass(snapshot.status);
-        return `
-            <tr>
-                <td>${snapshot.id}</td>
-                <td>${snapshot.name || '未命名'}</td>
-                <td>${snapshot.volume_id}</td>
-                <td>${snapshot.size || 0}</td>
-                <td><span class="${statusClass}">${snapshot.status}</span></td>
-                <td>${formatDateTime(snapshot.created_at)}</td>
-                <td>
-                    <div class="btn-group btn-group-sm" role="group">
-                        <button type="button" class="btn btn-outline-danger" onclick="deleteVolumeSnapshot('${snapshot.id}')">
-                            <i class="bi bi-trash"></i>
-                        </button>
-                    </div>
-                </td>
-            </tr>
-        `;
-    }).join('');
+    tbody.innerHTML = volumeSnapshots.map(volumeSnapshotRow).join('');
+}
+
+// 云硬盘快照表格行
+function volumeSnapshotRow(snapshot) {
+    const statusClass = getStatusClass(snapshot.status);
+    return `
+        <tr data-id="${snapshot.id}">
+            <td>${snapshot.id}</td>
+            <td>${snapshot.name || '未命名'}</td>
+            <td>${snapshot.volume_id}</td>
+            <td>${snapshot.size || 0}</td>
+            <td><span class="${statusClass}">${snapshot.status}</span></td>
+            <td>${formatDateTime(snapshot.created_at)}</td>
+            <td>
+                <div class="btn-group btn-group-sm" role="group">
+                    <button type="button" class="btn btn-outline-danger" onclick="deleteVolumeSnapshot('${snapshot.id}')">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>
+    `;
 }
 
 // 创建备份
@@ -332,11 +561,23 @@ async function createBackup(type) {
             },
             body: JSON.stringify({
                 volume_ids: selectedVolumes,
-                name: backupName || undefined
+                name: backupName || undefined,
+                async: selectedVolumes.length > ASYNC_BACKUP_THRESHOLD
             })
         });
         
-        const result = await response.json();
+        let result = await response.json();
+        
+        // 后台任务方式：等待任务完成
+        if (result.job_id) {
+            const job = await waitForJob(result.job_id);
+            const successCount = job.summary ? job.summary.success_count : 0;
+            result = {
+                success: job.status === 'completed' && successCount > 0,
+                message: `成功创建 ${successCount}/${job.total} 个${type === 'full' ? '全量' : '增量'}备份`,
+                error: job.error
+            };
+        }
         
         if (result.success) {
             showMessage('成功', result.message);
@@ -355,6 +596,21 @@ async function createBackup(type) {
     }
 }
 
+// 轮询后台任务直到结束
+async function waitForJob(jobId, interval = 2000) {
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const job = await response.json();
+        if (job.error && !job.status) {
+            throw new Error(job.error);
+        }
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
 // 显示定时备份模态框
 function showScheduleModal() {
     // 加载云硬盘列表到模态框
@@ -529,7 +785,8 @@ async function cleanupBackups() {
             return;
         }
         
-        if (!confirm(`确定要删除超过 ${retentionDays} 天的备份吗？此操作无法恢复！`)) {
+        const preview = await previewCleanup({ retention_days: parseInt(retentionDays) });
+        if (!confirm(`确定要删除超过 ${retentionDays} 天的备份吗？${preview}\n\n此操作无法恢复！`)) {
             return;
         }
         
@@ -584,7 +841,8 @@ async function cleanupBackups() {
             .map(([volumeId, days]) => `云硬盘 ${volumeId}: ${days}天`)
             .join('; ');
         
-        if (!confirm(`确定要按以下策略清理备份吗？\n${policySummary}\n\n此操作无法恢复！`)) {
+        const preview = await previewCleanup({ volume_policies: volumePolicies });
+        if (!confirm(`确定要按以下策略清理备份吗？\n${policySummary}${preview}\n\n此操作无法恢复！`)) {
             return;
         }
         
@@ -618,6 +876,31 @@ async function cleanupBackups() {
     }
 }
 
+// 清理预演 - 返回用于确认提示的摘要
+async function previewCleanup(body) {
+    try {
+        const response = await fetch('/api/backup/cleanup', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(Object.assign({ dry_run: true }, body))
+        });
+        const plan = await response.json();
+        if (!plan.success) {
+            return '';
+        }
+        let summary = `\n\n${plan.message}`;
+        if (plan.blocked_count > 0) {
+            summary += `\n另有 ${plan.blocked_count} 个过期备份仍被增量备份依赖，将被跳过`;
+        }
+        return summary;
+    } catch (error) {
+        console.error('清理预演失败:', error);
+        return '';
+    }
+}
+
 // 显示清理备份模态框
 function showCleanupModal() {
     const modal = new bootstrap.Modal(document.getElementById('cleanupModal'));
@@ -656,21 +939,21 @@ async function loadVolumePoliciesList() {
             return;
         }
         
-        // 获取有备份的云硬盘
-        const volumesWithBackups = new Set();
+        // 一次遍历统计每个云硬盘的备份数量
+        const backupCounts = new Map();
         backups.all_backups.forEach(backup => {
-            volumesWithBackups.add(backup.volume_id);
+            backupCounts.set(backup.volume_id, (backupCounts.get(backup.volume_id) || 0) + 1);
         });
         
-        if (volumesWithBackups.size === 0) {
+        if (backupCounts.size === 0) {
             volumePoliciesList.innerHTML = '<div class="text-center text-muted">暂无备份的云硬盘</div>';
             return;
         }
         
-        volumePoliciesList.innerHTML = Array.from(volumesWithBackups).map(volumeId => {
-            const volume = volumes.find(v => v.id === volumeId);
+        const volumesById = new Map(volumes.map(v => [v.id, v]));
+        volumePoliciesList.innerHTML = Array.from(backupCounts).map(([volumeId, backupCount]) => {
+            const volume = volumesById.get(volumeId);
             const volumeName = volume ? volume.name || '未命名' : '未知';
-            const backupCount = backups.all_backups.filter(b => b.volume_id === volumeId).length;
             
             return `
                 <div class="row mb-2 align-items-center">
@@ -865,8 +1148,17 @@ async function deleteBackup(backupId) {
     }
 }
 
-// 刷新数据
-function refreshData() {
+// 刷新数据 - 手动刷新时先使服务端缓存失效
+async function refreshData() {
+    try {
+        await fetch('/api/cache/invalidate', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({})
+        });
+    } catch (error) {
+        console.error('刷新缓存失败:', error);
+    }
     loadData();
 }
 
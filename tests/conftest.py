@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试公共配置
+所有测试使用进程内模拟的OpenStack（fake_openstack），不连接真实云环境和MySQL
+"""
+
+import os
+import sys
+
+# 配置在导入时读取，必须在导入项目模块之前设置
+os.environ.update({
+    "OPENSTACK_FAKE": "true",
+    "FAKE_OPENSTACK_VOLUMES": "20",
+    "FAKE_OPENSTACK_BACKUPS_PER_VOLUME": "10",
+    "FAKE_OPENSTACK_SERVERS": "5",
+    "CLEANUP_RATE_LIMIT": "0",
+    "CLEANUP_DELETE_POLL_INTERVAL": "0.01",
+    "INVENTORY_MIRROR_ENABLED": "false",
+    "DEBUG": "false",
+    # 指向不可用的端口，数据库管理器初始化失败后以无数据库方式运行
+    "MYSQL_HOST": "127.0.0.1",
+    "MYSQL_PORT": "1"
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fake_openstack import FakeConnection
+from openstack_client import OpenStackClient
+
+@pytest.fixture
+def fake_conn():
+    """小规模模拟云：3个云硬盘，每个云硬盘按天10个备份，每7个备份一个全量备份"""
+    return FakeConnection(volumes=3, backups_per_volume=10, servers=2, seed=7)
+
+@pytest.fixture
+def client(fake_conn):
+    return OpenStackClient(fake_conn)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量备份链删除顺序测试（user-007）：叶子优先、仍被依赖的父备份跳过、不同链并行
+"""
+
+from datetime import datetime, timedelta
+from retention import plan_chain_deletions
+
+
+def _backup(backup_id, days_ago, incremental, volume_id="vol-1", status="available"):
+    created_at = (datetime(2025, 6, 30, 12, 0) - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%S')
+    return {
+        "id": backup_id,
+        "volume_id": volume_id,
+        "status": status,
+        "created_at": created_at,
+        "is_incremental": incremental,
+        "backup_type": "incremental" if incremental else "full",
+        "has_dependent_backups": False,
+        "size": 10
+    }
+
+def _ids(backups):
+    return [backup["id"] for backup in backups]
+
+def test_lane_deletes_chain_from_leaf_to_full():
+    chain = [_backup("full", 5, False), _backup("inc-1", 4, True), _backup("inc-2", 3, True)]
+    lanes, blocked = plan_chain_deletions(chain, chain)
+    assert [_ids(lane) for lane in lanes] == [["inc-2", "inc-1", "full"]]
+    assert blocked == []
+
+def test_parents_of_kept_backup_are_blocked():
+    chain = [_backup("full", 5, False), _backup("inc-1", 4, True), _backup("inc-2", 3, True)]
+    lanes, blocked = plan_chain_deletions(chain[:2], chain)
+    assert lanes == []
+    assert _ids(blocked) == ["inc-1", "full"]
+
+def test_leaf_with_unknown_dependents_is_blocked():
+    leaf = dict(_backup("full", 5, False), has_dependent_backups=True)
+    lanes, blocked = plan_chain_deletions([leaf], [leaf])
+    assert lanes == []
+    assert _ids(blocked) == ["full"]
+
+def test_independent_chains_get_separate_lanes_longest_first():
+    backups = [
+        _backup("a-full", 9, False), _backup("a-inc", 8, True),
+        _backup("b-full", 7, False), _backup("b-inc-1", 6, True), _backup("b-inc-2", 5, True),
+        _backup("c-full", 4, False, volume_id="vol-2")
+    ]
+    lanes, blocked = plan_chain_deletions(backups, backups)
+    assert [_ids(lane) for lane in lanes] == [["b-inc-2", "b-inc-1", "b-full"], ["a-inc", "a-full"], ["c-full"]]
+    assert blocked == []
+
+def test_cleanup_against_fake_respects_dependencies(client, fake_conn):
+    # 模拟云拒绝删除仍有依赖的备份，删除顺序错误时会出现失败
+    result = client.cleanup_backups(retention_days=2)
+    assert result["success"]
+    assert result["failed_count"] == 0
+    # 每个云硬盘：第一条链7个备份全部过期并删除，第二条链的全量备份仍被保留的增量备份依赖
+    assert result["deleted_count"] == 3 * 7
+    assert result["blocked_count"] == 3
+    assert len(fake_conn.cloud.backups) == 3 * 3
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份历史键集分页测试（user-015）
+查询语句在内存SQLite上执行，SQLite支持本查询用到的全部语法，占位符 %s 转换为 ?
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import pytest
+from database import DatabaseManager
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" "))
+sqlite3.register_converter("TIMESTAMP", lambda value: datetime.fromisoformat(value.decode()))
+
+class SqliteCursor:
+    def __init__(self, conn, dictionary):
+        self._cursor = conn.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql.replace("%s", "?"), params)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _row(self, row):
+        return dict(row) if row is not None and self._dictionary else row
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+class SqlitePool:
+    """提供与 ConnectionPool 相同的 connection() 接口"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        self.conn.row_factory = sqlite3.Row
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self, dictionary=False):
+        return SqliteCursor(self.conn, dictionary)
+
+@pytest.fixture
+def history_db():
+    pool = SqlitePool()
+    pool.conn.execute("""
+        CREATE TABLE backup_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            schedule_id TEXT, backup_id TEXT, volume_id TEXT NOT NULL, backup_name TEXT,
+            backup_type TEXT NOT NULL DEFAULT 'full', status TEXT NOT NULL, error_message TEXT,
+            created_at TIMESTAMP NOT NULL, updated_at TIMESTAMP NOT NULL
+        )
+    """)
+    started = datetime(2025, 6, 1, 2, 0)
+    for index in range(25):
+        # 每3条记录共用同一创建时间，分页需按ID区分
+        created_at = started + timedelta(minutes=index // 3)
+        pool.conn.execute(
+            "INSERT INTO backup_history (schedule_id, backup_id, volume_id, backup_name, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'available', ?, ?)",
+            (f"schedule-{index % 2}", f"backup-{index}", f"vol-{index % 4}", f"backup-{index}", created_at, created_at)
+        )
+
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = pool
+    return db
+
+def _all_pages(db, limit, **filters):
+    pages = []
+    marker = None
+    while True:
+        page = db.get_backup_history(limit=limit, marker=marker, **filters)
+        if not page:
+            return pages
+        pages.append(page)
+        marker = page[-1]["id"]
+
+def test_pages_cover_history_once_in_order(history_db):
+    everything = history_db.get_backup_history(limit=1000)
+    assert len(everything) == 25
+    assert everything == sorted(everything, key=lambda row: (row["created_at"], row["id"]), reverse=True)
+
+    pages = _all_pages(history_db, limit=4)
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 4, 1]
+    assert [row["id"] for page in pages for row in page] == [row["id"] for row in everything]
+
+def test_pagination_with_filters(history_db):
+    expected = [row["id"] for row in history_db.get_backup_history(limit=1000, volume_id="vol-1")]
+    pages = _all_pages(history_db, limit=2, volume_id="vol-1")
+    assert [row["id"] for page in pages for row in page] == expected
+    assert all(row["volume_id"] == "vol-1" for page in pages for row in page)
+
+    schedule_rows = [row for page in _all_pages(history_db, limit=5, schedule_id="schedule-0") for row in page]
+    assert len(schedule_rows) == 13
+    assert all(row["schedule_id"] == "schedule-0" for row in schedule_rows)
+
+@pytest.mark.parametrize("limit, expected", [(0, 1), (-5, 1), (5000, 25)])
+def test_api_clamps_limit(history_db, monkeypatch, limit, expected):
+    import app as app_module
+    monkeypatch.setattr(app_module, "db_manager", history_db)
+    response = app_module.app.test_client().get(f"/api/history?limit={limit}")
+    assert response.status_code == 200
+    assert len(response.get_json()["history"]) == expected
+
+def test_api_has_no_marker_after_last_page(history_db, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, "db_manager", history_db)
+    http = app_module.app.test_client()
+    assert http.get("/api/history?volume_id=vol-9").get_json() == {"history": [], "next_marker": None}
+    data = http.get("/api/history?limit=25").get_json()
+    last = http.get(f"/api/history?limit=25&marker={data['next_marker']}").get_json()
+    assert last == {"history": [], "next_marker": None}
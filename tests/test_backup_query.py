@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份分页查询测试（user-017）：分页标记和每页数量的校验
+"""
+
+import pytest
+
+@pytest.fixture(scope="module")
+def web():
+    import app as app_module
+    return app_module
+
+@pytest.fixture
+def http(web):
+    web.openstack_client.invalidate_cache()
+    return web.app.test_client()
+
+def test_unknown_backup_marker_returns_400(http):
+    assert http.get("/api/backups?marker=nonexistent").status_code == 400
+
+@pytest.mark.parametrize("limit, expected", [(0, 1), (-3, 1), (5, 5)])
+def test_limit_is_clamped_to_at_least_one(http, limit, expected):
+    data = http.get(f"/api/backups?limit={limit}").get_json()
+    assert len(data["backups"]) == expected
+    assert data["next_marker"] == data["backups"][-1]["id"]
+
+def test_limit_is_clamped_to_max_page_size(http, web, monkeypatch):
+    monkeypatch.setattr(web.Config, "BACKUP_PAGE_MAX_SIZE", 7)
+    data = http.get("/api/backups?limit=100000").get_json()
+    assert len(data["backups"]) == 7
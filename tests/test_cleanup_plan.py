@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+清理预演测试（user-008）：预演与实际执行的删除集合一致，耗时估算和耗时样本持久化
+耗时样本在内存SQLite上读写
+"""
+
+import pytest
+from database import DatabaseManager
+from openstack_client import OpenStackClient, estimate_deletion_seconds
+from test_backup_history import SqlitePool
+
+
+def test_dry_run_plan_matches_actual_cleanup(client, fake_conn):
+    sizes = {backup["id"]: backup["size"] for backup in client.get_backups()}
+    plan = client.plan_backup_cleanup(retention_days=2)
+    assert plan["success"] and plan["dry_run"]
+    # 预演不调用删除接口
+    assert len(fake_conn.cloud.backups) == len(sizes)
+    assert "delete_backup" not in fake_conn.cloud.calls
+
+    result = client.cleanup_backups(retention_days=2)
+    assert result["deleted_count"] == plan["delete_count"]
+    assert result["blocked_count"] == plan["blocked_count"]
+    assert {
+        volume_id: stats["deleted"] for volume_id, stats in result["volume_stats"].items() if stats["deleted"]
+    } == {
+        volume_id: stats["delete_count"] for volume_id, stats in plan["affected_volumes"].items() if stats["delete_count"]
+    }
+    assert plan["reclaim_gb"] == sum(sizes[detail["id"]] for detail in result["deleted_details"])
+
+def test_policy_dry_run_matches_actual_cleanup(client):
+    policy = {"full": 1, "incremental": 2, "daily": 0, "weekly": 0, "monthly": 0}
+    plan = client.plan_backup_cleanup(default_policy=policy)
+    result = client.cleanup_backups_by_volume({}, policy)
+    assert result["success"]
+    assert result["failed_count"] == 0
+    assert result["deleted_count"] == plan["delete_count"]
+    assert result["blocked_count"] == plan["blocked_count"]
+
+def test_estimate_runs_lanes_in_parallel_and_honours_rate_limit():
+    # 两条链分配到两个线程：最长链 3*1 + 2*10 = 23 秒
+    assert estimate_deletion_seconds([3, 1], 1, 10, workers=2, rate_limit=0) == 23
+    # 单线程时两条链串行
+    assert estimate_deletion_seconds([3, 1], 1, 10, workers=1, rate_limit=0) == 24
+    # 限流下限：100个删除请求，每秒最多2个
+    assert estimate_deletion_seconds([1] * 100, 0.1, 0, workers=50, rate_limit=2) == 50
+    assert estimate_deletion_seconds([], 1, 10, workers=4, rate_limit=5) == 0
+
+@pytest.fixture
+def latency_db():
+    pool = SqlitePool()
+    pool.conn.execute("""
+        CREATE TABLE operation_latencies (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, operation TEXT NOT NULL, seconds REAL NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = pool
+    return db
+
+def test_plan_uses_samples_saved_by_earlier_runs(fake_conn, latency_db):
+    first = OpenStackClient(fake_conn)
+    first.latency_store = latency_db
+    result = first.cleanup_backups(retention_days=2)
+    assert result["deleted_count"] > 0
+
+    # 新进程（如命令行预演）从数据库读取之前实测的样本
+    second = OpenStackClient(fake_conn)
+    second.latency_store = latency_db
+    plan = second.plan_backup_cleanup(retention_days=1)
+    assert plan["latency_samples"] == result["deleted_count"]
+    assert latency_db.get_operation_latencies("delete_backup") == second._latency_samples("delete_backup")
+
+def test_saved_samples_are_capped_per_operation(latency_db):
+    latency_db.save_operation_latencies([("delete_backup", float(index)) for index in range(5)], keep=3)
+    latency_db.save_operation_latencies([("wait_backup_deleted", 1.0)], keep=3)
+    assert latency_db.get_operation_latencies("delete_backup") == [2.0, 3.0, 4.0]
+    assert latency_db.get_operation_latencies("wait_backup_deleted") == [1.0]
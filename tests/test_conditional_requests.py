@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表接口条件请求测试（user-021）：内容不变时无论清单是否已缓存都返回304
+"""
+
+import pytest
+
+@pytest.fixture(scope="module")
+def web():
+    import app as app_module
+    return app_module
+
+@pytest.fixture
+def http(web):
+    web.openstack_client.invalidate_cache()
+    return web.app.test_client()
+
+def _revalidate(http, url, etag):
+    return http.get(url, headers={"If-None-Match": etag})
+
+@pytest.mark.parametrize("url", ["/api/volumes", "/api/servers", "/api/server-snapshots", "/api/volume-snapshots"])
+def test_unchanged_list_returns_304(http, url):
+    first = http.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    second = _revalidate(http, url, etag)
+    assert second.status_code == 304
+    assert second.data == b""
+
+def test_etag_is_stable_when_cache_expires(http, web):
+    etag = http.get("/api/servers").headers["ETag"]
+    # 缓存过期后重新加载，内容相同时ETag不变
+    web.openstack_client.invalidate_cache()
+    response = _revalidate(http, "/api/servers", etag)
+    assert response.status_code == 304
+    assert _revalidate(http, "/api/servers", etag).status_code == 304
+
+def test_changed_list_returns_new_etag(http, web):
+    etag = http.get("/api/servers").headers["ETag"]
+    cloud = web.openstack_client.conn.cloud
+    server = next(iter(cloud.servers.values()))
+    original = server.name
+    server.name = f"{original}-renamed"
+    try:
+        web.openstack_client.invalidate_cache()
+        response = _revalidate(http, "/api/servers", etag)
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+    finally:
+        server.name = original
+        web.openstack_client.invalidate_cache()
+
+def test_query_string_is_part_of_etag(http):
+    etag = http.get("/api/servers").headers["ETag"]
+    assert _revalidate(http, "/api/servers?page=2", etag).status_code == 200
+
+@pytest.mark.parametrize("url", ["/api/backups?limit=5", "/api/backups?limit=5&with_counts=1"])
+def test_backup_page_returns_304(http, web, url):
+    etag = http.get(url).headers["ETag"]
+    assert _revalidate(http, url, etag).status_code == 304
+    # 备份清单是否已缓存不影响分页结果的ETag
+    web.openstack_client.get_backups()
+    assert _revalidate(http, url, etag).status_code == 304
+
+def test_volume_backups_returns_304(http, web):
+    volume_id = web.openstack_client.get_volumes()[0]["id"]
+    url = f"/api/volumes/{volume_id}/backups"
+    web.openstack_client.invalidate_cache()
+    etag = http.get(url).headers["ETag"]
+    web.openstack_client.get_backups()
+    assert _revalidate(http, url, etag).status_code == 304
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+健康检查测试（user-019）：测试环境没有MySQL，数据库不可用时深度检查和就绪检查都应报告异常
+"""
+
+import pytest
+
+@pytest.fixture(scope="module")
+def web():
+    import app as app_module
+    return app_module
+
+def test_deep_check_reports_database_outage(web):
+    web._health_cache.update(result=None, expires=0.0)
+    response = web.app.test_client().get("/api/health")
+    data = response.get_json()
+    assert response.status_code == 500
+    assert data["status"] == "unhealthy"
+    assert data["openstack_connected"] is True
+    assert data["database_connected"] is False
+    assert "database" in data["error"]
+
+def test_deep_check_counts_volumes_without_listing(web):
+    web._health_cache.update(result=None, expires=0.0)
+    web.openstack_client.invalidate_cache()
+    calls = web.openstack_client.conn.cloud.calls
+    calls.clear()
+    data = web.app.test_client().get("/api/health").get_json()
+    assert data["volume_count"] == len(web.openstack_client.conn.cloud.volumes)
+    # 只有一次with_count数量查询，没有分页读取云硬盘列表
+    assert calls.get("get_volumes") == 1
+    assert "volumes" not in calls
+
+def test_readiness_returns_503_without_database(web):
+    assert web.app.test_client().get("/api/health/ready").status_code == 503
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源清单缓存测试（user-001）：命中、失效，以及加载期间失效时不缓存过时结果
+"""
+
+from openstack_client import InventoryCache
+
+def test_second_read_is_served_from_cache():
+    cache = InventoryCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or [{"id": "a"}]
+    assert cache.get_or_load("volumes", loader) == [{"id": "a"}]
+    assert cache.get_or_load("volumes", loader) == [{"id": "a"}]
+    assert len(calls) == 1
+    cache.invalidate("volumes")
+    cache.get_or_load("volumes", loader)
+    assert len(calls) == 2
+
+def test_invalidate_during_load_discards_stale_result():
+    cache = InventoryCache(ttl=60)
+
+    def stale_loader():
+        # 加载过程中发生写操作并使缓存失效
+        cache.invalidate("backups")
+        return [{"id": "stale"}]
+
+    assert cache.get_or_load("backups", stale_loader) == [{"id": "stale"}]
+    assert cache.peek("backups") is None
+    assert cache.get_or_load("backups", lambda: [{"id": "fresh"}]) == [{"id": "fresh"}]
+    assert cache.peek("backups") == [{"id": "fresh"}]
+
+def test_clearing_all_resources_discards_in_flight_loads():
+    cache = InventoryCache(ttl=60)
+
+    def stale_loader():
+        cache.invalidate()
+        return [{"id": "stale"}]
+
+    cache.get_or_load("servers", stale_loader)
+    assert cache.peek("servers") is None
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+资源清单镜像测试（user-023）：增量同步后新增、修改和删除的资源都反映到镜像
+"""
+
+import openstack
+import pytest
+from inventory_mirror import InventoryMirror
+
+@pytest.fixture
+def mirror(client):
+    mirror = InventoryMirror(client, overlap=0)
+    client.mirror = mirror
+    for resource in mirror.stores:
+        mirror.sync(resource, full=True)
+    return mirror
+
+def _ids(mirror, resource):
+    return {item["id"] for item in mirror.items(resource)}
+
+def test_local_delete_removes_item_immediately(client, mirror):
+    backup = next(b for b in mirror.items("backups") if not b["has_dependent_backups"])
+    snapshot = mirror.items("volume_snapshots")[0]
+    server_snapshot = mirror.items("server_snapshots")[0]
+
+    assert client.delete_backup(backup["id"])["success"]
+    assert client.delete_volume_snapshot(snapshot["id"])["success"]
+    assert client.delete_server_snapshot(server_snapshot["id"])["success"]
+    assert backup["id"] not in _ids(mirror, "backups")
+    assert snapshot["id"] not in _ids(mirror, "volume_snapshots")
+    assert server_snapshot["id"] not in _ids(mirror, "server_snapshots")
+
+    # 之后的增量同步不会把删除中的资源重新加入镜像
+    for resource in mirror.stores:
+        mirror.sync(resource)
+    assert backup["id"] not in _ids(mirror, "backups")
+    assert snapshot["id"] not in _ids(mirror, "volume_snapshots")
+
+def test_delta_sync_drops_items_deleted_by_other_clients(fake_conn, mirror):
+    backup = next(b for b in mirror.items("backups") if not b["has_dependent_backups"])
+    fake_conn.block_storage.delete_backup(backup["id"])
+
+    mirror.sync("backups")
+    assert backup["id"] not in _ids(mirror, "backups")
+    assert _ids(mirror, "backups") == set(fake_conn.cloud.backups)
+    assert mirror.stats()["resources"]["backups"]["delta_syncs"] == 1
+
+def test_volume_snapshots_fall_back_to_full_reconcile(client, fake_conn, mirror):
+    # SDK丢弃快照查询的排序参数，按updated_at倒序提前停止会漏掉变化，快照只做全量核对
+    with pytest.raises(openstack.exceptions.InvalidResourceQuery):
+        list(client.iter_changes("volume_snapshots", "2000-01-01T00:00:00"))
+    mirror.sync("volume_snapshots")
+    assert mirror.stats()["resources"]["volume_snapshots"]["delta_supported"] is False
+
+    renamed, deleted = mirror.items("volume_snapshots")[:2]
+    fake_conn.cloud.volume_snapshots[renamed["id"]].name = "renamed"
+    fake_conn.block_storage.delete_snapshot(deleted["id"])
+    mirror.sync("volume_snapshots", full=True)
+    assert _ids(mirror, "volume_snapshots") == set(fake_conn.cloud.volume_snapshots)
+    assert next(item for item in mirror.items("volume_snapshots") if item["id"] == renamed["id"])["name"] == "renamed"
+
+def test_delta_sync_picks_up_created_backups(client, fake_conn, mirror):
+    volume_id = mirror.items("volumes")[0]["id"]
+    created = client.create_full_backup(volume_id)
+    assert created["success"]
+
+    mirror.sync("backups")
+    assert created["id"] in _ids(mirror, "backups")
+    assert created["id"] in {b["id"] for b in client.get_volume_backups(volume_id)}
+
+def test_mirror_and_cache_share_content_version(client, mirror):
+    mirror_version = client.inventory_version("servers")
+    client.mirror = None
+    client.get_servers()
+    assert client.inventory_version("servers") == mirror_version
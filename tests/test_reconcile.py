@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份状态同步测试（user-016）：按updated_at读取上一轮以来的变化，不逐个查询备份
+备份历史在内存SQLite上读写
+"""
+
+from datetime import datetime
+import pytest
+from scheduler import BackupScheduler
+from database import DatabaseManager
+from test_backup_history import SqlitePool
+
+@pytest.fixture
+def scheduler(client, fake_conn):
+    pool = SqlitePool()
+    pool.conn.execute("""
+        CREATE TABLE backup_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, backup_id TEXT, volume_id TEXT NOT NULL,
+            status TEXT NOT NULL, error_message TEXT
+        )
+    """)
+    for backup in list(fake_conn.cloud.backups.values())[:4]:
+        backup.status = "creating"
+        backup.updated_at = "2025-01-01T00:00:00.000000"
+        pool.conn.execute(
+            "INSERT INTO backup_history (backup_id, volume_id, status) VALUES (?, ?, 'creating')",
+            (backup.id, backup.volume_id)
+        )
+
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = pool
+    scheduler = BackupScheduler.__new__(BackupScheduler)
+    scheduler.db_manager = db
+    scheduler.openstack_client = client
+    scheduler._reconcile_since = None
+    return scheduler
+
+def _statuses(scheduler):
+    rows = scheduler.db_manager.pool.conn.execute("SELECT backup_id, status, error_message FROM backup_history")
+    return {row["backup_id"]: (row["status"], row["error_message"]) for row in rows}
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+def test_reconcile_reads_changes_without_per_backup_lookups(scheduler, fake_conn):
+    assert scheduler.reconcile_backup_statuses() == 0
+    assert scheduler._reconcile_since is not None
+
+    available, failed, deleted, creating = list(_statuses(scheduler))
+    backups = fake_conn.cloud.backups
+    backups[available].status = "available"
+    backups[available].updated_at = _now()
+    backups[failed].status = "error"
+    backups[failed].fail_reason = "磁盘空间不足"
+    backups[failed].updated_at = _now()
+    del backups[deleted]
+
+    fake_conn.cloud.calls.clear()
+    assert scheduler.reconcile_backup_statuses() == 3
+    assert _statuses(scheduler) == {
+        available: ("available", None),
+        failed: ("error", "磁盘空间不足"),
+        deleted: ("deleted", None),
+        creating: ("creating", None)
+    }
+    assert "get_backup" not in fake_conn.cloud.calls
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GFS保留策略测试（user-009）
+"""
+
+from datetime import datetime, timedelta
+from retention import evaluate_volume_retention
+
+
+def _backup(backup_id, days_ago, incremental, volume_id="vol-1", status="available"):
+    created_at = (datetime(2025, 6, 30, 12, 0) - timedelta(days=days_ago)).strftime('%Y-%m-%dT%H:%M:%S')
+    return {
+        "id": backup_id,
+        "volume_id": volume_id,
+        "status": status,
+        "created_at": created_at,
+        "is_incremental": incremental,
+        "backup_type": "incremental" if incremental else "full",
+        "has_dependent_backups": False,
+        "size": 10
+    }
+
+def _ids(backups):
+    return [backup["id"] for backup in backups]
+
+def _policy(**counts):
+    return dict({"full": 0, "incremental": 0, "daily": 0, "weekly": 0, "monthly": 0}, **counts)
+
+def test_gfs_keeps_latest_by_type_and_per_day():
+    # 10天每天一个备份，第9天和第4天前为全量备份
+    backups = [_backup(f"b{days}", days, days not in (9, 4)) for days in range(10)]
+    keep, delete = evaluate_volume_retention(backups, _policy(full=1, incremental=2, daily=3))
+    # 最新2个增量（0、1天前），最新1个全量（4天前），最近3天每天一个（0、1、2天前）
+    assert sorted(_ids(keep)) == ["b0", "b1", "b2", "b4"]
+    assert sorted(_ids(delete)) == ["b3", "b5", "b6", "b7", "b8", "b9"]
+
+def test_gfs_keeps_one_backup_per_week_and_month():
+    backups = [_backup(f"b{days}", days, False) for days in range(0, 90, 3)]
+    keep, _ = evaluate_volume_retention(backups, _policy(weekly=2, monthly=3))
+    kept = {backup["created_at"][:10] for backup in keep}
+    # 每个周期保留最新的一个：最近两周各一个，最近三个月各一个（与周保留可能重合）
+    assert len({datetime.fromisoformat(day).isocalendar()[:2] for day in kept}) >= 2
+    assert len({day[:7] for day in kept}) == 3
+    assert "2025-06-30" in kept
+
+def test_gfs_deletes_failed_and_keeps_in_progress_backups():
+    backups = [
+        _backup("ok", 3, False),
+        _backup("failed", 2, False, status="error"),
+        _backup("running", 1, True, status="creating")
+    ]
+    keep, delete = evaluate_volume_retention(backups, _policy(full=1))
+    assert sorted(_ids(keep)) == ["ok", "running"]
+    assert _ids(delete) == ["failed"]
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+定时任务配置版本测试（user-010）：同一秒内的修改也改变版本，执行时间更新不改变版本
+查询语句在内存SQLite上执行，MySQL的 CRC32/CONCAT 函数注册为SQLite函数
+"""
+
+import zlib
+import pytest
+from database import DatabaseManager
+from test_backup_history import SqlitePool
+
+@pytest.fixture
+def schedule_db():
+    pool = SqlitePool()
+    pool.conn.create_function("CRC32", 1, lambda value: zlib.crc32(str(value).encode()))
+    pool.conn.create_function("CONCAT", -1, lambda *values: "".join(str(value) for value in values))
+    pool.conn.execute("""
+        CREATE TABLE backup_schedules (
+            id TEXT PRIMARY KEY, enabled INTEGER NOT NULL DEFAULT 1, volume_ids TEXT NOT NULL,
+            next_run TIMESTAMP NULL, config_version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    for schedule_id in ("schedule-1", "schedule-2"):
+        pool.conn.execute("INSERT INTO backup_schedules (id, volume_ids) VALUES (?, '[]')", (schedule_id,))
+
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.pool = pool
+    return db
+
+def test_edits_within_one_second_change_version(schedule_db):
+    versions = [schedule_db.get_schedules_version()]
+    assert schedule_db.update_schedule_enabled("schedule-1", False)
+    versions.append(schedule_db.get_schedules_version())
+    assert schedule_db.update_schedule_volumes("schedule-1", ["vol-1"])
+    versions.append(schedule_db.get_schedules_version())
+    assert schedule_db.update_schedule_enabled("schedule-2", False)
+    versions.append(schedule_db.get_schedules_version())
+    assert len(set(versions)) == len(versions)
+
+def test_next_run_update_keeps_version(schedule_db):
+    version = schedule_db.get_schedules_version()
+    assert schedule_db.update_schedule_next_run("schedule-1", "2025-06-01 02:00:00")
+    assert schedule_db.get_schedules_version() == version
+
+def test_delete_changes_version(schedule_db):
+    version = schedule_db.get_schedules_version()
+    assert schedule_db.delete_schedule("schedule-2")
+    assert schedule_db.get_schedules_version() != version
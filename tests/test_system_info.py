@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+系统信息测试（user-024）：清单未缓存时备份只查询数量，不读取完整备份清单
+"""
+
+def test_cold_backup_stats_use_counts_only(client, fake_conn):
+    fake_conn.cloud.calls.clear()
+    info = client.get_system_info()
+    assert info["sources"]["backups"] == "count"
+    assert info["backups"]["total"] == len(fake_conn.cloud.backups)
+    assert info["backups"]["full"] is None
+    assert info["backups"]["incremental"] is None
+    assert "backups" not in fake_conn.cloud.calls
+
+def test_warm_cache_reports_full_and_incremental(client, fake_conn):
+    backups = client.get_backups()
+    info = client.get_system_info()
+    assert info["sources"]["backups"] == "local"
+    assert info["backups"]["full"] == sum(1 for b in backups if b["backup_type"] == "full")
+    assert info["backups"]["full"] + info["backups"]["incremental"] == len(backups)